@@ -7,14 +7,30 @@ import logging
 import re
 import os
 import json
+import mmap
+import hashlib
+import pickle
+import queue
+import threading
+from collections import defaultdict
+from datetime import date, datetime, time as datetime_time
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterable, Iterator, NamedTuple, Optional, Sequence
 import pdfplumber
 import pandas as pd
+from pandas.io.parsers import TextParser
+import numpy as np
 import openpyxl
 from openpyxl import Workbook
+from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
 from openpyxl.styles import Font, Border, Side
 from openpyxl.utils import get_column_letter
 from ruamel.yaml import YAML
 from ruamel.yaml.error import YAMLError
+from ruamel.yaml.events import (MappingStartEvent, MappingEndEvent, ScalarEvent,
+                                SequenceStartEvent, SequenceEndEvent)
+from ruamel.yaml.nodes import ScalarNode
 
 PROCESS_CSV = False
 PROCESS_TAB = False
@@ -32,6 +48,107 @@ CLEAR_PDF = False
 CLEAR_JSON = False
 CLEAR_XLS = False
 
+# Record every loaded source file in the ingest_manifest table and use it to skip
+# unchanged files, load only the appended tail of CSV/TAB files and reload
+# (clear + parse) anything else that changed. CLEAR_* flags force a reload.
+INCREMENTAL_INGEST = True
+APPENDABLE_SOURCES = ('csv', 'tab')
+
+# Tables deduplicated by a 64-bit fingerprint of each row (RowHash) with a unique
+# index, so overlapping exports are loaded with INSERT OR IGNORE.
+ROW_HASH_TABLES = (
+    'boarding_data', 'sirena_data', 'pointz_aggregator_data', 'skyteam_data',
+    'skyteam_timetable', 'frequent_flyer_flights', 'boarding_pass_xls',
+)
+
+# Parse every enabled source in its own process into STAGING_DIR/<source>.db and merge
+# the staging files into DB_FILE afterwards.
+CONCURRENT_INGEST = False
+STAGING_DIR = 'staging'
+
+# Bulk-load mode: rows are written with executemany in batches of BATCH_SIZE and
+# the PRAGMAs below are applied for the duration of the load.
+BULK_LOAD = True
+BATCH_SIZE = 10000
+BULK_LOAD_PRAGMAS = {
+    'journal_mode': 'MEMORY',
+    'synchronous': 'OFF',
+    'cache_size': -262144,  # negative value is KiB, i.e. 256 MiB
+}
+
+# Invalid input records go to the ingest_rejects table; the log only gets a running
+# count at most every REJECT_LOG_INTERVAL seconds and a summary per file.
+REJECT_LOG_INTERVAL = 10.0
+
+# Commit at least every CHECKPOINT_INTERVAL seconds while a source loads and record how far
+# it got in ingest_checkpoints (byte offset for CSV/TAB, element count for XML/JSON,
+# workbook for XLS), so an interrupted run resumes there. Resuming checks the checkpoint
+# against the file digests of the ingest plan, so it needs INCREMENTAL_INGEST. The PDF
+# resumes page by page through its page cache. The WAL journal keeps committed rows
+# intact if the process dies mid-load.
+RESUMABLE_INGEST = True
+CHECKPOINT_INTERVAL = 30.0
+CHECKPOINT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+}
+
+# Load each source as a pipeline: a reader thread feeds raw CSV/TAB blocks to the parser,
+# and one writer thread owns the connection and runs every statement, so reading,
+# parsing and SQLite work overlap. Transactions only end at checkpoints and after each
+# source. Queues hold at most PIPELINE_QUEUE_SIZE items, so a stage that runs ahead waits
+# for the next one (backpressure). Queue depth and wait times are logged every
+# PIPELINE_STATS_INTERVAL seconds and per source.
+PIPELINE_INGEST = True
+PIPELINE_QUEUE_SIZE = 8
+PIPELINE_READ_SIZE = 4 * 1024 * 1024  # bytes of whole lines read per reader block
+PIPELINE_STATS_INTERVAL = 30.0
+
+# Build the SECONDARY_INDEXES once the load has finished. A source that is loaded in
+# full, or appended to by at least INDEX_DROP_APPEND_SHARE of what is already loaded,
+# has its indexes dropped first, so they are never maintained row by row during a bulk
+# load; smaller appends keep them, as rebuilding would cost more than maintaining them.
+# REBUILD_INDEXES drops and recreates every index.
+BUILD_INDEXES = True
+REBUILD_INDEXES = False
+INDEX_DROP_APPEND_SHARE = 0.2
+
+# Integer date/time columns derived from each table's date and time text when rows are
+# written: (column, date column, time column). Columns without a time column hold the
+# epoch day (days since 1970-01-01), the others the epoch second. Values that match
+# none of DATE_FORMATS / TIME_FORMATS are stored as NULL.
+CANONICAL_DATE_COLUMNS = {
+    'boarding_data': (
+        ('PassengerBirthDay', 'PassengerBirthDate', None),
+        ('FlightDay', 'FlightDate', None),
+        ('FlightEpoch', 'FlightDate', 'FlightTime'),
+    ),
+    'sirena_data': (
+        ('PaxBirthDay', 'PaxBirthDate', None),
+        ('DepartDay', 'DepartDate', None),
+        ('DepartEpoch', 'DepartDate', 'DepartTime'),
+        ('ArrivalDay', 'ArrivalDate', None),
+        ('ArrivalEpoch', 'ArrivalDate', 'ArrivalTime'),
+    ),
+    'pointz_aggregator_data': (
+        ('FlightDay', 'FlightDate', None),
+    ),
+    'skyteam_data': (
+        ('FlightDay', 'FlightDate', None),
+    ),
+    'frequent_flyer_flights': (
+        ('FlightDay', 'FlightDate', None),
+    ),
+    'boarding_pass_xls': (
+        ('FlightDay', 'FlightDate', None),
+        ('FlightEpoch', 'FlightDate', 'FlightTime'),
+    ),
+}
+DATE_FORMATS = ('%Y-%m-%d', '%d.%m.%Y', '%d/%m/%Y', '%m/%d/%Y', '%d-%m-%Y', '%Y/%m/%d',
+                '%Y%m%d', '%d %b %Y', '%d%b%Y', '%d %B %Y', '%Y-%m-%d %H:%M:%S')
+TIME_FORMATS = ('%H:%M', '%H:%M:%S', '%I:%M %p', '%H%M', '%H.%M')
+DATE_CACHE_SIZE = 1 << 16
+
 CSV_FILE = 'Data/BoardingData.csv'
 TAB_FILE = 'Data/Sirena-export-fixed.tab'
 XML_FILE = 'Data/PointzAggregator-AirlinesData.xml'
@@ -41,13 +158,86 @@ JSON_FILE = 'Data/FrequentFlyerForum-Profiles.json'
 XLS_DIR = 'Data/YourBoardingPassDotAero'
 DB_FILE = 'DataBase.db'
 
+# Column layout of the Sirena fixed-width export: (column, start, end) character offsets.
+SIRENA_COLSPECS = (
+    ('PaxName', 0, 60),
+    ('PaxBirthDate', 60, 72),
+    ('DepartDate', 72, 84),
+    ('DepartTime', 84, 96),
+    ('ArrivalDate', 96, 108),
+    ('ArrivalTime', 108, 120),
+    ('FlightCode', 120, 132),
+    ('FromAirport', 132, 138),
+    ('Dest', 138, 144),
+    ('Code', 144, 150),
+    ('e_Ticket', 150, 168),
+    ('TravelDoc', 168, 180),
+    ('Seat', 180, 186),
+    ('Meal', 186, 192),
+    ('TrvCls', 192, 198),
+    ('Fare', 198, 216),
+    ('Baggage', 216, 240),
+    ('PaxAdditionalInfo', 240, 276),
+    ('AgentInfo', 276, 336),
+)
+
+POINTZ_AGGREGATOR_COLUMNS = (
+    'UserUID', 'FirstName', 'LastName', 'CardNumber', 'BonusProgramm',
+    'FlightCode', 'FlightDate', 'Departure', 'Arrival', 'Fare',
+)
+
+# Use the chunked, column-vectorized engine for the TAB file instead of per-line slicing.
+TAB_CHUNKED = True
+TAB_CHUNK_SIZE = 8 * 1024 * 1024  # bytes of the memory-mapped file decoded per chunk
+
+# Stream the XML file with iterparse instead of building the whole tree.
+XML_STREAMING = True
+
+# Walk the YAML event stream instead of loading the whole document, and keep a
+# binary sidecar of the parsed rows keyed by the file's SHA-256.
+YAML_STREAMING = True
+YAML_CACHE = True
+YAML_CACHE_VERSION = 2  # bump when the cached rows change, so older sidecars are reparsed
+ROW_CACHE_SUFFIX = '.rows.cache'
+
+# Decode "Forum Profiles" one element at a time instead of json.load on the whole file.
+JSON_STREAMING = True
+JSON_CHUNK_SIZE = 1024 * 1024  # characters read from the JSON file per chunk
+
+# Build skyteam_timetable straight from the PDF instead of the intermediate Excel workbook.
+PDF_DIRECT = True
+PDF_START_PAGE = 3
+PDF_EXCEL_FILE = 'data/Skyteam_Timetable.xlsx'
+# 1-based PDF columns after which continuation tables get an extra column (see process_pdf_to_excel).
+TIMETABLE_SHIFT_AFTER = (1, 6, 10, 15)
+# Extract PDF pages in worker processes (None uses every core) and cache each page's
+# tables under PDF_PAGE_CACHE_DIR/<pdf sha256>/ so interrupted runs resume.
+PDF_WORKERS = None
+PDF_PAGES_PER_TASK = 8
+PDF_PAGE_CACHE = True
+PDF_PAGE_CACHE_DIR = 'Data/.timetable_page_cache'
+
+# Spread boarding-pass workbooks across worker processes; XLS_WORKERS = None uses every core.
+XLS_PARALLEL = True
+XLS_WORKERS = None
+XLS_CHUNKSIZE = 32  # workbooks handed to a worker per task
+XLS_PROGRESS_EVERY = 1000
+
+# Read boarding passes cell by cell with openpyxl in read-only mode instead of via pandas.
+XLS_FAST_CELLS = True
+BOARDING_PASS_LAST_ROW = 13  # last worksheet row holding boarding-pass fields
+# Time both XLS extractors on a sample of workbooks before processing.
+XLS_BENCHMARK = False
+XLS_BENCHMARK_SAMPLE = 200
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 def create_database_connection(db_file: str) -> tuple[sqlite3.Connection, sqlite3.Cursor]:
     """Create a connection to the SQLite database and return the connection and cursor."""
     try:
-        conn = sqlite3.connect(db_file)
+        # A pipelined load hands the connection to its writer thread while this one waits
+        conn = sqlite3.connect(db_file, check_same_thread=False)
         cursor = conn.cursor()
         return conn, cursor
     except sqlite3.Error as e:
@@ -71,7 +261,11 @@ def create_boarding_data_table(cursor: sqlite3.Cursor) -> None:
             FlightTime TEXT,
             FlightNumber TEXT,
             CodeShare TEXT,
-            Destination TEXT
+            Destination TEXT,
+            RowHash INTEGER,
+            PassengerBirthDay INTEGER,
+            FlightDay INTEGER,
+            FlightEpoch INTEGER
         )
     ''')
 
@@ -97,7 +291,13 @@ def create_sirena_data_table(cursor: sqlite3.Cursor) -> None:
             Fare TEXT,
             Baggage TEXT,
             PaxAdditionalInfo TEXT,
-            AgentInfo TEXT
+            AgentInfo TEXT,
+            RowHash INTEGER,
+            PaxBirthDay INTEGER,
+            DepartDay INTEGER,
+            DepartEpoch INTEGER,
+            ArrivalDay INTEGER,
+            ArrivalEpoch INTEGER
         )
     ''')
 
@@ -114,7 +314,9 @@ def create_pointz_aggregator_table(cursor: sqlite3.Cursor) -> None:
             FlightDate TEXT,
             Departure TEXT,
             Arrival TEXT,
-            Fare TEXT
+            Fare TEXT,
+            RowHash INTEGER,
+            FlightDay INTEGER
         )
     ''')
 
@@ -130,7 +332,9 @@ def create_skyteam_data_table(cursor: sqlite3.Cursor) -> None:
             Fare TEXT,
             Departure TEXT,
             Arrival TEXT,
-            Status TEXT
+            Status TEXT,
+            RowHash INTEGER,
+            FlightDay INTEGER
         )
     ''')
 
@@ -150,7 +354,8 @@ def create_skyteam_timetable_table(cursor: sqlite3.Cursor) -> None:
             arr_time TEXT,
             flight TEXT,
             aircraft TEXT,
-            travel_time TEXT
+            travel_time TEXT,
+            RowHash INTEGER
         )
     ''')
 
@@ -181,6 +386,8 @@ def create_frequent_flyer_flights_table(cursor: sqlite3.Cursor) -> None:
             ArrivalCity TEXT,
             ArrivalAirport TEXT,
             ArrivalCountry TEXT,
+            RowHash INTEGER,
+            FlightDay INTEGER,
             FOREIGN KEY (NickName) REFERENCES frequent_flyer_profiles(NickName)
         )
     ''')
@@ -202,27 +409,669 @@ def create_boarding_pass_xls_table(cursor: sqlite3.Cursor) -> None:
             FlightDate TEXT,
             FlightTime TEXT,
             PNR TEXT,
-            ETicket TEXT
+            ETicket TEXT,
+            RowHash INTEGER,
+            FlightDay INTEGER,
+            FlightEpoch INTEGER
         )
     ''')
 
-def parse_csv_file(cursor: sqlite3.Cursor, csv_file: str) -> None:
-    """Parse the CSV file and insert data into the boarding_data table."""
+def row_fingerprint(row: Sequence) -> int:
+    """Return a signed 64-bit fingerprint of a row's values, stable across Python and SQLite."""
+    text = '\x1f'.join('\x00' if value is None else str(value) for value in row)
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'big', signed=True)
+
+def ensure_row_hash(cursor: sqlite3.Cursor, table: str) -> None:
+    """Make sure a table has a populated RowHash column and its unique index.
+
+    Tables created before RowHash existed get the column, a backfill computed with
+    row_fingerprint over the other columns, and their duplicate rows removed.
+    """
+    derived = {column for column, _, _ in CANONICAL_DATE_COLUMNS.get(table, ())}
+    columns = [row[1] for row in cursor.execute(f"PRAGMA table_info({table})") if row[1] not in derived]
+    if 'RowHash' not in columns:
+        logger.info(f"Adding RowHash to {table} and removing duplicate rows")
+        cursor.connection.create_function('row_fingerprint', -1, lambda *values: row_fingerprint(values),
+                                          deterministic=True)
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN RowHash INTEGER")
+        cursor.execute(f"UPDATE {table} SET RowHash = row_fingerprint({', '.join(columns)})")
+        cursor.execute(f"DELETE FROM {table} WHERE rowid NOT IN (SELECT MIN(rowid) FROM {table} GROUP BY RowHash)")
+        logger.info(f"Removed {cursor.rowcount} duplicate rows from {table}")
+    cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_rowhash ON {table} (RowHash)")
+
+EPOCH_DATE = date(1970, 1, 1)
+
+def match_format(text: str, formats: Sequence[str]) -> Optional[datetime]:
+    """Parse text with the first matching format, always trying formats in the given order.
+
+    The order is fixed so that ambiguous values such as 03/04/2017 always parse the same way.
+    """
+    for fmt in formats:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_epoch_day(text: str) -> Optional[int]:
+    """Return the epoch day of a date string in ISO form or any of DATE_FORMATS, or None."""
+    text = text.strip()
+    if len(text) >= 10 and text[4] == '-':
+        try:
+            return (date.fromisoformat(text[:10]) - EPOCH_DATE).days
+        except ValueError:
+            pass
+    parsed = match_format(text, DATE_FORMATS) if text else None
+    return (parsed.date() - EPOCH_DATE).days if parsed else None
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_seconds_of_day(text: str) -> Optional[int]:
+    """Return the seconds since midnight of a time string in any of TIME_FORMATS, or None."""
+    text = text.strip()
+    parsed = match_format(text, TIME_FORMATS) if text else None
+    return parsed.hour * 3600 + parsed.minute * 60 + parsed.second if parsed else None
+
+def epoch_day(value) -> Optional[int]:
+    """Return the epoch day of a date string, date or datetime (e.g. an XLS cell), or None."""
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        return (value - EPOCH_DATE).days
+    if value is None:
+        return None
+    return parse_epoch_day(str(value))
+
+def epoch_second(date_value, time_value) -> Optional[int]:
+    """Return the epoch second of a date and a time of day, or None unless both parse.
+
+    An empty time_value falls back to the time part of a datetime date_value.
+    """
+    day = epoch_day(date_value)
+    if day is None:
+        return None
+    if isinstance(time_value, datetime):
+        time_value = time_value.time()
+    if isinstance(time_value, datetime_time):
+        seconds = time_value.hour * 3600 + time_value.minute * 60 + time_value.second
+    elif time_value is None or time_value == '':
+        if not isinstance(date_value, datetime):
+            return None
+        seconds = date_value.hour * 3600 + date_value.minute * 60 + date_value.second
+    else:
+        seconds = parse_seconds_of_day(str(time_value))
+    return day * 86400 + seconds if seconds is not None else None
+
+def ensure_date_columns(cursor: sqlite3.Cursor, table: str) -> None:
+    """Add a table's missing CANONICAL_DATE_COLUMNS and fill them from the existing rows."""
+    columns = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+    missing = [spec for spec in CANONICAL_DATE_COLUMNS.get(table, ()) if spec[0] not in columns]
+    if not missing:
+        return
+    logger.info(f"Adding {', '.join(column for column, _, _ in missing)} to {table}")
+    cursor.connection.create_function('epoch_day', 1, epoch_day, deterministic=True)
+    cursor.connection.create_function('epoch_second', 2, epoch_second, deterministic=True)
+    assignments = []
+    for column, date_column, time_column in missing:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} INTEGER")
+        if time_column is None:
+            assignments.append(f"{column} = epoch_day({date_column})")
+        else:
+            assignments.append(f"{column} = epoch_second({date_column}, {time_column})")
+    cursor.execute(f"UPDATE {table} SET {', '.join(assignments)}")
+
+class BatchWriter:
+    """Buffer rows for a table and flush them with executemany in fixed-size batches.
+
+    Use as a context manager: pending rows are flushed on exit and the row count
+    and throughput for the source are logged. For ROW_HASH_TABLES the row's
+    fingerprint is appended as RowHash and rows already present are ignored;
+    columns must then be given in table order. The table's CANONICAL_DATE_COLUMNS
+    are computed from the row and appended after that. With INSERT OR REPLACE a row
+    identical to a stored one is left in place rather than replaced, so it keeps its
+    rowid and incremental unification does not read it again.
+    """
+
+    def __init__(self, cursor: sqlite3.Cursor, table: str, columns: Sequence[str],
+                 source: Optional[str] = None, batch_size: Optional[int] = None,
+                 verb: str = 'INSERT') -> None:
+        self.cursor = cursor
+        self.table = table
+        self.columns = tuple(columns)
+        self.source = source or table
+        self.batch_size = batch_size or (BATCH_SIZE if BULK_LOAD else 1)
+        self.row_hash = table in ROW_HASH_TABLES
+        if self.row_hash:
+            columns = self.columns + ('RowHash',)
+            verb = 'INSERT OR IGNORE' if verb == 'INSERT' else verb
+        date_specs = [(column, date_column, time_column)
+                      for column, date_column, time_column in CANONICAL_DATE_COLUMNS.get(table, ())
+                      if date_column in self.columns and (time_column is None or time_column in self.columns)]
+        self.date_columns = [(self.columns.index(date_column), self.columns.index(time_column) if time_column else None)
+                             for _, date_column, time_column in date_specs]
+        columns = tuple(columns) + tuple(column for column, _, _ in date_specs)
+        if verb == 'INSERT OR REPLACE':
+            same = (f"RowHash = ?{len(self.columns) + 1}" if self.row_hash else
+                    ' AND '.join(f"{column} IS ?{index}" for index, column in enumerate(self.columns, 1)))
+            self.sql = (f"{verb} INTO {table} ({', '.join(columns)}) "
+                        f"SELECT {', '.join('?' for _ in columns)} "
+                        f"WHERE NOT EXISTS (SELECT 1 FROM {table} WHERE {same})")
+        else:
+            self.sql = (f"{verb} INTO {table} ({', '.join(columns)}) "
+                        f"VALUES ({', '.join('?' for _ in columns)})")
+        self.rows: list[Sequence] = []
+        self.count = 0
+        self.inserted = 0
+        self.pipelined = isinstance(cursor, PipelineCursor)
+        self.start_time = time.time()
+
+    def add(self, row: Sequence) -> None:
+        """Queue a single row, flushing when the batch is full."""
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def extend(self, rows: Iterable[Sequence]) -> None:
+        """Queue every row from an iterable."""
+        for row in rows:
+            self.add(row)
+
+    def flush(self) -> None:
+        """Write all pending rows to the database."""
+        if self.rows:
+            if self.row_hash or self.date_columns:
+                self.rows = [self.complete_row(row) for row in self.rows]
+            if self.pipelined:
+                self.cursor.executemany(self.sql, self.rows, self.count_inserted)
+            else:
+                self.cursor.executemany(self.sql, self.rows)
+                self.inserted += self.cursor.rowcount
+            self.count += len(self.rows)
+            self.rows = []
+
+    def complete_row(self, row: Sequence) -> tuple:
+        """Append the RowHash and canonical date values to a row."""
+        extra = [row_fingerprint(row)] if self.row_hash else []
+        for date_index, time_index in self.date_columns:
+            if time_index is None:
+                extra.append(epoch_day(row[date_index]))
+            else:
+                extra.append(epoch_second(row[date_index], row[time_index]))
+        return (*row, *extra)
+
+    def count_inserted(self, rowcount: int) -> None:
+        """Add the rows a pipelined batch inserted; called from the writer thread."""
+        self.inserted += rowcount
+
+    def close(self) -> None:
+        """Flush pending rows and report the load rate."""
+        self.flush()
+        if self.pipelined:
+            self.cursor.drain()
+        elapsed = time.time() - self.start_time
+        rate = self.count / elapsed if elapsed > 0 else 0.0
+        duplicates = f", {self.count - self.inserted} duplicates ignored" if self.row_hash else ''
+        logger.info(f"Loaded {self.count} rows into {self.table} from {self.source} "
+                    f"in {elapsed:.2f} seconds ({rate:.0f} rows/sec{duplicates})")
+
+    def __enter__(self) -> 'BatchWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.rows = []
+
+class RejectWriter:
+    """Quarantine invalid input records in ingest_rejects, batched like BatchWriter.
+
+    Instead of a log line per record, a running count is logged at most every
+    REJECT_LOG_INTERVAL seconds and a per-reason summary when the writer is closed.
+    """
+
+    def __init__(self, cursor: sqlite3.Cursor, source: str, file: str) -> None:
+        self.source = source
+        self.file = file
+        self.writer = BatchWriter(cursor, 'ingest_rejects',
+                                  ('Source', 'File', 'LineNumber', 'Reason', 'Payload'), source=file)
+        self.reasons = defaultdict(int)
+        self.last_log = time.time()
+
+    def add(self, line_number: Optional[int], reason: str, payload: str, file: Optional[str] = None) -> None:
+        """Queue one rejected record; file overrides the writer's file (e.g. with a sheet name)."""
+        self.writer.add((self.source, file or self.file, line_number, reason, payload))
+        self.reasons[reason] += 1
+        now = time.time()
+        if now - self.last_log >= REJECT_LOG_INTERVAL:
+            self.last_log = now
+            logger.warning(f"{sum(self.reasons.values())} records rejected from {self.file} so far")
+
+    def flush(self) -> None:
+        """Write all pending rejects to the database."""
+        self.writer.flush()
+
+    def close(self) -> None:
+        """Flush pending rejects and log a summary by reason."""
+        self.flush()
+        if self.reasons:
+            summary = ', '.join(f"{reason}: {count}" for reason, count in self.reasons.items())
+            logger.warning(f"Rejected {sum(self.reasons.values())} records from {self.file} "
+                           f"({summary}); see ingest_rejects")
+
+    def __enter__(self) -> 'RejectWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.writer.rows = []
+
+class Checkpoint(NamedTuple):
+    """How far an interrupted load of a source got: the position to resume from,
+    the last item handled before it (a workbook path for XLS) and the rows it committed."""
+    position: int
+    marker: Optional[str]
+    rows_loaded: int
+
+class Checkpointer:
+    """Periodically commit a source's load together with its position in ingest_checkpoints.
+
+    Parsers register their writers with track() and call reached() wherever every
+    record before position has been handed to them. At most every CHECKPOINT_INTERVAL
+    seconds the writers are flushed and the rows and position are committed together.
+    """
+
+    def __init__(self, cursor: sqlite3.Cursor, source: str, action: str, digest: str,
+                 resumed: Optional[Checkpoint] = None) -> None:
+        self.cursor = cursor
+        self.source = source
+        self.action = action
+        self.digest = digest
+        self.rows_before = resumed.rows_loaded if resumed else 0
+        self.writers = []
+        self.saves = 0
+        self.last_save = time.time()
+
+    def track(self, *writers) -> None:
+        """Register writers to flush before each checkpoint."""
+        self.writers.extend(writers)
+
+    def reached(self, position: int, marker: Optional[str] = None) -> None:
+        """Checkpoint at position if CHECKPOINT_INTERVAL has passed since the last checkpoint."""
+        if time.time() - self.last_save >= CHECKPOINT_INTERVAL:
+            self.save(position, marker)
+
+    def save(self, position: int, marker: Optional[str] = None) -> None:
+        """Flush the tracked writers and commit them with the checkpoint."""
+        for writer in self.writers:
+            writer.flush()
+        if isinstance(self.cursor, PipelineCursor):
+            self.cursor.drain()
+        rows_loaded = self.rows_before + sum(writer.inserted for writer in self.writers
+                                             if isinstance(writer, BatchWriter))
+        self.cursor.execute('''
+            INSERT OR REPLACE INTO ingest_checkpoints (Source, Action, SHA256, Position, Marker, RowsLoaded, UpdatedAt)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (self.source, self.action, self.digest, position, marker, rows_loaded,
+              time.strftime('%Y-%m-%d %H:%M:%S')))
+        self.cursor.connection.commit()
+        self.saves += 1
+        self.last_save = time.time()
+        logger.info(f"Checkpoint for {self.source.upper()} source at {position} ({rows_loaded} rows committed)")
+
+class MeteredQueue(queue.Queue):
+    """Bounded queue that records its depth and how long producers and the consumer waited."""
+
+    def __init__(self, name: str, maxsize: int = PIPELINE_QUEUE_SIZE) -> None:
+        super().__init__(maxsize)
+        self.name = name
+        self.items = 0
+        self.depth_total = 0
+        self.max_depth = 0
+        self.full_waits = 0
+        self.put_wait = 0.0
+        self.get_wait = 0.0
+
+    def put(self, item, block: bool = True, timeout: Optional[float] = None) -> None:
+        start = time.perf_counter()
+        was_full = self.full()
+        super().put(item, block, timeout)
+        self.put_wait += time.perf_counter() - start
+        self.full_waits += was_full
+        depth = self.qsize()
+        self.items += 1
+        self.depth_total += depth
+        self.max_depth = max(self.max_depth, depth)
+
+    def get(self, block: bool = True, timeout: Optional[float] = None):
+        start = time.perf_counter()
+        item = super().get(block, timeout)
+        self.get_wait += time.perf_counter() - start
+        return item
+
+    def summary(self) -> str:
+        """Describe the queue's traffic, depth and backpressure so far."""
+        average = self.depth_total / self.items if self.items else 0.0
+        return (f"Queue {self.name}: {self.items} items, depth {average:.1f} avg / {self.max_depth} max "
+                f"of {self.maxsize}, producer blocked {self.full_waits} times ({self.put_wait:.2f} s), "
+                f"consumer idle {self.get_wait:.2f} s")
+
+def iter_prefetched(items: Iterable, name: str, maxsize: int = PIPELINE_QUEUE_SIZE) -> Iterator:
+    """Yield items produced by a background thread through a bounded MeteredQueue.
+
+    Exceptions raised by the producer are re-raised here; if the consumer stops
+    early the producer is told to stop and is joined.
+    """
+    items_queue = MeteredQueue(name, maxsize)
+    stop = threading.Event()
+    done = object()
+
+    def send(entry: tuple) -> bool:
+        """Put an entry on the queue unless the consumer stops first; return whether it was put."""
+        while not stop.is_set():
+            try:
+                items_queue.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for item in items:
+                if not send((item, None)):
+                    return
+            send((done, None))
+        except BaseException as e:
+            send((done, e))
+
+    thread = threading.Thread(target=produce, name=f'reader {name}', daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = items_queue.get()
+            if error is not None:
+                raise error
+            if item is done:
+                break
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+        logger.info(items_queue.summary())
+
+class SQLiteWriterThread:
+    """The single thread that runs every statement of a pipelined load on the connection.
+
+    Statements are queued in a MeteredQueue and executed in order; the thread never
+    commits on its own, only when a commit is queued. The first error stops execution
+    and is raised in the submitting thread on its next call.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, name: str = 'write', maxsize: int = PIPELINE_QUEUE_SIZE) -> None:
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.queue = MeteredQueue(name, maxsize)
+        self.error: Optional[Exception] = None
+        self.last_report = time.time()
+        self.thread = threading.Thread(target=self.run, name='sqlite writer', daemon=True)
+        self.thread.start()
+
+    def run(self) -> None:
+        """Execute queued operations until the closing sentinel arrives."""
+        while True:
+            operation = self.queue.get()
+            try:
+                if operation is None:
+                    return
+                kind, args, callback = operation
+                if self.error is not None:
+                    continue
+                if kind == 'executemany':
+                    self.cursor.executemany(*args)
+                elif kind == 'execute':
+                    self.cursor.execute(*args)
+                elif kind == 'commit':
+                    self.conn.commit()
+                if callback is not None:
+                    callback(self.cursor.rowcount)
+            except Exception as e:
+                self.error = e
+            finally:
+                self.queue.task_done()
+            if time.time() - self.last_report >= PIPELINE_STATS_INTERVAL:
+                self.last_report = time.time()
+                logger.info(f"{self.queue.summary()}, {self.queue.qsize()} queued now")
+
+    def check(self) -> None:
+        """Raise the error that stopped the writer, if any."""
+        if self.error is not None:
+            raise self.error
+
+    def submit(self, kind: str, args: tuple = (), callback=None) -> None:
+        """Queue an operation, blocking while the queue is full."""
+        self.check()
+        self.queue.put((kind, args, callback))
+
+    def drain(self) -> None:
+        """Wait until every queued operation has run."""
+        self.queue.join()
+        self.check()
+
+    def close(self) -> None:
+        """Run the remaining operations, stop the thread and log the queue statistics."""
+        self.queue.put(None)
+        self.thread.join()
+        logger.info(self.queue.summary())
+        self.check()
+
+class PipelineCursor:
+    """Cursor stand-in handed to the parsers of a pipelined load.
+
+    execute, executemany and commit are queued for the SQLiteWriterThread instead
+    of running here; results cannot be fetched. connection is the cursor itself so
+    that cursor.connection.commit() is queued too.
+    """
+
+    def __init__(self, writer: SQLiteWriterThread) -> None:
+        self.writer = writer
+        self.connection = self
+
+    def execute(self, sql: str, parameters: Sequence = ()) -> None:
+        self.writer.submit('execute', (sql, parameters))
+
+    def executemany(self, sql: str, rows: Iterable[Sequence], callback=None) -> None:
+        """Queue a batch; callback receives the batch's rowcount on the writer thread."""
+        self.writer.submit('executemany', (sql, rows), callback)
+
+    def commit(self) -> None:
+        self.writer.submit('commit')
+
+    def drain(self) -> None:
+        """Wait until the writer has run everything queued so far."""
+        self.writer.drain()
+
+def set_pragmas(cursor: sqlite3.Cursor, pragmas: dict) -> dict:
+    """Apply PRAGMAs outside of a transaction and return their previous values."""
+    previous = {}
+    for name, value in pragmas.items():
+        previous[name] = cursor.execute(f"PRAGMA {name}").fetchone()[0]
+        cursor.execute(f"PRAGMA {name} = {value}")
+        logger.info(f"PRAGMA {name} set to {value} (was {previous[name]})")
+    return previous
+
+def file_sha256(path: str, block_size: int = 1024 * 1024) -> str:
+    """Return the hex SHA-256 digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def file_prefix_sha256(path: str, prefix_size: int, block_size: int = 1024 * 1024) -> tuple[str, str, bytes]:
+    """Hash a file in one pass, returning (prefix digest, full digest, last byte of the prefix).
+
+    The prefix covers the first prefix_size bytes, which lets a caller check whether
+    a file only had data appended since it was last hashed.
+    """
+    digest = hashlib.sha256()
+    prefix_digest = None
+    last_byte = b''
+    remaining = prefix_size
+    with open(path, 'rb') as file:
+        while True:
+            block = file.read(min(block_size, remaining) if remaining > 0 else block_size)
+            if not block:
+                break
+            digest.update(block)
+            if remaining > 0:
+                remaining -= len(block)
+                if remaining == 0:
+                    prefix_digest = digest.copy().hexdigest()
+                    last_byte = block[-1:]
+    if prefix_size == 0:
+        prefix_digest = hashlib.sha256().hexdigest()
+    return prefix_digest or '', digest.hexdigest(), last_byte
+
+def row_cache_matches(cache_path: Path, digest: str) -> bool:
+    """Check whether a row cache sidecar was written for a source with the given digest."""
     try:
-        with open(csv_file, 'r', encoding='utf-8') as file:
-            reader = csv.reader(file, delimiter=';')
-            next(reader)  # Skip header
-            for row in reader:
-                if len(row) == 14:  # Validate row length
-                    cursor.execute('''
-                        INSERT INTO boarding_data (
-                            PassengerFirstName, PassengerSecondName, PassengerLastName, PassengerSex,
-                            PassengerBirthDate, PassengerDocument, BookingCode, TicketNumber,
-                            Baggage, FlightDate, FlightTime, FlightNumber, CodeShare, Destination
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', row)
-                else:
-                    logger.warning(f"Skipping invalid CSV row: {row}")
+        with open(cache_path, 'rb') as file:
+            return file.readline().strip().decode('ascii') == digest
+    except (OSError, UnicodeDecodeError):
+        return False
+
+def iter_row_cache(cache_path: Path) -> Iterator[list]:
+    """Yield the row batches stored in a row cache sidecar."""
+    with open(cache_path, 'rb') as file:
+        file.readline()  # Skip digest header
+        while True:
+            try:
+                yield pickle.load(file)
+            except EOFError:
+                return
+
+def cache_rows(rows: Iterable[tuple], cache_path: Path, digest: str) -> Iterator[tuple]:
+    """Pass rows through while writing them in batches to a row cache sidecar.
+
+    The sidecar is only put in place once the rows are exhausted, so an
+    interrupted parse never leaves a partial cache behind.
+    """
+    tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+    completed = False
+    try:
+        with open(tmp_path, 'wb') as file:
+            file.write(digest.encode('ascii') + b'\n')
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= BATCH_SIZE:
+                    pickle.dump(batch, file, protocol=pickle.HIGHEST_PROTOCOL)
+                    batch = []
+                yield row
+            if batch:
+                pickle.dump(batch, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+        completed = True
+    finally:
+        if not completed and tmp_path.exists():
+            tmp_path.unlink()
+
+def create_ingest_manifest_table(cursor: sqlite3.Cursor) -> None:
+    """Create the ingest_manifest table if it doesn't exist."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ingest_manifest (
+            Path TEXT PRIMARY KEY,
+            Source TEXT,
+            Size INTEGER,
+            MTime REAL,
+            SHA256 TEXT,
+            RowsLoaded INTEGER,
+            LoadedAt TEXT
+        )
+    ''')
+
+def create_ingest_rejects_table(cursor: sqlite3.Cursor) -> None:
+    """Create the ingest_rejects table if it doesn't exist."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ingest_rejects (
+            Source TEXT,
+            File TEXT,
+            LineNumber INTEGER,
+            Reason TEXT,
+            Payload TEXT
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ingest_rejects_source ON ingest_rejects (Source)")
+
+def create_ingest_checkpoints_table(cursor: sqlite3.Cursor) -> None:
+    """Create the ingest_checkpoints table if it doesn't exist."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ingest_checkpoints (
+            Source TEXT PRIMARY KEY,
+            Action TEXT,
+            SHA256 TEXT,
+            Position INTEGER,
+            Marker TEXT,
+            RowsLoaded INTEGER,
+            UpdatedAt TEXT
+        )
+    ''')
+
+def count_rejects(cursor: sqlite3.Cursor, source: str) -> int:
+    """Return how many records of a source are in ingest_rejects."""
+    return cursor.execute("SELECT COUNT(*) FROM ingest_rejects WHERE Source = ?", (source,)).fetchone()[0]
+
+def iter_lines_with_offset(file, start_offset: int = 0, decode: bool = True) -> Iterator[tuple[int, str]]:
+    """Yield (offset after the line, decoded line) for each line of a binary file from start_offset.
+
+    Lines are read in blocks of about PIPELINE_READ_SIZE bytes, by a reader thread
+    when PIPELINE_INGEST is set. Without decode the raw bytes of each line are yielded.
+    """
+    file.seek(start_offset)
+    blocks = iter(lambda: file.readlines(PIPELINE_READ_SIZE), [])
+    if PIPELINE_INGEST:
+        blocks = iter_prefetched(blocks, f'read {file.name}')
+    offset = start_offset
+    for block in blocks:
+        for raw in block:
+            offset += len(raw)
+            yield offset, raw.decode('utf-8') if decode else raw
+
+def parse_csv_file(cursor: sqlite3.Cursor, csv_file: str, start_offset: int = 0,
+                   checkpoint: Optional[Checkpointer] = None) -> None:
+    """Parse the CSV file and insert data into the boarding_data table.
+
+    A non-zero start_offset resumes at that byte position (a line boundary) and
+    expects no header there; line numbers of rejected rows then count from it.
+    checkpoint receives the byte offset after each row.
+    """
+    try:
+        with open(csv_file, 'rb') as file:
+            position = start_offset
+            def lines() -> Iterator[str]:
+                nonlocal position
+                for position, line in iter_lines_with_offset(file, start_offset):
+                    yield line
+            reader = csv.reader(lines(), delimiter=';')
+            if not start_offset:
+                next(reader)  # Skip header
+            with BatchWriter(cursor, 'boarding_data', (
+                'PassengerFirstName', 'PassengerSecondName', 'PassengerLastName', 'PassengerSex',
+                'PassengerBirthDate', 'PassengerDocument', 'BookingCode', 'TicketNumber',
+                'Baggage', 'FlightDate', 'FlightTime', 'FlightNumber', 'CodeShare', 'Destination'
+            ), source=csv_file) as writer, RejectWriter(cursor, 'csv', csv_file) as rejects:
+                if checkpoint:
+                    checkpoint.track(writer, rejects)
+                for row in reader:
+                    if len(row) == 14:  # Validate row length
+                        writer.add(row)
+                    else:
+                        rejects.add(reader.line_num, f"expected 14 fields, got {len(row)}", ';'.join(row))
+                    if checkpoint:
+                        checkpoint.reached(position)
     except FileNotFoundError:
         logger.error(f"CSV file not found: {csv_file}")
         raise
@@ -230,50 +1079,159 @@ def parse_csv_file(cursor: sqlite3.Cursor, csv_file: str) -> None:
         logger.error(f"Error parsing CSV file: {e}")
         raise
 
-def parse_tab_file(cursor: sqlite3.Cursor, tab_file: str) -> None:
-    """Parse the TAB file and insert data into the sirena_data table."""
+def parse_tab_file(cursor: sqlite3.Cursor, tab_file: str, start_offset: int = 0,
+                   checkpoint: Optional[Checkpointer] = None) -> None:
+    """Parse the TAB file and insert data into the sirena_data table.
+
+    A non-zero start_offset resumes at that byte position (a line boundary) and
+    expects no header there; line numbers of rejected rows then count from it.
+    Lines that are not valid UTF-8 are rejected. checkpoint receives the byte
+    offset after each line.
+    """
+    try:
+        with open(tab_file, 'rb') as file:
+            lines = iter_lines_with_offset(file, start_offset, decode=False)
+            if start_offset:
+                first_line = 1
+            else:
+                next(lines)  # Skip header
+                first_line = 2
+            with BatchWriter(cursor, 'sirena_data', (
+                'PaxName', 'PaxBirthDate', 'DepartDate', 'DepartTime', 'ArrivalDate',
+                'ArrivalTime', 'FlightCode', 'FromAirport', 'Dest', 'Code',
+                'e_Ticket', 'TravelDoc', 'Seat', 'Meal', 'TrvCls',
+                'Fare', 'Baggage', 'PaxAdditionalInfo', 'AgentInfo'
+            ), source=tab_file) as writer, RejectWriter(cursor, 'tab', tab_file) as rejects:
+                if checkpoint:
+                    checkpoint.track(writer, rejects)
+                for line_number, (position, raw) in enumerate(lines, start=first_line):
+                    try:
+                        line = raw.decode('utf-8').rstrip()
+                    except UnicodeDecodeError:
+                        rejects.add(line_number, "invalid UTF-8", raw.decode('utf-8', 'replace').rstrip())
+                        continue
+                    if not line:
+                        continue
+                    try:
+                        row = [
+                            line[0:60].strip(),   # PaxName
+                            line[60:72].strip(),  # PaxBirthDate
+                            line[72:84].strip(),  # DepartDate
+                            line[84:96].strip(),  # DepartTime
+                            line[96:108].strip(), # ArrivalDate
+                            line[108:120].strip(),# ArrivalTime
+                            line[120:132].strip(),# FlightCode
+                            line[132:138].strip(),# FromAirport
+                            line[138:144].strip(),# Dest
+                            line[144:150].strip(),# Code
+                            line[150:168].strip(),# e_Ticket
+                            line[168:180].strip(),# TravelDoc
+                            line[180:186].strip(),# Seat
+                            line[186:192].strip(),# Meal
+                            line[192:198].strip(),# TrvCls
+                            line[198:216].strip(),# Fare
+                            line[216:240].strip(),# Baggage
+                            line[240:276].strip(),# PaxAdditionalInfo
+                            line[276:336].strip() # AgentInfo
+                        ]
+                        if len(row) == 19:
+                            writer.add(row)
+                        else:
+                            rejects.add(line_number, f"expected 19 fields, got {len(row)}", line)
+                    except IndexError:
+                        rejects.add(line_number, "malformed line", line)
+                    if checkpoint:
+                        checkpoint.reached(position)
+    except FileNotFoundError:
+        logger.error(f"TAB file not found: {tab_file}")
+        raise
+    except Exception as e:
+        logger.error(f"Error parsing TAB file: {e}")
+        raise
+
+def decode_chunk_lines(chunk: bytes, first_line: int) -> tuple[list[str], list[tuple[int, str, str]]]:
+    """Decode a chunk of whole lines, returning its lines and (line number, reason, text) rejects.
+
+    The chunk is decoded in one go; only a chunk holding invalid UTF-8 is decoded
+    line by line, and its undecodable lines are rejected and left out.
+    """
     try:
-        with open(tab_file, 'r', encoding='utf-8') as file:
-            next(file)  # Skip header
-            for line in file:
-                line = line.rstrip()
-                if not line:
+        return chunk.decode('utf-8').split('\n'), []
+    except UnicodeDecodeError:
+        pass
+    lines = []
+    rejects = []
+    for line_number, raw in enumerate(chunk.split(b'\n'), first_line):
+        try:
+            lines.append(raw.decode('utf-8'))
+        except UnicodeDecodeError:
+            rejects.append((line_number, "invalid UTF-8", raw.decode('utf-8', 'replace').rstrip()))
+    return lines, rejects
+
+def iter_fixed_width_chunks(path: str, colspecs: Sequence[tuple], chunk_size: int = TAB_CHUNK_SIZE,
+                            skip_header: bool = True, start_offset: int = 0
+                            ) -> Iterator[tuple[int, list[tuple], list[tuple[int, str, str]]]]:
+    """Yield (byte offset after the chunk, stripped row tuples, rejects) from a fixed-width file, one per chunk.
+
+    The file is memory-mapped and cut into chunks of roughly chunk_size bytes on line
+    boundaries. Each chunk is decoded once and loaded into a fixed-width numpy character
+    matrix, so every column is sliced and stripped as a single block. A non-zero
+    start_offset starts reading at that byte position instead of after the header.
+    Rejects are (line number, reason, text) of lines that are not valid UTF-8, with
+    lines numbered as in parse_tab_file.
+    """
+    width = max(end for _, _, end in colspecs)
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            size = len(mm)
+            pos = start_offset
+            first_line = 1
+            if skip_header and not start_offset:
+                newline = mm.find(b'\n')
+                pos = size if newline == -1 else newline + 1
+                first_line = 2
+            while pos < size:
+                end = mm.find(b'\n', min(pos + chunk_size, size))
+                end = size if end == -1 else end + 1
+                chunk = mm[pos:end]
+                lines, rejects = decode_chunk_lines(chunk, first_line)
+                lines = [line for line in lines if line.strip()]
+                first_line += chunk.count(b'\n')
+                pos = end
+                if not lines:
+                    if rejects:
+                        yield pos, [], rejects
                     continue
-                try:
-                    row = [
-                        line[0:60].strip(),   # PaxName
-                        line[60:72].strip(),  # PaxBirthDate
-                        line[72:84].strip(),  # DepartDate
-                        line[84:96].strip(),  # DepartTime
-                        line[96:108].strip(), # ArrivalDate
-                        line[108:120].strip(),# ArrivalTime
-                        line[120:132].strip(),# FlightCode
-                        line[132:138].strip(),# FromAirport
-                        line[138:144].strip(),# Dest
-                        line[144:150].strip(),# Code
-                        line[150:168].strip(),# e_Ticket
-                        line[168:180].strip(),# TravelDoc
-                        line[180:186].strip(),# Seat
-                        line[186:192].strip(),# Meal
-                        line[192:198].strip(),# TrvCls
-                        line[198:216].strip(),# Fare
-                        line[216:240].strip(),# Baggage
-                        line[240:276].strip(),# PaxAdditionalInfo
-                        line[276:336].strip() # AgentInfo
-                    ]
-                    if len(row) == 19:
-                        cursor.execute('''
-                            INSERT INTO sirena_data (
-                                PaxName, PaxBirthDate, DepartDate, DepartTime, ArrivalDate,
-                                ArrivalTime, FlightCode, FromAirport, Dest, Code,
-                                e_Ticket, TravelDoc, Seat, Meal, TrvCls,
-                                Fare, Baggage, PaxAdditionalInfo, AgentInfo
-                            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        ''', row)
-                    else:
-                        logger.warning(f"Skipping invalid TAB row: {row}")
-                except IndexError:
-                    logger.warning(f"Skipping malformed TAB line: {line}")
+                matrix = np.array(lines, dtype=f'U{width}').view(np.uint32).reshape(len(lines), width)
+                columns = []
+                for _, start, stop in colspecs:
+                    block = np.ascontiguousarray(matrix[:, start:stop]).view(f'U{stop - start}').ravel()
+                    columns.append(np.char.strip(block).tolist())
+                yield pos, list(zip(*columns)), rejects
+
+def parse_tab_file_chunked(cursor: sqlite3.Cursor, tab_file: str, chunk_size: int = TAB_CHUNK_SIZE,
+                           start_offset: int = 0, checkpoint: Optional[Checkpointer] = None) -> None:
+    """Parse the TAB file in large chunks with the fixed-width engine and insert into sirena_data.
+
+    With PIPELINE_INGEST the chunks are read and split in a reader thread. Lines
+    that are not valid UTF-8 go to ingest_rejects, as in parse_tab_file.
+    """
+    try:
+        with BatchWriter(cursor, 'sirena_data', [name for name, _, _ in SIRENA_COLSPECS],
+                         source=tab_file) as writer, RejectWriter(cursor, 'tab', tab_file) as rejects:
+            if checkpoint:
+                checkpoint.track(writer, rejects)
+            chunks = iter_fixed_width_chunks(tab_file, SIRENA_COLSPECS, chunk_size, start_offset=start_offset)
+            if PIPELINE_INGEST:
+                chunks = iter_prefetched(chunks, f'read {tab_file}')
+            for position, rows, rejected in chunks:
+                writer.extend(rows)
+                for line_number, reason, text in rejected:
+                    rejects.add(line_number, reason, text)
+                if checkpoint:
+                    checkpoint.reached(position)
     except FileNotFoundError:
         logger.error(f"TAB file not found: {tab_file}")
         raise
@@ -281,41 +1239,51 @@ def parse_tab_file(cursor: sqlite3.Cursor, tab_file: str) -> None:
         logger.error(f"Error parsing TAB file: {e}")
         raise
 
-def parse_xml_file(cursor: sqlite3.Cursor, xml_file: str) -> None:
-    """Parse the XML file and insert data into the pointz_aggregator_data table."""
+def iter_user_flight_rows(user: ET.Element) -> Iterator[tuple]:
+    """Yield pointz_aggregator_data rows for every Flight activity of a <user> element."""
+    uid = user.get('uid', '')
+    name = user.find('name')
+    first_name = name.get('first', '') if name is not None else ''
+    last_name = name.get('last', '') if name is not None else ''
+
+    cards = user.find('cards')
+    if cards is None:
+        return
+    for card in cards.findall('card'):
+        card_number = card.get('number', '')
+        bonus_programm = card.findtext('bonusprogramm', '')
+
+        activities = card.find('activities')
+        if activities is None:
+            continue
+        for activity in activities.findall('activity'):
+            if activity.get('type') == 'Flight':
+                yield (uid, first_name, last_name, card_number, bonus_programm,
+                       activity.findtext('Code', ''), activity.findtext('Date', ''),
+                       activity.findtext('Departure', ''), activity.findtext('Arrival', ''),
+                       activity.findtext('Fare', ''))
+
+def parse_xml_file(cursor: sqlite3.Cursor, xml_file: str, skip: int = 0,
+                   checkpoint: Optional[Checkpointer] = None) -> None:
+    """Parse the XML file and insert data into the pointz_aggregator_data table.
+
+    The first skip <user> elements are passed over; checkpoint receives the number
+    of <user> elements handled so far.
+    """
     try:
         tree = ET.parse(xml_file)
         root = tree.getroot()
 
-        for user in root.findall('user'):
-            uid = user.get('uid', '')
-            name = user.find('name')
-            first_name = name.get('first', '') if name is not None else ''
-            last_name = name.get('last', '') if name is not None else ''
-
-            cards = user.find('cards')
-            if cards is not None:
-                for card in cards.findall('card'):
-                    card_number = card.get('number', '')
-                    bonus_programm = card.find('bonusprogramm').text if card.find('bonusprogramm') is not None else ''
-
-                    activities = card.find('activities')
-                    if activities is not None:
-                        for activity in activities.findall('activity'):
-                            if activity.get('type') == 'Flight':
-                                flight_code = activity.find('Code').text if activity.find('Code') is not None else ''
-                                flight_date = activity.find('Date').text if activity.find('Date') is not None else ''
-                                departure = activity.find('Departure').text if activity.find('Departure') is not None else ''
-                                arrival = activity.find('Arrival').text if activity.find('Arrival') is not None else ''
-                                fare = activity.find('Fare').text if activity.find('Fare') is not None else ''
-
-                                cursor.execute('''
-                                    INSERT INTO pointz_aggregator_data (
-                                        UserUID, FirstName, LastName, CardNumber, BonusProgramm,
-                                        FlightCode, FlightDate, Departure, Arrival, Fare
-                                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                                ''', (uid, first_name, last_name, card_number, bonus_programm,
-                                      flight_code, flight_date, departure, arrival, fare))
+        with BatchWriter(cursor, 'pointz_aggregator_data', POINTZ_AGGREGATOR_COLUMNS,
+                         source=xml_file) as writer:
+            if checkpoint:
+                checkpoint.track(writer)
+            for users, user in enumerate(root.findall('user'), 1):
+                if users <= skip:
+                    continue
+                writer.extend(iter_user_flight_rows(user))
+                if checkpoint:
+                    checkpoint.reached(users)
     except FileNotFoundError:
         logger.error(f"XML file not found: {xml_file}")
         raise
@@ -326,6 +1294,68 @@ def parse_xml_file(cursor: sqlite3.Cursor, xml_file: str) -> None:
         logger.error(f"Error parsing XML file: {e}")
         raise
 
+def parse_xml_file_streaming(cursor: sqlite3.Cursor, xml_file: str, skip: int = 0,
+                             checkpoint: Optional[Checkpointer] = None) -> None:
+    """Stream the XML file with iterparse and insert data into the pointz_aggregator_data table.
+
+    Each top-level <user> element is handled as soon as it is complete and then
+    discarded, so memory stays flat regardless of the file size. skip and checkpoint
+    work as in parse_xml_file.
+    """
+    try:
+        with BatchWriter(cursor, 'pointz_aggregator_data', POINTZ_AGGREGATOR_COLUMNS,
+                         source=xml_file) as writer:
+            if checkpoint:
+                checkpoint.track(writer)
+            context = ET.iterparse(xml_file, events=('start', 'end'))
+            _, root = next(context)
+            depth = 0
+            users = 0
+            for event, elem in context:
+                if event == 'start':
+                    depth += 1
+                    continue
+                depth -= 1
+                if depth == 0:
+                    if elem.tag == 'user':
+                        users += 1
+                        if users > skip:
+                            writer.extend(iter_user_flight_rows(elem))
+                            if checkpoint:
+                                checkpoint.reached(users)
+                    root.clear()
+    except FileNotFoundError:
+        logger.error(f"XML file not found: {xml_file}")
+        raise
+    except ET.ParseError:
+        logger.error(f"Invalid XML format in file: {xml_file}")
+        raise
+    except Exception as e:
+        logger.error(f"Error parsing XML file: {e}")
+        raise
+
+SKYTEAM_DATA_COLUMNS = (
+    'FlightDate', 'FlightNumber', 'FFProgram', 'FFNumber',
+    'TravelClass', 'Fare', 'Departure', 'Arrival', 'Status',
+)
+
+def iter_flight_ff_rows(flight_date, flight_number, flight_info: dict) -> Iterator[tuple]:
+    """Yield skyteam_data rows for every FF entry of a single flight."""
+    departure = flight_info.get('FROM', '')
+    arrival = flight_info.get('TO', '')
+    status = flight_info.get('STATUS', '')
+    ff_data = flight_info.get('FF') or {}
+
+    for ff_number, ff_info in ff_data.items():
+        ff_program = ff_number.split()[0] if ff_number and ' ' in ff_number else ''
+        travel_class = ff_info.get('CLASS', '')
+        fare = ff_info.get('FARE', '')
+
+        yield (
+            flight_date, flight_number, ff_program, ff_number,
+            travel_class, fare, departure, arrival, status
+        )
+
 def parse_yaml_file(cursor: sqlite3.Cursor, yaml_file: str) -> None:
     """Parse the YAML file and insert data into the skyteam_data table."""
     try:
@@ -341,28 +1371,10 @@ def parse_yaml_file(cursor: sqlite3.Cursor, yaml_file: str) -> None:
             rows = []
             for flight_date, flights in data.items():
                 for flight_number, flight_info in flights.items():
-                    departure = flight_info.get('FROM', '')
-                    arrival = flight_info.get('TO', '')
-                    status = flight_info.get('STATUS', '')
-                    ff_data = flight_info.get('FF', {})
-
-                    for ff_number, ff_info in ff_data.items():
-                        ff_program = ff_number.split()[0] if ff_number and ' ' in ff_number else ''
-                        travel_class = ff_info.get('CLASS', '')
-                        fare = ff_info.get('FARE', '')
-
-                        rows.append((
-                            flight_date, flight_number, ff_program, ff_number,
-                            travel_class, fare, departure, arrival, status
-                        ))
-
-            if rows:
-                cursor.executemany('''
-                    INSERT INTO skyteam_data (
-                        FlightDate, FlightNumber, FFProgram, FFNumber, 
-                        TravelClass, Fare, Departure, Arrival, Status
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', rows)
+                    rows.extend(iter_flight_ff_rows(flight_date, flight_number, flight_info))
+
+            with BatchWriter(cursor, 'skyteam_data', SKYTEAM_DATA_COLUMNS, source=yaml_file) as writer:
+                writer.extend(rows)
 
             elapsed = time.time() - start_time
             logger.info(f"Completed YAML parsing in {elapsed:.2f} seconds")
@@ -376,6 +1388,94 @@ def parse_yaml_file(cursor: sqlite3.Cursor, yaml_file: str) -> None:
         logger.error(f"Error parsing YAML file: {e}")
         raise
 
+def construct_yaml_scalar(yaml: YAML, event: ScalarEvent):
+    """Convert a scalar event to the value the safe loader gives it (int, float, bool, date, None, str)."""
+    tag = event.tag
+    if tag is None or tag == '!':
+        tag = yaml.resolver.resolve(ScalarNode, event.value, event.implicit)
+    node = ScalarNode(tag, event.value, start_mark=event.start_mark, end_mark=event.end_mark, style=event.style)
+    return yaml.constructor.construct_non_recursive_object(node)
+
+def compose_yaml_value(yaml: YAML, events: Iterator, event):
+    """Build the Python value starting at event, consuming its events from the stream.
+
+    Scalars are resolved and constructed by yaml's safe resolver and constructor,
+    so values match what yaml.load returns for the same document.
+    """
+    if isinstance(event, ScalarEvent):
+        return construct_yaml_scalar(yaml, event)
+    if isinstance(event, MappingStartEvent):
+        mapping = {}
+        for key_event in events:
+            if isinstance(key_event, MappingEndEvent):
+                return mapping
+            key = compose_yaml_value(yaml, events, key_event)
+            mapping[key] = compose_yaml_value(yaml, events, next(events))
+    if isinstance(event, SequenceStartEvent):
+        sequence = []
+        for item_event in events:
+            if isinstance(item_event, SequenceEndEvent):
+                return sequence
+            sequence.append(compose_yaml_value(yaml, events, item_event))
+    raise YAMLError(f"Unsupported YAML event: {event}")
+
+def iter_yaml_flights(file) -> Iterator[tuple]:
+    """Yield (flight_date, flight_number, flight_info) from the SkyTeam YAML event stream.
+
+    Only one flight's mapping is held in memory at a time.
+    """
+    yaml = YAML(typ='safe')
+    events = iter(yaml.parse(file))
+    for event in events:
+        if isinstance(event, MappingStartEvent):
+            break
+    else:
+        return
+    for event in events:
+        if isinstance(event, MappingEndEvent):
+            return
+        flight_date = compose_yaml_value(yaml, events, event)
+        flights_event = next(events)
+        if not isinstance(flights_event, MappingStartEvent):
+            compose_yaml_value(yaml, events, flights_event)
+            continue
+        for flight_event in events:
+            if isinstance(flight_event, MappingEndEvent):
+                break
+            flight_number = compose_yaml_value(yaml, events, flight_event)
+            flight_info = compose_yaml_value(yaml, events, next(events))
+            yield flight_date, flight_number, flight_info or {}
+
+def parse_yaml_file_streaming(cursor: sqlite3.Cursor, yaml_file: str, use_cache: bool = YAML_CACHE) -> None:
+    """Stream the YAML file into the skyteam_data table, reusing the row cache when it is current."""
+    try:
+        start_time = time.time()
+        cache_path = Path(yaml_file + ROW_CACHE_SUFFIX)
+        digest = f'v{YAML_CACHE_VERSION}:{file_sha256(yaml_file)}' if use_cache else None
+        with BatchWriter(cursor, 'skyteam_data', SKYTEAM_DATA_COLUMNS, source=yaml_file) as writer:
+            if use_cache and row_cache_matches(cache_path, digest):
+                logger.info(f"Loading YAML rows from cache {cache_path}")
+                for batch in iter_row_cache(cache_path):
+                    writer.extend(batch)
+            else:
+                logger.info(f"Starting streaming YAML parsing for {yaml_file}")
+                with open(yaml_file, 'r', encoding='utf-8') as file:
+                    rows = (row for flight in iter_yaml_flights(file) for row in iter_flight_ff_rows(*flight))
+                    if use_cache:
+                        rows = cache_rows(rows, cache_path, digest)
+                    writer.extend(rows)
+        elapsed = time.time() - start_time
+        logger.info(f"Completed YAML parsing in {elapsed:.2f} seconds")
+    except FileNotFoundError:
+        logger.error(f"YAML file not found: {yaml_file}")
+        raise
+    except YAMLError as e:
+        logger.error(f"Invalid YAML format in file {yaml_file}: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Error parsing YAML file: {e}")
+        raise
+
 def process_pdf_to_excel(pdf_file, excel_file, start_from_page):
     def extract_tables_from_pdf(pdf_path, excel_path, start_page=1):
         all_tables = []
@@ -387,7 +1487,7 @@ def process_pdf_to_excel(pdf_file, excel_file, start_from_page):
                 if page_num < start_page:
                     continue
 
-                print(f"Обрабатывается страница {page_num}")
+                logger.info(f"Processing PDF page {page_num}")
 
                 text = page.extract_text()
 
@@ -505,7 +1605,7 @@ def process_pdf_to_excel(pdf_file, excel_file, start_from_page):
             worksheet = workbook[sheet_name]
 
             if worksheet.max_row <= 1:
-                print(f"Лист '{sheet_name}' имеет 0 или 1 строку — пропускаем.")
+                logger.info(f"Sheet '{sheet_name}' has at most one row, skipping")
                 continue
 
             rows_to_shift = []
@@ -534,7 +1634,7 @@ def process_pdf_to_excel(pdf_file, excel_file, start_from_page):
                 cell.border = Border()  # Убираем границы
 
         workbook.save(output_file)
-        print(f"Новый файл сохранён как '{output_file}'.")
+        logger.info(f"Saved workbook without title rows as '{output_file}'")
 
     def split_tables(df):
         empty_mask = df.isnull().all(axis=1)
@@ -576,10 +1676,103 @@ def process_pdf_to_excel(pdf_file, excel_file, start_from_page):
             sheet_name = f'Sheet2_Table_{i + 1}'
             table.to_excel(writer, sheet_name=sheet_name, index=False)
 
-    print(f"Processed and saved {len(tables1) + len(tables2)} tables to separate sheets in {excel_file}")
+    logger.info(f"Processed and saved {len(tables1) + len(tables2)} tables to separate sheets in {excel_file}")
 
     remove_first_row_from_xlsx(excel_file, excel_file)
 
+SKYTEAM_TIMETABLE_COLUMNS = (
+    'from_city', 'from_country', 'from_code',
+    'to_city', 'to_country', 'to_code',
+    'validity', 'days', 'dep_time', 'arr_time',
+    'flight', 'aircraft', 'travel_time',
+)
+
+def parse_timetable_place(place_row: list, label: str, table_name: str) -> Optional[tuple[str, str, str]]:
+    """Parse a 'FROM:'/'TO:' row into (city, country, code), or return None if it is invalid."""
+    values = [value for value in place_row if value is not None]
+    if len(values) < 3 or values[0].strip() != label:
+        logger.warning(f"Invalid {label[:-1]} row in sheet {table_name}, skipping.")
+        return None
+
+    if len(values) == 3:
+        city_country = values[1].strip()
+        if ',' in city_country:
+            city, country = [p.strip() for p in city_country.split(',', 1)]
+        else:
+            city = city_country
+            country = ''
+        code = values[2].strip()
+    elif len(values) == 4:
+        city = values[1].strip()
+        country = values[2].strip()
+        code = values[3].strip()
+    else:
+        logger.warning(f"Unexpected {label[:-1]} row length in sheet {table_name}: {len(values)}, skipping.")
+        return None
+    return city, country, code
+
+def iter_timetable_block_rows(block: list[list], table_name: str,
+                              rejects: Optional[RejectWriter] = None) -> Iterator[tuple]:
+    """Yield skyteam_timetable rows from one FROM/TO timetable block.
+
+    block holds the block's rows as lists with None for empty cells: the FROM row,
+    the TO row, the column header row and then the flight rows. Flight rows without
+    validity or flight number go to rejects, numbered by their row in the block.
+    """
+    if not block:
+        logger.warning(f"Sheet {table_name} is empty, skipping.")
+        return
+
+    if len(block) < 3:
+        logger.warning(f"Sheet {table_name} has insufficient rows, skipping.")
+        return
+
+    from_place = parse_timetable_place(block[0], 'FROM:', table_name)
+    if from_place is None:
+        return
+    to_place = parse_timetable_place(block[1], 'TO:', table_name)
+    if to_place is None:
+        return
+
+    if len(block) == 4 and 'Consult your travel agent for details' in block[3]:
+        logger.info(f"No flight data in sheet {table_name}, skipping insertion.")
+        return
+
+    header_row = block[2]
+    if 'Validity' not in header_row or 'Days' not in header_row:
+        logger.warning(f"Invalid header in sheet {table_name}, skipping.")
+        return
+
+    def text(record: dict, *names: str) -> str:
+        for name in names:
+            if name in record:
+                value = record[name]
+                return str(value).strip() if value is not None else ''
+        return ''
+
+    for row_number, row in enumerate(block[3:], start=4):
+        record = dict(zip(header_row, row))
+        if record.get('Validity') is None and record.get('Days') is None:
+            continue
+
+        validity = text(record, 'Validity')
+        days = text(record, 'Days')
+        dep_time = text(record, 'Dep\nTime', 'Dep Time')
+        arr_time = text(record, 'Arr\nTime', 'Arr Time')
+        flight = text(record, 'Flight')
+        aircraft = text(record, 'Aircraft')
+        travel_time = text(record, 'Travel\nTime', 'Travel Time')
+
+        if validity and flight:
+            yield (*from_place, *to_place,
+                   validity, days, dep_time, arr_time,
+                   flight, aircraft, travel_time)
+        elif rejects is not None:
+            rejects.add(row_number, "missing validity or flight", json.dumps(row, ensure_ascii=False, default=str),
+                        file=f"{rejects.file}:{table_name}")
+        else:
+            logger.warning(f"Skipping invalid data row in {table_name}: {row}")
+
 def parse_skyteam_timetable(cursor: sqlite3.Cursor, excel_file: str) -> None:
     """Parse the Skyteam_Timetable.xlsx file and insert data into the skyteam_timetable table.
 
@@ -589,6 +1782,8 @@ def parse_skyteam_timetable(cursor: sqlite3.Cursor, excel_file: str) -> None:
     """
     try:
         xls = pd.ExcelFile(excel_file)
+        writer = BatchWriter(cursor, 'skyteam_timetable', SKYTEAM_TIMETABLE_COLUMNS, source=excel_file)
+        rejects = RejectWriter(cursor, 'pdf', excel_file)
 
         for sheet_name in xls.sheet_names:
             if not (sheet_name.startswith('Sheet1_Table_') or sheet_name.startswith('Sheet2_Table_')):
@@ -597,165 +1792,284 @@ def parse_skyteam_timetable(cursor: sqlite3.Cursor, excel_file: str) -> None:
             logger.info(f"Processing sheet: {sheet_name}")
 
             df = pd.read_excel(xls, sheet_name=sheet_name, header=None)
+            block = df.astype(object).where(df.notna(), None).values.tolist()
+            writer.extend(iter_timetable_block_rows(block, sheet_name, rejects))
 
-            if df.empty:
-                logger.warning(f"Sheet {sheet_name} is empty, skipping.")
-                continue
-
-            if len(df) < 3:
-                logger.warning(f"Sheet {sheet_name} has insufficient rows, skipping.")
-                continue
-
-            from_row = df.iloc[0].dropna().tolist()
-            if len(from_row) < 3 or from_row[0].strip() != 'FROM:':
-                logger.warning(f"Invalid FROM row in sheet {sheet_name}, skipping.")
-                continue
+        writer.close()
+        rejects.close()
+        logger.info("Skyteam timetable data successfully parsed and inserted.")
 
-            if len(from_row) == 3:
-                city_country = from_row[1].strip()
-                if ',' in city_country:
-                    from_city, from_country = [p.strip() for p in city_country.split(',', 1)]
-                else:
-                    from_city = city_country
-                    from_country = ''
-                from_code = from_row[2].strip()
-            elif len(from_row) == 4:
-                from_city = from_row[1].strip()
-                from_country = from_row[2].strip()
-                from_code = from_row[3].strip()
-            else:
-                logger.warning(f"Unexpected FROM row length in sheet {sheet_name}: {len(from_row)}, skipping.")
-                continue
+    except FileNotFoundError:
+        logger.error(f"Excel file not found: {excel_file}")
+        raise
+    except pd.errors.EmptyDataError:
+        logger.error(f"Empty data in Excel file: {excel_file}")
+        raise
+    except Exception as e:
+        logger.error(f"Error parsing Skyteam timetable Excel file: {e}")
+        raise
 
-            to_row = df.iloc[1].dropna().tolist()
-            if len(to_row) < 3 or to_row[0].strip() != 'TO:':
-                logger.warning(f"Invalid TO row in sheet {sheet_name}, skipping.")
-                continue
+def extract_timetable_page_tables(page) -> tuple[bool, list[list[list]]]:
+    """Return whether a PDF page has a FROM title and its non-empty tables.
 
-            if len(to_row) == 3:
-                city_country = to_row[1].strip()
-                if ',' in city_country:
-                    to_city, to_country = [p.strip() for p in city_country.split(',', 1)]
-                else:
-                    to_city = city_country
-                    to_country = ''
-                to_code = to_row[2].strip()
-            elif len(to_row) == 4:
-                to_city = to_row[1].strip()
-                to_country = to_row[2].strip()
-                to_code = to_row[3].strip()
+    Tables are lists of rows; rows and columns that are entirely None are dropped,
+    as DataFrame.dropna does in process_pdf_to_excel.
+    """
+    has_title = 'FROM' in (page.extract_text() or '')
+    tables = []
+    for table in page.extract_tables():
+        if not table or not any(
+                any(cell is not None and str(cell).strip() for cell in row) for row in table):
+            continue
+        width = max(len(row) for row in table)
+        rows = [list(row) + [None] * (width - len(row)) for row in table]
+        rows = [row for row in rows if any(cell is not None for cell in row)]
+        keep = [c for c in range(width) if any(row[c] is not None for row in rows)]
+        rows = [[row[c] for c in keep] for row in rows]
+        if rows and keep:
+            tables.append(rows)
+    return has_title, tables
+
+def group_timetable_tables(pages: Iterable[tuple[int, bool, list]]) -> list[tuple[str, list]]:
+    """Group page tables into (title, parts): a titled table starts a group, others continue it."""
+    groups = []
+    current_parts = []
+    current_title = None
+    for page_num, has_title, tables in pages:
+        for table in tables:
+            if has_title:
+                if current_parts:
+                    groups.append((current_title, current_parts))
+                current_title = 'FROM'
+                current_parts = [table]
+            elif current_parts:
+                current_parts.append(table)
             else:
-                logger.warning(f"Unexpected TO row length in sheet {sheet_name}: {len(to_row)}, skipping.")
-                continue
+                current_title = f"Таблица со страницы {page_num}"
+                current_parts = [table]
+    if current_parts:
+        groups.append((current_title, current_parts))
+    return groups
+
+def layout_timetable_sheets(groups: list[tuple[str, list]]) -> tuple[dict, dict]:
+    """Place grouped tables on the two sheet grids exactly as process_pdf_to_excel writes them.
+
+    Returns {row: {column: text}} for Sheet1 (PDF columns 1-9) and Sheet2 (the rest).
+    Continuation tables get an extra column after TIMETABLE_SHIFT_AFTER positions so
+    they line up with the header of the first part.
+    """
+    sheet1 = defaultdict(dict)
+    sheet2 = defaultdict(dict)
+
+    def put(row_offset: int, column: int, orig_column: int, value) -> None:
+        text = str(value).strip() if value is not None else ''
+        if orig_column < 10:
+            sheet1[row_offset][column] = text
+        else:
+            sheet2[row_offset][column - 9] = text
+
+    row_offset = 1
+    for title, parts in groups:
+        if title:
+            sheet1[row_offset][1] = title
+            row_offset += 2
 
-            if len(df) == 4 and 'Consult your travel agent for details' in df.iloc[3].values:
-                logger.info(f"No flight data in sheet {sheet_name}, skipping insertion.")
-                continue
+        if not parts:
+            continue
 
-            header_row = df.iloc[2].tolist()
-            if 'Validity' not in header_row or 'Days' not in header_row:
-                logger.warning(f"Invalid header in sheet {sheet_name}, skipping.")
-                continue
+        row_offset += 1
+        for row in parts[0]:
+            for c, value in enumerate(row, start=1):
+                put(row_offset, c, c, value)
+            row_offset += 1
 
-            data_df = df.iloc[3:].reset_index(drop=True)
-            data_df.columns = header_row
+        for part in parts[1:]:
+            for row in part:
+                excel_col = 1
+                for orig_1based, value in enumerate(row, start=1):
+                    put(row_offset, excel_col, orig_1based, value)
+                    excel_col += 1
+                    if orig_1based in TIMETABLE_SHIFT_AFTER:
+                        excel_col += 1
+                row_offset += 1
 
-            for _, row in data_df.iterrows():
-                if pd.isna(row['Validity']) and pd.isna(row['Days']):
-                    continue
+        row_offset += 2
+    return sheet1, sheet2
 
-                validity = str(row.get('Validity', '')).strip()
-                days = str(row.get('Days', '')).strip()
-
-                dep_time = ''
-                if 'Dep\nTime' in row:
-                    dep_time = str(row['Dep\nTime']).strip() if not pd.isna(row['Dep\nTime']) else ''
-                elif 'Dep Time' in row:
-                    dep_time = str(row['Dep Time']).strip() if not pd.isna(row['Dep Time']) else ''
-
-                arr_time = ''
-                if 'Arr\nTime' in row:
-                    arr_time = str(row['Arr\nTime']).strip() if not pd.isna(row['Arr\nTime']) else ''
-                elif 'Arr Time' in row:
-                    arr_time = str(row['Arr Time']).strip() if not pd.isna(row['Arr Time']) else ''
-
-                flight = str(row.get('Flight', '')).strip()
-                aircraft = str(row.get('Aircraft', '')).strip()
-
-                travel_time = ''
-                if 'Travel\nTime' in row:
-                    travel_time = str(row['Travel\nTime']).strip() if not pd.isna(row['Travel\nTime']) else ''
-                elif 'Travel Time' in row:
-                    travel_time = str(row['Travel Time']).strip() if not pd.isna(row['Travel Time']) else ''
-
-                if validity and flight:
-                    cursor.execute('''
-                        INSERT INTO skyteam_timetable (
-                            from_city, from_country, from_code,
-                            to_city, to_country, to_code,
-                            validity, days, dep_time, arr_time,
-                            flight, aircraft, travel_time
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (from_city, from_country, from_code,
-                          to_city, to_country, to_code,
-                          validity, days, dep_time, arr_time,
-                          flight, aircraft, travel_time))
-                else:
-                    logger.warning(f"Skipping invalid data row in {sheet_name}: {row}")
+def split_timetable_sheet(grid: dict, skip_columns: int = 0) -> list[list[list]]:
+    """Split a sheet grid into blocks of consecutive non-empty rows, as split_tables does.
 
+    The first grid row is treated as the DataFrame header that pd.read_excel consumes,
+    the first skip_columns columns are dropped and blocks shorter than two rows are discarded.
+    """
+    filled = {r: cells for r, cells in grid.items() if any(cells.values())}
+    if not filled:
+        return []
+    width = max(c for cells in filled.values() for c, value in cells.items() if value)
+    blocks = []
+    current = []
+    for r in range(2, max(filled) + 1):
+        cells = grid.get(r, {})
+        row = [cells.get(c) or None for c in range(skip_columns + 1, width + 1)]
+        if any(value is not None for value in row):
+            current.append(row)
+            continue
+        if len(current) >= 2:
+            blocks.append(current)
+        current = []
+    if len(current) >= 2:
+        blocks.append(current)
+    return blocks
+
+def timetable_page_cache_path(cache_dir: Path, page_num: int) -> Path:
+    """Return the cache file for one PDF page inside a per-PDF cache directory."""
+    return cache_dir / f'page_{page_num:05d}.pkl'
+
+def extract_timetable_page_range(pdf_file: str, page_nums: list[int],
+                                 cache_dir: Optional[Path] = None) -> list[tuple]:
+    """Process-pool task: extract a run of PDF pages, caching each page as soon as it is done.
+
+    Returns (page_num, has_title, tables, seconds) for every page.
+    """
+    results = []
+    with pdfplumber.open(pdf_file) as pdf:
+        for page_num in page_nums:
+            page_start = time.time()
+            has_title, tables = extract_timetable_page_tables(pdf.pages[page_num - 1])
+            if cache_dir is not None:
+                cache_path = timetable_page_cache_path(cache_dir, page_num)
+                tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+                with open(tmp_path, 'wb') as file:
+                    pickle.dump((has_title, tables), file, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, cache_path)
+            results.append((page_num, has_title, tables, time.time() - page_start))
+    return results
+
+def extract_timetable_pages(pdf_file: str, start_from_page: int = PDF_START_PAGE,
+                            workers: Optional[int] = PDF_WORKERS,
+                            use_cache: bool = PDF_PAGE_CACHE) -> list[tuple[int, bool, list]]:
+    """Extract (page_num, has_title, tables) for every page from start_from_page, in page order.
+
+    Pages already in the page cache are loaded from it; the rest are split into runs of
+    PDF_PAGES_PER_TASK pages and extracted in parallel worker processes.
+    """
+    start_time = time.time()
+    with pdfplumber.open(pdf_file) as pdf:
+        page_count = len(pdf.pages)
+    page_nums = list(range(start_from_page, page_count + 1))
+
+    pages = {}
+    cache_dir = None
+    if use_cache:
+        cache_dir = Path(PDF_PAGE_CACHE_DIR) / file_sha256(pdf_file)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        for page_num in page_nums:
+            cache_path = timetable_page_cache_path(cache_dir, page_num)
+            if cache_path.is_file():
+                with open(cache_path, 'rb') as file:
+                    pages[page_num] = pickle.load(file)
+
+    missing = [page_num for page_num in page_nums if page_num not in pages]
+    logger.info(f"{len(pages)} of {len(page_nums)} PDF pages loaded from cache, extracting {len(missing)}")
+    tasks = [missing[i:i + PDF_PAGES_PER_TASK] for i in range(0, len(missing), PDF_PAGES_PER_TASK)]
+    if tasks:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(extract_timetable_page_range, pdf_file, task, cache_dir) for task in tasks]
+            for future in as_completed(futures):
+                for page_num, has_title, tables, elapsed in future.result():
+                    pages[page_num] = (has_title, tables)
+                    logger.info(f"Page {page_num}: {len(tables)} tables in {elapsed:.2f} seconds")
+
+    if page_nums:
+        elapsed = time.time() - start_time
+        logger.info(f"Extracted {len(page_nums)} pages in {elapsed:.2f} seconds "
+                    f"({elapsed / len(page_nums):.2f} seconds/page)")
+    return [(page_num, *pages[page_num]) for page_num in page_nums]
+
+def parse_skyteam_timetable_pdf(cursor: sqlite3.Cursor, pdf_file: str, start_from_page: int = PDF_START_PAGE) -> None:
+    """Extract Skyteam_Timetable.pdf straight into the skyteam_timetable table.
+
+    Produces the same tables as process_pdf_to_excel followed by parse_skyteam_timetable,
+    but keeps every intermediate in memory instead of writing and re-reading workbooks.
+    """
+    try:
+        pages = extract_timetable_pages(pdf_file, start_from_page)
+        sheet1, sheet2 = layout_timetable_sheets(group_timetable_tables(pages))
+        blocks = [(f'Sheet1_Table_{i}', block) for i, block in enumerate(split_timetable_sheet(sheet1), 1)]
+        blocks += [(f'Sheet2_Table_{i}', block) for i, block in enumerate(split_timetable_sheet(sheet2, 2), 1)]
+
+        with BatchWriter(cursor, 'skyteam_timetable', SKYTEAM_TIMETABLE_COLUMNS, source=pdf_file) as writer, \
+                RejectWriter(cursor, 'pdf', pdf_file) as rejects:
+            for table_name, block in blocks:
+                writer.extend(iter_timetable_block_rows(block, table_name, rejects))
         logger.info("Skyteam timetable data successfully parsed and inserted.")
-
     except FileNotFoundError:
-        logger.error(f"Excel file not found: {excel_file}")
-        raise
-    except pd.errors.EmptyDataError:
-        logger.error(f"Empty data in Excel file: {excel_file}")
+        logger.error(f"PDF file not found: {pdf_file}")
         raise
     except Exception as e:
-        logger.error(f"Error parsing Skyteam timetable Excel file: {e}")
+        logger.error(f"Error parsing Skyteam timetable PDF file: {e}")
         raise
 
-def parse_json_file(cursor: sqlite3.Cursor, json_file: str) -> None:
-    """Parse the JSON file and insert data into the frequent_flyer_profiles and frequent_flyer_flights tables."""
+FREQUENT_FLYER_PROFILE_COLUMNS = (
+    'Nick', 'Sex', 'FirstName', 'LastName', 'TravelDocuments', 'Loyalties',
+)
+FREQUENT_FLYER_FLIGHT_COLUMNS = (
+    'NickName', 'FlightDate', 'Flight', 'Codeshare',
+    'DepartureCity', 'DepartureAirport', 'DepartureCountry',
+    'ArrivalCity', 'ArrivalAirport', 'ArrivalCountry',
+)
+
+def write_forum_profile(profile: dict, profile_writer: BatchWriter, flight_writer: BatchWriter) -> None:
+    """Queue one forum profile and its registered flights on their writers."""
+    nickname = profile.get("NickName", "")
+    sex = profile.get("Sex", "")
+    real_name = profile.get("Real Name", {})
+    first_name = real_name.get("First Name", "") if real_name else ""
+    last_name = real_name.get("Last Name", "") if real_name else ""
+    travel_documents = json.dumps(profile.get("Travel Documents", []))
+    loyalties = json.dumps(profile.get("Loyality Programm", []))
+    profile_writer.add((nickname, sex, first_name, last_name, travel_documents, loyalties))
+
+    flights = profile.get("Registered Flights", [])
+    for flight in flights:
+        date = flight.get("Date", "")
+        codeshare = 1 if flight.get("Codeshare", False) else 0
+        flight_num = flight.get("Flight", "")
+        dep = flight.get("Departure", {})
+        dep_city = dep.get("City", "")
+        dep_airport = dep.get("Airport", "")
+        dep_country = dep.get("Country", "")
+        arr = flight.get("Arrival", {})
+        arr_city = arr.get("City", "")
+        arr_airport = arr.get("Airport", "")
+        arr_country = arr.get("Country", "")
+        flight_writer.add((nickname, date, flight_num, codeshare,
+                           dep_city, dep_airport, dep_country,
+                           arr_city, arr_airport, arr_country))
+
+def parse_json_file(cursor: sqlite3.Cursor, json_file: str, skip: int = 0,
+                    checkpoint: Optional[Checkpointer] = None) -> None:
+    """Parse the JSON file and insert data into the frequent_flyer_profiles and frequent_flyer_flights tables.
+
+    The first skip profiles are passed over; checkpoint receives the number of
+    profiles handled so far.
+    """
     try:
         with open(json_file, 'r', encoding='utf-8') as file:
             data = json.load(file)
         profiles = data.get("Forum Profiles", [])
-        for profile in profiles:
-            nickname = profile.get("NickName", "")
-            sex = profile.get("Sex", "")
-            real_name = profile.get("Real Name", {})
-            first_name = real_name.get("First Name", "") if real_name else ""
-            last_name = real_name.get("Last Name", "") if real_name else ""
-            travel_documents = json.dumps(profile.get("Travel Documents", []))
-            loyalties = json.dumps(profile.get("Loyality Programm", []))
-            cursor.execute('''
-                INSERT OR REPLACE INTO frequent_flyer_profiles (Nick, Sex, FirstName, LastName, TravelDocuments, Loyalties)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (nickname, sex, first_name, last_name, travel_documents, loyalties))
-
-            flights = profile.get("Registered Flights", [])
-            for flight in flights:
-                date = flight.get("Date", "")
-                codeshare = 1 if flight.get("Codeshare", False) else 0
-                flight_num = flight.get("Flight", "")
-                dep = flight.get("Departure", {})
-                dep_city = dep.get("City", "")
-                dep_airport = dep.get("Airport", "")
-                dep_country = dep.get("Country", "")
-                arr = flight.get("Arrival", {})
-                arr_city = arr.get("City", "")
-                arr_airport = arr.get("Airport", "")
-                arr_country = arr.get("Country", "")
-                cursor.execute('''
-                    INSERT INTO frequent_flyer_flights (
-                        NickName, FlightDate, Flight, Codeshare,
-                        DepartureCity, DepartureAirport, DepartureCountry,
-                        ArrivalCity, ArrivalAirport, ArrivalCountry
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (nickname, date, flight_num, codeshare,
-                      dep_city, dep_airport, dep_country,
-                      arr_city, arr_airport, arr_country))
+        profile_writer = BatchWriter(cursor, 'frequent_flyer_profiles', FREQUENT_FLYER_PROFILE_COLUMNS,
+                                     source=json_file, verb='INSERT OR REPLACE')
+        flight_writer = BatchWriter(cursor, 'frequent_flyer_flights', FREQUENT_FLYER_FLIGHT_COLUMNS,
+                                    source=json_file)
+        if checkpoint:
+            checkpoint.track(profile_writer, flight_writer)
+        for count, profile in enumerate(profiles[skip:], skip + 1):
+            write_forum_profile(profile, profile_writer, flight_writer)
+            if checkpoint:
+                checkpoint.reached(count)
+        profile_writer.close()
+        flight_writer.close()
     except FileNotFoundError:
         logger.error(f"JSON file not found: {json_file}")
         raise
@@ -766,49 +2080,788 @@ def parse_json_file(cursor: sqlite3.Cursor, json_file: str) -> None:
         logger.error(f"Error parsing JSON file: {e}")
         raise
 
-def parse_xls_files(cursor: sqlite3.Cursor, xls_dir: str) -> None:
-    """Parse XLS files in the directory and insert data into the boarding_pass_xls table."""
+class JSONStreamReader:
+    """Decode values one at a time from a text stream holding a single large JSON document.
+
+    Only the unconsumed tail of the last chunk is kept in memory, so documents far
+    larger than RAM can be walked as long as each decoded value fits.
+    """
+
+    WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+    def __init__(self, file, chunk_size: int = JSON_CHUNK_SIZE) -> None:
+        self.file = file
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def read_chunk(self) -> bool:
+        """Append the next chunk to the buffer, dropping consumed text. Return False at EOF."""
+        if self.eof:
+            return False
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it, or '' at EOF."""
+        while True:
+            self.pos = self.WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.read_chunk():
+                return ''
+
+    def expect(self, char: str) -> None:
+        """Consume the structural character char or raise JSONDecodeError."""
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self.buffer, self.pos)
+        self.pos += 1
+
+    def decode(self):
+        """Decode and consume the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.read_chunk():
+                    continue
+                raise
+            # A number ending exactly at the buffer edge may continue in the next chunk
+            if end == len(self.buffer) and self.read_chunk():
+                continue
+            self.pos = end
+            return value
+
+    def items(self) -> Iterator:
+        """Decode and yield the elements of the array starting at the next character."""
+        self.expect('[')
+        if self.peek() == ']':
+            self.expect(']')
+            return
+        while True:
+            yield self.decode()
+            if self.peek() == ']':
+                self.expect(']')
+                return
+            self.expect(',')
+
+    def expect_end(self) -> None:
+        """Raise JSONDecodeError if anything but whitespace follows the document."""
+        if self.peek():
+            raise json.JSONDecodeError("Extra data", self.buffer, self.pos)
+
+def iter_json_array_items(file, key: str, chunk_size: int = JSON_CHUNK_SIZE) -> Iterator:
+    """Yield the elements of the array stored under key in a top-level JSON object, one at a time.
+
+    Malformed input, such as missing commas or data after the closing brace, raises
+    JSONDecodeError as json.load does, once the reader gets to it.
+    """
+    reader = JSONStreamReader(file, chunk_size)
+    reader.expect('{')
+    if reader.peek() == '}':
+        reader.expect('}')
+    else:
+        while True:
+            if reader.peek() != '"':
+                raise json.JSONDecodeError("Expecting property name enclosed in double quotes",
+                                           reader.buffer, reader.pos)
+            name = reader.decode()
+            reader.expect(':')
+            if name == key and reader.peek() == '[':
+                yield from reader.items()
+            else:
+                reader.decode()
+            if reader.peek() == '}':
+                reader.expect('}')
+                break
+            reader.expect(',')
+    reader.expect_end()
+
+def parse_json_file_streaming(cursor: sqlite3.Cursor, json_file: str, skip: int = 0,
+                              checkpoint: Optional[Checkpointer] = None) -> None:
+    """Stream "Forum Profiles" one profile at a time into the frequent flyer tables.
+
+    skip and checkpoint work as in parse_json_file.
+    """
     try:
-        for file_path in Path(xls_dir).glob('*.xlsx'):
-            xls = pd.ExcelFile(file_path)
-            for sheet_name in xls.sheet_names:
-                df = pd.read_excel(xls, sheet_name=sheet_name, header=None)
-                if df.empty:
+        profile_writer = BatchWriter(cursor, 'frequent_flyer_profiles', FREQUENT_FLYER_PROFILE_COLUMNS,
+                                     source=json_file, verb='INSERT OR REPLACE')
+        flight_writer = BatchWriter(cursor, 'frequent_flyer_flights', FREQUENT_FLYER_FLIGHT_COLUMNS,
+                                    source=json_file)
+        if checkpoint:
+            checkpoint.track(profile_writer, flight_writer)
+        with open(json_file, 'r', encoding='utf-8') as file:
+            for count, profile in enumerate(iter_json_array_items(file, "Forum Profiles"), 1):
+                if count <= skip:
                     continue
-                # Parse the data from the dataframe
-                passenger_title = df.iloc[2, 0] if df.shape[0] > 2 and df.shape[1] > 0 else ''
-                passenger_name = df.iloc[2, 1] if df.shape[1] > 1 else ''
-                loyalty_str = df.iloc[2, 5] if df.shape[1] > 5 and pd.notna(df.iloc[2, 5]) else ''
-                loyalty_program = ''
-                loyalty_number = ''
-                if loyalty_str.strip():
-                    parts = loyalty_str.strip().split(' ', 1)
-                    loyalty_program = parts[0] if len(parts) > 0 else ''
-                    loyalty_number = parts[1] if len(parts) > 1 else ''
-                fare_class = df.iloc[2, 7] if df.shape[1] > 7 and pd.notna(df.iloc[2, 7]) else ''
-                flight_number = df.iloc[4, 0] if df.shape[0] > 4 else ''
-                departure_city = df.iloc[4, 3] if df.shape[1] > 3 else ''
-                arrival_city = df.iloc[4, 7] if df.shape[1] > 7 and pd.notna(df.iloc[4, 7]) else ''
-                departure_airport = df.iloc[6, 3] if df.shape[1] > 3 else ''
-                arrival_airport = df.iloc[6, 7] if df.shape[1] > 7 else ''
-                flight_date = df.iloc[8, 0] if df.shape[0] > 8 else ''
-                flight_time = df.iloc[8, 2] if df.shape[1] > 2 else ''
-                pnr = df.iloc[12, 1] if df.shape[0] > 12 and df.shape[1] > 1 else ''
-                eticket = df.iloc[12, 4] if df.shape[1] > 4 else ''
-
-                cursor.execute('''
-                    INSERT INTO boarding_pass_xls (
-                        PassengerTitle, PassengerName, LoyaltyProgram, LoyaltyNumber, FareClass,
-                        FlightNumber, DepartureCity, ArrivalCity, DepartureAirport, ArrivalAirport,
-                        FlightDate, FlightTime, PNR, ETicket
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (passenger_title, passenger_name, loyalty_program, loyalty_number, fare_class,
-                      flight_number, departure_city, arrival_city, departure_airport, arrival_airport,
-                      flight_date, flight_time, pnr, eticket))
+                write_forum_profile(profile, profile_writer, flight_writer)
+                if checkpoint:
+                    checkpoint.reached(count)
+        profile_writer.close()
+        flight_writer.close()
+    except FileNotFoundError:
+        logger.error(f"JSON file not found: {json_file}")
+        raise
+    except json.JSONDecodeError:
+        logger.error(f"Invalid JSON format in file: {json_file}")
+        raise
+    except Exception as e:
+        logger.error(f"Error parsing JSON file: {e}")
+        raise
+
+BOARDING_PASS_XLS_COLUMNS = (
+    'PassengerTitle', 'PassengerName', 'LoyaltyProgram', 'LoyaltyNumber', 'FareClass',
+    'FlightNumber', 'DepartureCity', 'ArrivalCity', 'DepartureAirport', 'ArrivalAirport',
+    'FlightDate', 'FlightTime', 'PNR', 'ETicket',
+)
+
+def extract_boarding_pass_row(df: pd.DataFrame) -> tuple:
+    """Extract a boarding_pass_xls row from a boarding-pass sheet loaded without a header."""
+    passenger_title = df.iloc[2, 0] if df.shape[0] > 2 and df.shape[1] > 0 else ''
+    passenger_name = df.iloc[2, 1] if df.shape[1] > 1 else ''
+    loyalty_str = df.iloc[2, 5] if df.shape[1] > 5 and pd.notna(df.iloc[2, 5]) else ''
+    loyalty_program = ''
+    loyalty_number = ''
+    if loyalty_str.strip():
+        parts = loyalty_str.strip().split(' ', 1)
+        loyalty_program = parts[0] if len(parts) > 0 else ''
+        loyalty_number = parts[1] if len(parts) > 1 else ''
+    fare_class = df.iloc[2, 7] if df.shape[1] > 7 and pd.notna(df.iloc[2, 7]) else ''
+    flight_number = df.iloc[4, 0] if df.shape[0] > 4 else ''
+    departure_city = df.iloc[4, 3] if df.shape[1] > 3 else ''
+    arrival_city = df.iloc[4, 7] if df.shape[1] > 7 and pd.notna(df.iloc[4, 7]) else ''
+    departure_airport = df.iloc[6, 3] if df.shape[1] > 3 else ''
+    arrival_airport = df.iloc[6, 7] if df.shape[1] > 7 else ''
+    flight_date = df.iloc[8, 0] if df.shape[0] > 8 else ''
+    flight_time = df.iloc[8, 2] if df.shape[1] > 2 else ''
+    pnr = df.iloc[12, 1] if df.shape[0] > 12 and df.shape[1] > 1 else ''
+    eticket = df.iloc[12, 4] if df.shape[1] > 4 else ''
+
+    return (passenger_title, passenger_name, loyalty_program, loyalty_number, fare_class,
+            flight_number, departure_city, arrival_city, departure_airport, arrival_airport,
+            flight_date, flight_time, pnr, eticket)
+
+def extract_boarding_pass_rows(file_path: Path) -> list[tuple]:
+    """Extract one boarding_pass_xls row per non-empty sheet of a workbook."""
+    rows = []
+    xls = pd.ExcelFile(file_path)
+    for sheet_name in xls.sheet_names:
+        df = pd.read_excel(xls, sheet_name=sheet_name, header=None)
+        if df.empty:
+            continue
+        rows.append(extract_boarding_pass_row(df))
+    return rows
+
+def convert_xls_cell(cell) -> object:
+    """Convert an openpyxl cell the way pandas' openpyxl reader does."""
+    if cell.value is None:
+        return ''
+    if cell.data_type == TYPE_ERROR:
+        return np.nan
+    if cell.data_type == TYPE_NUMERIC:
+        value = int(cell.value)
+        return value if value == cell.value else float(cell.value)
+    return cell.value
+
+def extract_boarding_pass_rows_fast(file_path: Path) -> list[tuple]:
+    """Extract boarding_pass_xls rows by reading only the boarding-pass block of each sheet.
+
+    The workbook is opened in openpyxl's read-only streaming mode and each sheet is
+    read up to BOARDING_PASS_LAST_ROW. The cells are converted, trimmed and typed
+    exactly as pd.read_excel does (same cell conversion, same TextParser), so rows
+    and their RowHash match extract_boarding_pass_rows for the fixed sheet layout.
+    """
+    rows = []
+    wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            ws.reset_dimensions()
+            data = []
+            for row in ws.iter_rows(min_row=1, max_row=BOARDING_PASS_LAST_ROW):
+                values = [convert_xls_cell(cell) for cell in row]
+                while values and values[-1] == '':
+                    values.pop()
+                data.append(values)
+            while data and not data[-1]:
+                data.pop()
+            if not data:
+                continue
+            width = max(len(values) for values in data)
+            data = [values + [''] * (width - len(values)) for values in data]
+            df = TextParser(data, header=None, skip_blank_lines=False).read()
+            if df.empty:
+                continue
+            rows.append(extract_boarding_pass_row(df))
+    finally:
+        wb.close()
+    return rows
+
+def extract_workbook_rows(file_path: Path) -> list[tuple]:
+    """Extract a workbook's rows with the engine selected by XLS_FAST_CELLS."""
+    if XLS_FAST_CELLS:
+        return extract_boarding_pass_rows_fast(file_path)
+    return extract_boarding_pass_rows(file_path)
+
+def benchmark_xls_extraction(xls_dir: str, sample: Optional[int] = XLS_BENCHMARK_SAMPLE) -> None:
+    """Time the pandas and fixed-cell extractors on the same workbooks and log the speedup."""
+    files = sorted(Path(xls_dir).glob('*.xlsx'))[:sample]
+    if not files:
+        logger.warning(f"No workbooks to benchmark in {xls_dir}")
+        return
+    timings = {}
+    for name, extractor in (('pandas', extract_boarding_pass_rows), ('fixed-cell', extract_boarding_pass_rows_fast)):
+        start_time = time.time()
+        row_count = 0
+        failed = 0
+        for file_path in files:
+            try:
+                row_count += len(extractor(file_path))
+            except Exception:
+                failed += 1
+        timings[name] = time.time() - start_time
+        logger.info(f"{name} extractor: {len(files)} workbooks, {row_count} rows, {failed} failed "
+                    f"in {timings[name]:.2f} seconds ({len(files) / timings[name]:.1f} files/sec)")
+    if timings['fixed-cell'] > 0:
+        logger.info(f"Fixed-cell extractor speedup: {timings['pandas'] / timings['fixed-cell']:.1f}x")
+
+def parse_xls_files(cursor: sqlite3.Cursor, xls_dir: str, files: Optional[list[Path]] = None,
+                    skip: int = 0, checkpoint: Optional[Checkpointer] = None) -> None:
+    """Parse XLS files in the directory (or only the given files) and insert data into the boarding_pass_xls table.
+
+    The first skip workbooks are passed over; checkpoint receives the number of
+    workbooks handled so far and the last one's path.
+    """
+    try:
+        files = sorted(Path(xls_dir).glob('*.xlsx')) if files is None else files
+        writer = BatchWriter(cursor, 'boarding_pass_xls', BOARDING_PASS_XLS_COLUMNS, source=xls_dir)
+        if checkpoint:
+            checkpoint.track(writer)
+        for done, file_path in enumerate(files[skip:], skip + 1):
+            writer.extend(extract_workbook_rows(file_path))
+            if checkpoint:
+                checkpoint.reached(done, str(file_path))
+        writer.close()
     except Exception as e:
         logger.error(f"Error parsing XLS files: {e}")
         raise
 
+def extract_workbook_safely(file_path: Path) -> tuple[Path, list[tuple], Optional[str]]:
+    """Process-pool task: extract a workbook's rows, returning the error text instead of raising."""
+    try:
+        return file_path, extract_workbook_rows(file_path), None
+    except Exception as e:
+        return file_path, [], f"{type(e).__name__}: {e}"
+
+def parse_xls_files_parallel(cursor: sqlite3.Cursor, xls_dir: str, workers: Optional[int] = XLS_WORKERS,
+                             files: Optional[list[Path]] = None, skip: int = 0,
+                             checkpoint: Optional[Checkpointer] = None) -> None:
+    """Extract workbooks across a process pool and insert into boarding_pass_xls from this process.
+
+    Workers only read workbooks; every row comes back here, in file order, and is written
+    through a single BatchWriter. A workbook that fails is logged and skipped without
+    stopping the run. skip and checkpoint work as in parse_xls_files.
+    """
+    try:
+        files = sorted(Path(xls_dir).glob('*.xlsx')) if files is None else files
+        files = files[skip:]
+        total = len(files)
+        logger.info(f"Extracting {total} workbooks with {workers or os.cpu_count()} worker processes")
+        failed = 0
+        start_time = time.time()
+        with BatchWriter(cursor, 'boarding_pass_xls', BOARDING_PASS_XLS_COLUMNS, source=xls_dir) as writer, \
+                ProcessPoolExecutor(max_workers=workers) as executor:
+            if checkpoint:
+                checkpoint.track(writer)
+            results = executor.map(extract_workbook_safely, files, chunksize=XLS_CHUNKSIZE)
+            for done, (file_path, rows, error) in enumerate(results, 1):
+                if error:
+                    failed += 1
+                    logger.error(f"Skipping workbook {file_path}: {error}")
+                writer.extend(rows)
+                if checkpoint:
+                    checkpoint.reached(skip + done, str(file_path))
+                if done % XLS_PROGRESS_EVERY == 0 or done == total:
+                    elapsed = time.time() - start_time
+                    rate = done / elapsed if elapsed > 0 else 0.0
+                    logger.info(f"Processed {done}/{total} workbooks ({rate:.1f} files/sec, {failed} failed)")
+        if failed:
+            logger.warning(f"{failed} of {total} workbooks in {xls_dir} could not be parsed")
+    except Exception as e:
+        logger.error(f"Error parsing XLS files: {e}")
+        raise
+
+SOURCE_FILES = {
+    'csv': CSV_FILE,
+    'tab': TAB_FILE,
+    'xml': XML_FILE,
+    'yaml': YAML_FILE,
+    'pdf': PDF_FILE,
+    'json': JSON_FILE,
+    'xls': XLS_DIR,
+}
+
+SOURCE_TABLES = {
+    'csv': ('boarding_data',),
+    'tab': ('sirena_data',),
+    'xml': ('pointz_aggregator_data',),
+    'yaml': ('skyteam_data',),
+    'pdf': ('skyteam_timetable',),
+    'json': ('frequent_flyer_profiles', 'frequent_flyer_flights'),
+    'xls': ('boarding_pass_xls',),
+}
+
+TABLE_CREATORS = {
+    'boarding_data': create_boarding_data_table,
+    'sirena_data': create_sirena_data_table,
+    'pointz_aggregator_data': create_pointz_aggregator_table,
+    'skyteam_data': create_skyteam_data_table,
+    'skyteam_timetable': create_skyteam_timetable_table,
+    'frequent_flyer_profiles': create_frequent_flyer_profiles_table,
+    'frequent_flyer_flights': create_frequent_flyer_flights_table,
+    'boarding_pass_xls': create_boarding_pass_xls_table,
+}
+
+# (index, table, indexed columns or expressions). Expression indexes are only used by
+# queries that repeat the expression, e.g. WHERE UPPER(TRIM(PassengerLastName)) = 'IVANOV'.
+SECONDARY_INDEXES = (
+    ('idx_boarding_data_name', 'boarding_data',
+     'UPPER(TRIM(PassengerLastName)), UPPER(TRIM(PassengerFirstName))'),
+    ('idx_boarding_data_birth_date', 'boarding_data', 'PassengerBirthDate'),
+    ('idx_boarding_data_birth_day', 'boarding_data', 'PassengerBirthDay'),
+    ('idx_boarding_data_document', 'boarding_data', "REPLACE(PassengerDocument, ' ', '')"),
+    ('idx_boarding_data_ticket', 'boarding_data', 'TicketNumber'),
+    ('idx_boarding_data_flight', 'boarding_data', 'FlightNumber, FlightDate'),
+    ('idx_boarding_data_flight_day', 'boarding_data', 'FlightDay'),
+    ('idx_sirena_data_name', 'sirena_data', 'UPPER(TRIM(PaxName))'),
+    ('idx_sirena_data_birth_date', 'sirena_data', 'PaxBirthDate'),
+    ('idx_sirena_data_birth_day', 'sirena_data', 'PaxBirthDay'),
+    ('idx_sirena_data_document', 'sirena_data', "REPLACE(TravelDoc, ' ', '')"),
+    ('idx_sirena_data_ticket', 'sirena_data', 'e_Ticket'),
+    ('idx_sirena_data_flight', 'sirena_data', 'FlightCode, DepartDate'),
+    ('idx_sirena_data_depart_day', 'sirena_data', 'DepartDay'),
+    ('idx_pointz_aggregator_data_name', 'pointz_aggregator_data',
+     'UPPER(TRIM(LastName)), UPPER(TRIM(FirstName))'),
+    ('idx_pointz_aggregator_data_card', 'pointz_aggregator_data', 'CardNumber'),
+    ('idx_pointz_aggregator_data_flight', 'pointz_aggregator_data', 'FlightCode, FlightDate'),
+    ('idx_pointz_aggregator_data_flight_day', 'pointz_aggregator_data', 'FlightDay'),
+    ('idx_skyteam_data_ff_number', 'skyteam_data', 'FFNumber'),
+    ('idx_skyteam_data_flight', 'skyteam_data', 'FlightNumber, FlightDate'),
+    ('idx_skyteam_data_flight_day', 'skyteam_data', 'FlightDay'),
+    ('idx_skyteam_timetable_flight', 'skyteam_timetable', 'flight'),
+    ('idx_frequent_flyer_profiles_name', 'frequent_flyer_profiles',
+     'UPPER(TRIM(LastName)), UPPER(TRIM(FirstName))'),
+    ('idx_frequent_flyer_flights_nick', 'frequent_flyer_flights', 'NickName'),
+    ('idx_frequent_flyer_flights_flight', 'frequent_flyer_flights', 'Flight, FlightDate'),
+    ('idx_frequent_flyer_flights_flight_day', 'frequent_flyer_flights', 'FlightDay'),
+    ('idx_boarding_pass_xls_name', 'boarding_pass_xls', 'UPPER(TRIM(PassengerName))'),
+    ('idx_boarding_pass_xls_loyalty', 'boarding_pass_xls', 'LoyaltyNumber'),
+    ('idx_boarding_pass_xls_ticket', 'boarding_pass_xls', 'ETicket'),
+    ('idx_boarding_pass_xls_flight', 'boarding_pass_xls', 'FlightNumber, FlightDate'),
+    ('idx_boarding_pass_xls_flight_day', 'boarding_pass_xls', 'FlightDay'),
+)
+
+class SourcePlan(NamedTuple):
+    """How a source is loaded in this run.
+
+    action is 'skip', 'load' (parse everything, keep existing rows), 'reload'
+    (clear the source tables first) or 'append' (parse only from start_offset for
+    CSV/TAB, or only the listed workbooks for XLS). files maps every file the plan
+    covers to the (size, mtime, sha256) recorded in the manifest afterwards.
+    checkpoint is set when the same load was interrupted and resumes from there.
+    """
+    action: str
+    start_offset: int = 0
+    xls_files: Optional[list] = None
+    files: Optional[dict] = None
+    checkpoint: Optional[Checkpoint] = None
+
+def file_stat(path: Path) -> tuple[int, float]:
+    """Return (size, mtime) of a file."""
+    stat = path.stat()
+    return stat.st_size, stat.st_mtime
+
+def plan_source_load(cursor: sqlite3.Cursor, source: str, clear: bool) -> SourcePlan:
+    """Compare a source with its ingest_manifest entries and decide how to load it."""
+    if not INCREMENTAL_INGEST:
+        return SourcePlan('reload' if clear else 'load')
+
+    if source == 'xls':
+        return plan_xls_load(cursor, clear)
+
+    path = Path(SOURCE_FILES[source])
+    size, mtime = file_stat(path)
+    entry = cursor.execute("SELECT Size, MTime, SHA256 FROM ingest_manifest WHERE Path = ?",
+                           (str(path),)).fetchone()
+    if entry is None or clear:
+        return SourcePlan('reload', files={str(path): (size, mtime, file_sha256(str(path)))})
+
+    old_size, old_mtime, old_digest = entry
+    if size == old_size and mtime == old_mtime:
+        return SourcePlan('skip')
+
+    prefix_digest, digest, last_byte = file_prefix_sha256(str(path), min(old_size, size))
+    files = {str(path): (size, mtime, digest)}
+    if digest == old_digest:
+        return SourcePlan('skip', files=files)
+    if (source in APPENDABLE_SOURCES and size > old_size
+            and prefix_digest == old_digest and last_byte == b'\n'):
+        return SourcePlan('append', start_offset=old_size, files=files)
+    return SourcePlan('reload', files=files)
+
+def plan_xls_load(cursor: sqlite3.Cursor, clear: bool) -> SourcePlan:
+    """Plan the XLS directory: parse only new workbooks unless a known one changed or vanished."""
+    workbooks = {str(path): path for path in sorted(Path(XLS_DIR).glob('*.xlsx'))}
+    known = {path: (size, mtime) for path, size, mtime in cursor.execute(
+        "SELECT Path, Size, MTime FROM ingest_manifest WHERE Source = 'xls' AND Path != ?", (XLS_DIR,))}
+    stats = {path: file_stat(workbook) for path, workbook in workbooks.items()}
+
+    changed = [path for path, stat in known.items() if stats.get(path) != stat]
+    if clear or changed or not known:
+        if changed:
+            logger.info(f"{len(changed)} known workbooks changed or were removed, reloading {XLS_DIR}")
+        targets = list(workbooks)
+        action = 'reload'
+    else:
+        targets = [path for path in workbooks if path not in known]
+        action = 'append' if targets else 'skip'
+    files = {path: (*stats[path], file_sha256(path)) for path in targets}
+    return SourcePlan(action, xls_files=[workbooks[path] for path in targets], files=files)
+
+def plan_digest(plan: SourcePlan) -> str:
+    """Return a digest identifying the files and contents a plan loads."""
+    files = sorted((path, digest) for path, (_, _, digest) in plan.files.items())
+    return hashlib.sha256(json.dumps(files).encode('utf-8')).hexdigest()
+
+def resume_from_checkpoint(cursor: sqlite3.Cursor, source: str, plan: SourcePlan) -> SourcePlan:
+    """Attach the checkpoint of an interrupted load to a plan that repeats exactly that load.
+
+    A checkpoint left by a load of different files or contents, or one that cannot be
+    resumed because RESUMABLE_INGEST is off or the plan has no file digests, is dropped,
+    and the source is reloaded, since its tables hold part of that other load.
+    """
+    row = cursor.execute("SELECT Action, SHA256, Position, Marker, RowsLoaded FROM ingest_checkpoints WHERE Source = ?",
+                         (source,)).fetchone()
+    if row is None:
+        return plan
+    action, digest, position, marker, rows_loaded = row
+    matches = (RESUMABLE_INGEST and bool(plan.files)
+               and action == plan.action and digest == plan_digest(plan))
+    if matches and source == 'xls':
+        matches = position <= len(plan.xls_files) and str(plan.xls_files[position - 1]) == marker
+    if not matches:
+        logger.warning(f"Dropping stale checkpoint for {source.upper()} source, reloading it")
+        cursor.execute("DELETE FROM ingest_checkpoints WHERE Source = ?", (source,))
+        return plan_source_load(cursor, source, True)
+    logger.info(f"Resuming {source.upper()} source at {position} ({rows_loaded} rows already loaded)")
+    return plan._replace(checkpoint=Checkpoint(position, marker, rows_loaded))
+
+def drop_unplanned_checkpoints(cursor: sqlite3.Cursor, sources: Sequence[str]) -> None:
+    """Drop the checkpoints of sources that are not being loaded in this run.
+
+    A disabled source's tables still hold its interrupted load, so its manifest entries
+    are dropped too and the source is reloaded from scratch once it is enabled again.
+    """
+    stale = [source for source, in cursor.execute("SELECT Source FROM ingest_checkpoints")
+             if source not in sources]
+    for source in stale:
+        logger.warning(f"Dropping checkpoint for {source.upper()} source, which is not loaded in this run")
+        cursor.execute("DELETE FROM ingest_checkpoints WHERE Source = ?", (source,))
+        cursor.execute("DELETE FROM ingest_manifest WHERE Source = ?", (source,))
+
+def record_source_load(cursor: sqlite3.Cursor, source: str, plan: SourcePlan, rows_loaded: int) -> None:
+    """Store the files a plan loaded, and the rows it added, in ingest_manifest.
+
+    The source's checkpoint is cleared with it, since its load is now complete.
+    """
+    cursor.execute("DELETE FROM ingest_checkpoints WHERE Source = ?", (source,))
+    if not INCREMENTAL_INGEST or not plan.files:
+        return
+    loaded_at = time.strftime('%Y-%m-%d %H:%M:%S')
+    if source == 'xls':
+        if plan.action == 'reload':
+            cursor.execute("DELETE FROM ingest_manifest WHERE Source = 'xls'")
+        cursor.executemany('''
+            INSERT OR REPLACE INTO ingest_manifest (Path, Source, Size, MTime, SHA256, RowsLoaded, LoadedAt)
+            VALUES (?, 'xls', ?, ?, ?, NULL, ?)
+        ''', [(path, size, mtime, digest, loaded_at) for path, (size, mtime, digest) in plan.files.items()])
+        # Row counts are not attributable to single workbooks, so the directory keeps the total
+        paths = [XLS_DIR]
+    else:
+        paths = list(plan.files)
+    for path in paths:
+        size, mtime, digest = plan.files.get(path, (None, None, None))
+        previous = 0
+        if plan.action in ('append', 'skip'):
+            row = cursor.execute("SELECT RowsLoaded FROM ingest_manifest WHERE Path = ?", (path,)).fetchone()
+            previous = (row[0] or 0) if row else 0
+        cursor.execute('''
+            INSERT OR REPLACE INTO ingest_manifest (Path, Source, Size, MTime, SHA256, RowsLoaded, LoadedAt)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (path, source, size, mtime, digest, previous + rows_loaded, loaded_at))
+
+def enabled_sources() -> list[tuple[str, bool]]:
+    """Return (source, clear) for every source whose PROCESS_* flag is set."""
+    flags = {
+        'csv': (PROCESS_CSV, CLEAR_CSV),
+        'tab': (PROCESS_TAB, CLEAR_TAB),
+        'xml': (PROCESS_XML, CLEAR_XML),
+        'yaml': (PROCESS_YAML, CLEAR_YAML),
+        'pdf': (PROCESS_PDF, CLEAR_PDF),
+        'json': (PROCESS_JSON, CLEAR_JSON),
+        'xls': (PROCESS_XLS, CLEAR_XLS),
+    }
+    return [(source, clear) for source, (process, clear) in flags.items() if process]
+
+def create_source_tables(cursor: sqlite3.Cursor, source: str) -> None:
+    """Create the tables a source is loaded into."""
+    for table in SOURCE_TABLES[source]:
+        TABLE_CREATORS[table](cursor)
+        if table in ROW_HASH_TABLES:
+            ensure_row_hash(cursor, table)
+        ensure_date_columns(cursor, table)
+
+def clear_source_tables(cursor: sqlite3.Cursor, source: str) -> None:
+    """Delete all rows from the tables a source is loaded into.
+
+    Rowids start over after the delete, so DBUnifier's unification_marks for these
+    tables are dropped too and the next incremental unification reads them in full.
+    """
+    for table in SOURCE_TABLES[source]:
+        logger.info(f"Clearing {table} table")
+        cursor.execute(f'DELETE FROM {table}')
+    cursor.execute("DELETE FROM ingest_rejects WHERE Source = ?", (source,))
+    if cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'unification_marks'").fetchone():
+        cursor.executemany("DELETE FROM unification_marks WHERE SourceTable = ?",
+                           [(table,) for table in SOURCE_TABLES[source]])
+
+def is_bulk_load(cursor: sqlite3.Cursor, source: str, plan: SourcePlan) -> bool:
+    """Whether a load is large enough to drop its tables' secondary indexes before it.
+
+    Every load but an append is; an append is when it adds at least INDEX_DROP_APPEND_SHARE
+    of the bytes (workbooks for XLS) already loaded.
+    """
+    if plan.action != 'append':
+        return True
+    if source == 'xls':
+        loaded = cursor.execute("SELECT COUNT(*) FROM ingest_manifest WHERE Source = 'xls' AND Path != ?",
+                                (XLS_DIR,)).fetchone()[0]
+        added = len(plan.xls_files)
+    else:
+        loaded = plan.start_offset
+        added = sum(size for size, _, _ in plan.files.values()) - loaded
+    return added >= INDEX_DROP_APPEND_SHARE * loaded
+
+def drop_secondary_indexes(cursor: sqlite3.Cursor, tables: Iterable[str]) -> None:
+    """Drop the SECONDARY_INDEXES of the given tables."""
+    tables = set(tables)
+    for name, table, _ in SECONDARY_INDEXES:
+        if table in tables:
+            cursor.execute(f"DROP INDEX IF EXISTS {name}")
+
+def index_size(cursor: sqlite3.Cursor, name: str) -> Optional[int]:
+    """Return the bytes an index occupies, or None if SQLite was built without dbstat."""
+    try:
+        return cursor.execute("SELECT SUM(pgsize) FROM dbstat WHERE name = ?", (name,)).fetchone()[0] or 0
+    except sqlite3.OperationalError:
+        return None
+
+def build_secondary_indexes(cursor: sqlite3.Cursor, rebuild: bool = REBUILD_INDEXES) -> None:
+    """Create the missing SECONDARY_INDEXES (all of them if rebuild) and report build time and size."""
+    existing = {row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    start_time = time.time()
+    built = 0
+    total_size = 0
+    for name, table, columns in SECONDARY_INDEXES:
+        if name in existing and not rebuild:
+            continue
+        index_start = time.time()
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+        cursor.execute(f"CREATE INDEX {name} ON {table} ({columns})")
+        size = index_size(cursor, name)
+        built += 1
+        total_size += size or 0
+        size_text = f"{size / 1024 / 1024:.1f} MiB" if size is not None else "size unknown"
+        logger.info(f"Built index {name} on {table} in {time.time() - index_start:.2f} seconds ({size_text})")
+    if built:
+        cursor.execute("ANALYZE")
+        logger.info(f"Built {built} of {len(SECONDARY_INDEXES)} secondary indexes in "
+                    f"{time.time() - start_time:.2f} seconds ({total_size / 1024 / 1024:.1f} MiB)")
+    else:
+        logger.info("All secondary indexes already exist")
+
+def parse_source(cursor: sqlite3.Cursor, source: str, plan: SourcePlan = SourcePlan('load'),
+                 checkpoint: Optional[Checkpointer] = None) -> None:
+    """Parse one source into its tables with the parser variant selected by the flags above.
+
+    A plan with a checkpoint continues from its position; checkpoint, if given,
+    records the progress of this load.
+    """
+    logger.info(f"Processing {source.upper()} source: {SOURCE_FILES[source]} ({plan.action})")
+    position = plan.checkpoint.position if plan.checkpoint else 0
+    if source == 'csv':
+        parse_csv_file(cursor, CSV_FILE, position or plan.start_offset, checkpoint)
+    elif source == 'tab':
+        if TAB_CHUNKED:
+            parse_tab_file_chunked(cursor, TAB_FILE, start_offset=position or plan.start_offset,
+                                   checkpoint=checkpoint)
+        else:
+            parse_tab_file(cursor, TAB_FILE, position or plan.start_offset, checkpoint)
+    elif source == 'xml':
+        if XML_STREAMING:
+            parse_xml_file_streaming(cursor, XML_FILE, position, checkpoint)
+        else:
+            parse_xml_file(cursor, XML_FILE, position, checkpoint)
+    elif source == 'yaml':
+        if YAML_STREAMING:
+            parse_yaml_file_streaming(cursor, YAML_FILE)
+        else:
+            parse_yaml_file(cursor, YAML_FILE)
+    elif source == 'pdf':
+        if PDF_DIRECT:
+            parse_skyteam_timetable_pdf(cursor, PDF_FILE, PDF_START_PAGE)
+        else:
+            process_pdf_to_excel(PDF_FILE, PDF_EXCEL_FILE, PDF_START_PAGE)
+            #parse_skyteam_timetable(cursor, PDF_EXCEL_FILE)
+    elif source == 'json':
+        if JSON_STREAMING:
+            parse_json_file_streaming(cursor, JSON_FILE, position, checkpoint)
+        else:
+            parse_json_file(cursor, JSON_FILE, position, checkpoint)
+    elif source == 'xls':
+        if XLS_BENCHMARK:
+            benchmark_xls_extraction(XLS_DIR)
+        if XLS_PARALLEL:
+            parse_xls_files_parallel(cursor, XLS_DIR, files=plan.xls_files, skip=position, checkpoint=checkpoint)
+        else:
+            parse_xls_files(cursor, XLS_DIR, files=plan.xls_files, skip=position, checkpoint=checkpoint)
+    else:
+        raise ValueError(f"Unknown source: {source}")
+
+def load_source(conn: sqlite3.Connection, cursor: sqlite3.Cursor, source: str, plan: SourcePlan,
+                resumable: bool = RESUMABLE_INGEST) -> int:
+    """Parse one source, through a writer thread if PIPELINE_INGEST is set, and return the rows it added.
+
+    Rows committed by an interrupted earlier run of the same load are included.
+    """
+    rejects_before = count_rejects(cursor, source)
+    changes_before = conn.total_changes
+    writer = SQLiteWriterThread(conn, f'write {source}') if PIPELINE_INGEST else None
+    source_cursor = PipelineCursor(writer) if writer else cursor
+    checkpoint = None
+    if resumable and plan.files:
+        checkpoint = Checkpointer(source_cursor, source, plan.action, plan_digest(plan), plan.checkpoint)
+    try:
+        parse_source(source_cursor, source, plan, checkpoint)
+    finally:
+        if writer:
+            writer.close()
+    rows_loaded = conn.total_changes - changes_before - (count_rejects(cursor, source) - rejects_before)
+    if checkpoint:
+        rows_loaded -= checkpoint.saves
+    if plan.checkpoint:
+        rows_loaded += plan.checkpoint.rows_loaded
+    return rows_loaded
+
+def staging_file_path(source: str) -> Path:
+    """Return the staging database file for a source."""
+    return Path(STAGING_DIR) / f'{source}.db'
+
+def ingest_source_to_staging(source: str, plan: SourcePlan = SourcePlan('load')) -> tuple[str, float]:
+    """Process-pool task: parse one source into a fresh staging database and return its timing."""
+    start_time = time.time()
+    staging_file = staging_file_path(source)
+    if staging_file.exists():
+        staging_file.unlink()
+    conn, cursor = create_database_connection(str(staging_file))
+    try:
+        if BULK_LOAD:
+            set_pragmas(cursor, BULK_LOAD_PRAGMAS)
+        create_source_tables(cursor, source)
+        create_ingest_rejects_table(cursor)
+        load_source(conn, cursor, source, plan, resumable=False)
+        conn.commit()
+    finally:
+        conn.close()
+    return source, time.time() - start_time
+
+def merge_staging_database(conn: sqlite3.Connection, cursor: sqlite3.Cursor, source: str) -> int:
+    """Copy a source's staged tables into the main database with INSERT ... SELECT.
+
+    Returns the number of rows merged, not counting rejected records.
+    """
+    conn.commit()  # ATTACH is not allowed inside a transaction
+    cursor.execute("ATTACH DATABASE ? AS staging", (str(staging_file_path(source)),))
+    merged = 0
+    try:
+        for table in SOURCE_TABLES[source]:
+            columns = ', '.join(row[1] for row in cursor.execute(f"PRAGMA main.table_info({table})"))
+            if table == 'frequent_flyer_profiles':
+                # Profiles already stored unchanged are left in place, as BatchWriter does
+                cursor.execute(f"INSERT OR REPLACE INTO main.{table} ({columns}) SELECT {columns} FROM staging.{table} "
+                               f"EXCEPT SELECT {columns} FROM main.{table}")
+            else:
+                cursor.execute(f"INSERT OR IGNORE INTO main.{table} ({columns}) SELECT {columns} FROM staging.{table}")
+            logger.info(f"Merged {cursor.rowcount} rows into {table} from staging")
+            merged += cursor.rowcount
+        cursor.execute('''
+            INSERT INTO main.ingest_rejects (Source, File, LineNumber, Reason, Payload)
+            SELECT Source, File, LineNumber, Reason, Payload FROM staging.ingest_rejects
+        ''')
+        conn.commit()
+    finally:
+        cursor.execute("DETACH DATABASE staging")
+    return merged
+
+def ingest_concurrently(conn: sqlite3.Connection, cursor: sqlite3.Cursor,
+                        plans: list[tuple[str, SourcePlan]]) -> None:
+    """Parse every source in its own process into a staging database, then merge them into conn.
+
+    A source that fails is logged and left out of the merge; the others are still loaded.
+    """
+    if not plans:
+        return
+    Path(STAGING_DIR).mkdir(parents=True, exist_ok=True)
+    start_time = time.time()
+    timings = {}
+    with ProcessPoolExecutor(max_workers=len(plans)) as executor:
+        futures = {executor.submit(ingest_source_to_staging, source, plan): source for source, plan in plans}
+        for future in as_completed(futures):
+            source = futures[future]
+            try:
+                _, timings[source] = future.result()
+                logger.info(f"Staged {source.upper()} source in {timings[source]:.2f} seconds")
+            except Exception as e:
+                logger.error(f"Staging {source.upper()} source failed: {e}")
+    parse_elapsed = time.time() - start_time
+
+    merge_start = time.time()
+    for source, plan in plans:
+        if source not in timings:
+            continue
+        if plan.action == 'reload' and plan.checkpoint is None:
+            clear_source_tables(cursor, source)
+        rows_loaded = merge_staging_database(conn, cursor, source)
+        if plan.checkpoint:
+            rows_loaded += plan.checkpoint.rows_loaded
+        record_source_load(cursor, source, plan, rows_loaded)
+        conn.commit()
+        staging_file_path(source).unlink()
+    merge_elapsed = time.time() - merge_start
+
+    total_elapsed = time.time() - start_time
+    sequential = sum(timings.values())
+    speedup = sequential / total_elapsed if total_elapsed > 0 else 0.0
+    logger.info(f"Concurrent ingest: parsing {parse_elapsed:.2f} s, merging {merge_elapsed:.2f} s, "
+                f"total {total_elapsed:.2f} s vs {sequential:.2f} s of per-source work ({speedup:.1f}x speedup)")
+
 def main():
     """Main function to orchestrate database creation and file parsing."""
     try:
@@ -821,66 +2874,48 @@ def main():
             return
 
         conn, cursor = create_database_connection(DB_FILE)
+        pragmas = dict(BULK_LOAD_PRAGMAS) if BULK_LOAD else {}
+        if RESUMABLE_INGEST:
+            pragmas.update(CHECKPOINT_PRAGMAS)
+        previous_pragmas = set_pragmas(cursor, pragmas)
 
         # Create tables
-        create_boarding_data_table(cursor) #csv
-        create_sirena_data_table(cursor) #tab
-        create_pointz_aggregator_table(cursor) #xml
-        create_skyteam_data_table(cursor) #yaml
-        create_skyteam_timetable_table(cursor) #pdf
-        create_frequent_flyer_profiles_table(cursor) #json
-        create_frequent_flyer_flights_table(cursor) #json
-        create_boarding_pass_xls_table(cursor) #folder with xls
-
-        # Process files based on flags
-        if PROCESS_CSV:
-            if CLEAR_CSV:
-                logger.info("Clearing boarding_data table")
-                cursor.execute('DELETE FROM boarding_data')
-            logger.info(f"Processing CSV file: {CSV_FILE}")
-            parse_csv_file(cursor, CSV_FILE)
-        if PROCESS_TAB:
-            if CLEAR_TAB:
-                logger.info("Clearing sirena_data table")
-                cursor.execute('DELETE FROM sirena_data')
-            logger.info(f"Processing TAB file: {TAB_FILE}")
-            parse_tab_file(cursor, TAB_FILE)
-        if PROCESS_XML:
-            if CLEAR_XML:
-                logger.info("Clearing pointz_aggregator_data table")
-                cursor.execute('DELETE FROM pointz_aggregator_data')
-            logger.info(f"Processing XML file: {XML_FILE}")
-            parse_xml_file(cursor, XML_FILE)
-        if PROCESS_YAML:
-            if CLEAR_YAML:
-                logger.info("Clearing skyteam_data table")
-                cursor.execute('DELETE FROM skyteam_data')
-            logger.info(f"Processing YAML file: {YAML_FILE}")
-            parse_yaml_file(cursor, YAML_FILE)
-        if PROCESS_PDF:
-            if CLEAR_PDF:
-                logger.info("Clearing skyteam_timetable table")
-                cursor.execute('DELETE FROM skyteam_timetable')
-            logger.info(f"Processing PDF file: {PDF_FILE}")
-            process_pdf_to_excel(PDF_FILE, "data/Skyteam_Timetable.xlsx", 3)
-            #parse_skyteam_timetable(cursor, "data/Skyteam_Timetable.xlsx")
-        if PROCESS_JSON:
-            if CLEAR_JSON:
-                logger.info("Clearing frequent_flyer_profiles table")
-                cursor.execute('DELETE FROM frequent_flyer_profiles')
-                logger.info("Clearing frequent_flyer_flights table")
-                cursor.execute('DELETE FROM frequent_flyer_flights')
-            logger.info(f"Processing JSON file: {JSON_FILE}")
-            parse_json_file(cursor, JSON_FILE)
-        if PROCESS_XLS:
-            if CLEAR_XLS:
-                logger.info("Clearing boarding_pass_xls table")
-                cursor.execute('DELETE FROM boarding_pass_xls')
-            logger.info(f"Processing XLS files in directory: {XLS_DIR}")
-            parse_xls_files(cursor, XLS_DIR)
+        for source in SOURCE_TABLES:
+            create_source_tables(cursor, source)
+        create_ingest_manifest_table(cursor)
+        create_ingest_rejects_table(cursor)
+        create_ingest_checkpoints_table(cursor)
+
+        # Process files based on flags, skipping sources the manifest shows as unchanged
+        plans = []
+        drop_unplanned_checkpoints(cursor, [source for source, _ in enabled_sources()])
+        for source, clear in enabled_sources():
+            plan = resume_from_checkpoint(cursor, source, plan_source_load(cursor, source, clear))
+            if plan.action == 'skip':
+                logger.info(f"Skipping unchanged {source.upper()} source: {SOURCE_FILES[source]}")
+                record_source_load(cursor, source, plan, 0)
+                continue
+            plans.append((source, plan))
+            if BUILD_INDEXES and is_bulk_load(cursor, source, plan):
+                drop_secondary_indexes(cursor, SOURCE_TABLES[source])
+
+        if CONCURRENT_INGEST:
+            ingest_concurrently(conn, cursor, plans)
+        else:
+            for source, plan in plans:
+                if plan.action == 'reload' and plan.checkpoint is None:
+                    clear_source_tables(cursor, source)
+                rows_loaded = load_source(conn, cursor, source, plan)
+                record_source_load(cursor, source, plan, rows_loaded)
+                # Every finished source is committed, so a later failure keeps it
+                conn.commit()
+
+        if BUILD_INDEXES:
+            build_secondary_indexes(cursor)
 
         # Commit changes and close connection
         conn.commit()
+        set_pragmas(cursor, previous_pragmas)
         logger.info("Data successfully inserted into the database.")
     except Exception as e:
         logger.error(f"An error occurred: {e}")
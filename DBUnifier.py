@@ -1,173 +1,574 @@
 import sqlite3
-import re
-from typing import Tuple, Set, Dict, Optional
+from typing import Tuple, Set, Dict, Iterable, Iterator, List, Optional, Sequence, Callable
 from collections import defaultdict
+from difflib import SequenceMatcher
+from functools import lru_cache
+from itertools import groupby
+import numpy as np
 
-def find(parent, x):
-    root = x
-    while parent[root] != root:
-        root = parent[root]
-    # Path compression
-    while x != root:
-        next_node = parent[x]
-        parent[x] = root
-        x = next_node
-    return root
-
-def union(parent, x, y):
-    px = find(parent, x)
-    py = find(parent, y)
-    if px != py:
-        parent[px] = py
-
-def merge_duplicates(db_path: str) -> None:
+# Consolidate persons in temporary SQLite tables instead of an in-memory dict, so memory
+# stays bounded however many passengers there are. Values are written in batches of
+# SPILL_BATCH_SIZE.
+MERGE_SPILL_TO_DISK = True
+SPILL_BATCH_SIZE = 50000
+
+# Names and documents repeat across every source table, so their normalized forms are
+# memoized (bounded by NORMALIZE_CACHE_SIZE entries each) and source columns are
+# normalized NORMALIZE_BATCH_SIZE rows at a time, once per distinct value.
+NORMALIZE_CACHE_SIZE = 1 << 18
+NORMALIZE_BATCH_SIZE = 10000
+
+# Unify only the source rows added since the previous run (tracked per source table
+# in unification_marks) and resolve them against the existing persons.
+UNIFY_INCREMENTAL = False
+
+class UnionFind:
+    """Union-find over the dense ids 0..n-1, backed by NumPy arrays.
+
+    union_edges merges whole edge arrays at once: each round every edge's roots are
+    found with vectorized pointer jumping and the smaller root of each edge is hooked
+    under the larger (union by size), until no edge joins two components.
+    """
+
+    def __init__(self, n: int):
+        self.parent = np.arange(n, dtype=np.int64)
+        self.size = np.ones(n, dtype=np.int64)
+
+    def roots(self, ids: Optional[np.ndarray] = None) -> np.ndarray:
+        """Return the root of every id (of all ids by default), compressing every path fully."""
+        parent = self.parent
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent[:] = grandparent
+        return parent.copy() if ids is None else parent[ids]
+
+    def union_edges(self, a: np.ndarray, b: np.ndarray) -> None:
+        """Union every pair (a[i], b[i])."""
+        a = np.asarray(a, dtype=np.int64)
+        b = np.asarray(b, dtype=np.int64)
+        while a.size:
+            roots = self.roots()
+            ra = roots[a]
+            rb = roots[b]
+            joining = ra != rb
+            ra = ra[joining]
+            rb = rb[joining]
+            if not ra.size:
+                break
+            # Hook the smaller component under the larger, ties broken by id, so
+            # roots are ordered and a round can never link them into a cycle
+            size_a = self.size[ra]
+            size_b = self.size[rb]
+            a_smaller = (size_a < size_b) | ((size_a == size_b) & (ra < rb))
+            child = np.where(a_smaller, ra, rb)
+            target = np.where(a_smaller, rb, ra)
+            # A root hooked by several edges keeps one of them; the rest retry next round
+            self.parent[child] = target
+            hooked = np.unique(child)
+            old_size = self.size[hooked]
+            np.add.at(self.size, self.roots(hooked), old_size)
+            a, b = ra, rb
+
+    def components(self) -> List[np.ndarray]:
+        """Return the ids of every component with more than one member, each sorted."""
+        roots = self.roots()
+        order = np.argsort(roots, kind='stable')
+        sorted_roots = roots[order]
+        starts = np.flatnonzero(np.r_[True, sorted_roots[1:] != sorted_roots[:-1]])
+        counts = np.diff(np.r_[starts, sorted_roots.size])
+        shared = counts > 1
+        return [order[start:start + count] for start, count in zip(starts[shared], counts[shared])]
+
+# Fuzzy mode of merge_duplicates: persons with the same BirthDate whose names are
+# transliteration variants or typos of each other are merged too. Candidates share
+# enough FUZZY_QGRAM-grams of their phonetic last name; grams held by more than
+# FUZZY_MAX_BLOCK_SIZE persons are skipped so the work stays near-linear.
+MERGE_FUZZY = False
+FUZZY_QGRAM = 2
+FUZZY_MIN_OVERLAP = 0.6
+FUZZY_MAX_BLOCK_SIZE = 1000
+FUZZY_NAME_THRESHOLD = 0.85
+
+# Spellings that different transliteration schemes produce for the same sound
+PHONETIC_REPLACEMENTS = (
+    ('SHCH', 'SH'), ('SCH', 'SH'), ('KH', 'H'), ('TS', 'C'), ('TZ', 'C'), ('CK', 'K'),
+    ('PH', 'F'), ('X', 'KS'), ('W', 'V'), ('J', 'I'), ('Y', 'I'),
+)
+PHONETIC_VOWEL_FOLDS = (('IU', 'U'), ('IA', 'A'), ('IE', 'E'), ('IO', 'O'))
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def phonetic_key(name: str) -> str:
+    """Reduce a normalized name to a key shared by its transliteration variants."""
+    key = ''.join(c for c in name.upper() if c.isalpha())
+    for spelling, sound in PHONETIC_REPLACEMENTS:
+        key = key.replace(spelling, sound)
+    key = ''.join(c for c, _ in groupby(key))
+    for spelling, sound in PHONETIC_VOWEL_FOLDS:
+        key = key.replace(spelling, sound)
+    return key
+
+def qgrams(key: str, q: int = FUZZY_QGRAM) -> Set[str]:
+    """Return the q-grams of key, padded so that short keys still have some."""
+    padded = f"#{key}#"
+    return {padded[i:i + q] for i in range(max(1, len(padded) - q + 1))}
+
+def names_match(first: str, second: str) -> bool:
+    """Whether two phonetic name keys are similar enough to belong to one person."""
+    return first == second or SequenceMatcher(None, first, second).ratio() >= FUZZY_NAME_THRESHOLD
+
+def fuzzy_duplicate_pairs(rows: Iterable[Tuple[int, str, str, str]]) -> Iterator[Tuple[int, int]]:
+    """Yield pairs of PersonIDs whose names fuzzily match and whose BirthDates are equal.
+
+    rows are (PersonID, LastName, BirthDate, FirstName) tuples.
+    Persons are indexed by (BirthDate, q-gram of phonetic last name); each person only
+    scores the others found in its postings that share at least FUZZY_MIN_OVERLAP of
+    its grams. First names match when either is empty, one is the other's initial or
+    they are similar.
+    """
+    keys: Dict[int, Tuple[str, str, str, Set[str]]] = {}
+    index = defaultdict(list)
+    for pid, last_name, birth_date, first_name in rows:
+        last = phonetic_key(last_name or '')
+        birth = (birth_date or '').strip()
+        if not last or not birth:
+            continue
+        grams = qgrams(last)
+        keys[pid] = (birth, last, phonetic_key(first_name or ''), grams)
+        for gram in grams:
+            index[(birth, gram)].append(pid)
+
+    for pid, (birth, last, first, grams) in keys.items():
+        shared = defaultdict(int)
+        for gram in grams:
+            postings = index[(birth, gram)]
+            if len(postings) > FUZZY_MAX_BLOCK_SIZE:
+                continue
+            for other in postings:
+                if other > pid:
+                    shared[other] += 1
+        for other, count in shared.items():
+            _, other_last, other_first, other_grams = keys[other]
+            if count < FUZZY_MIN_OVERLAP * min(len(grams), len(other_grams)):
+                continue
+            if not names_match(last, other_last):
+                continue
+            if (not first or not other_first or names_match(first, other_first)
+                    or (min(len(first), len(other_first)) == 1 and first[0] == other_first[0])):
+                yield pid, other
+
+# Identity keys of every Person row (travel documents, loyalty numbers and
+# LastName+BirthDate) are kept in indexed tables next to Person, so resolving a
+# record or finding who holds an identifier is an index lookup. Rows are added by
+# merge_person_data and merge_duplicates and removed by a trigger when their
+# person is deleted. Persons inserted or updated elsewhere are marked in
+# person_identity_stale by triggers and re-indexed by ensure_identity_keys before
+# keys are used.
+# person_name_only holds the names of persons created by NAME_ONLY_SOURCES, the
+# only ones that may be joined by name alone.
+IDENTITY_KEY_TABLES = ('person_documents', 'person_loyalty_numbers', 'person_name_births', 'person_name_only')
+NAME_ONLY_SOURCES = ('boarding_data', 'boarding_pass_xls')
+IDENTITY_KEY_SOURCE = "PersonID, FirstName, LastName, BirthDate, TravelDocuments, LoyaltyNumbers"
+
+def create_identity_key_tables(cursor: sqlite3.Cursor) -> bool:
+    """Create the identity key tables and their triggers; return whether they were missing."""
+    existing = cursor.execute(
+        f"SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' "
+        f"AND name IN ({', '.join('?' for _ in IDENTITY_KEY_TABLES)})", IDENTITY_KEY_TABLES).fetchone()[0]
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS person_documents (
+            Document TEXT NOT NULL,
+            PersonID INTEGER NOT NULL,
+            PRIMARY KEY (Document, PersonID)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS person_loyalty_numbers (
+            LoyaltyNumber TEXT NOT NULL,
+            PersonID INTEGER NOT NULL,
+            PRIMARY KEY (LoyaltyNumber, PersonID)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS person_name_births (
+            LastName TEXT NOT NULL,
+            BirthDate TEXT NOT NULL,
+            FirstName TEXT NOT NULL,
+            PersonID INTEGER NOT NULL,
+            PRIMARY KEY (LastName, BirthDate, PersonID)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS person_name_only (
+            LastName TEXT NOT NULL,
+            FirstName TEXT NOT NULL,
+            PersonID INTEGER NOT NULL,
+            Source TEXT NOT NULL,
+            PRIMARY KEY (LastName, FirstName, PersonID, Source)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute("CREATE TABLE IF NOT EXISTS person_identity_stale (PersonID INTEGER PRIMARY KEY)")
+    for table in IDENTITY_KEY_TABLES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_person ON {table} (PersonID)")
+    cursor.execute("DROP TRIGGER IF EXISTS person_identity_keys_delete")
+    cursor.execute(f'''
+        CREATE TRIGGER person_identity_keys_delete AFTER DELETE ON Person
+        BEGIN
+            {' '.join(f'DELETE FROM {table} WHERE PersonID = old.PersonID;' for table in IDENTITY_KEY_TABLES)}
+        END
+    ''')
+    # Splitting the comma-joined columns needs Python, so inserts and updates only mark the person
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS person_identity_keys_insert AFTER INSERT ON Person
+        BEGIN
+            INSERT OR IGNORE INTO person_identity_stale (PersonID) VALUES (new.PersonID);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS person_identity_keys_update
+        AFTER UPDATE OF PersonID, FirstName, LastName, BirthDate, TravelDocuments, LoyaltyNumbers ON Person
+        BEGIN
+            INSERT OR IGNORE INTO person_identity_stale (PersonID) VALUES (old.PersonID);
+            INSERT OR IGNORE INTO person_identity_stale (PersonID) VALUES (new.PersonID);
+        END
+    ''')
+    return existing < len(IDENTITY_KEY_TABLES)
+
+def add_identity_keys(cursor: sqlite3.Cursor, rows: Iterable[Tuple]) -> None:
+    """Index the identity keys of Person rows given as IDENTITY_KEY_SOURCE tuples."""
+    documents = []
+    loyalties = []
+    name_births = []
+
+    def flush() -> None:
+        cursor.executemany("INSERT OR IGNORE INTO person_documents (Document, PersonID) VALUES (?, ?)", documents)
+        cursor.executemany("INSERT OR IGNORE INTO person_loyalty_numbers (LoyaltyNumber, PersonID) VALUES (?, ?)",
+                           loyalties)
+        cursor.executemany('''
+            INSERT OR IGNORE INTO person_name_births (LastName, BirthDate, FirstName, PersonID) VALUES (?, ?, ?, ?)
+        ''', name_births)
+        documents.clear()
+        loyalties.clear()
+        name_births.clear()
+
+    for pid, first_name, last_name, birth_date, travel_docs, loyalty_numbers in rows:
+        if travel_docs:
+            documents.extend((doc, pid) for doc in {d.strip() for d in travel_docs.split(',')} if doc)
+        if loyalty_numbers:
+            loyalties.extend((loy, pid) for loy in {l.strip() for l in loyalty_numbers.split(',')} if loy)
+        if last_name and birth_date:
+            name_births.append((last_name.strip().upper(), birth_date.strip(), (first_name or '').strip().upper(), pid))
+        if len(documents) + len(loyalties) + len(name_births) >= SPILL_BATCH_SIZE:
+            flush()
+    flush()
+
+def ensure_identity_keys(cursor: sqlite3.Cursor) -> None:
+    """Create the identity key tables, indexing every existing Person row when they are new.
+
+    Persons inserted or updated since the keys were last used are re-indexed, keeping the sources
+    they were recorded with in person_name_only.
+    """
+    if create_identity_key_tables(cursor):
+        add_identity_keys(cursor, cursor.connection.execute(f"SELECT {IDENTITY_KEY_SOURCE} FROM Person"))
+    if cursor.execute("SELECT 1 FROM person_identity_stale LIMIT 1").fetchone() is None:
+        return
+    sources = cursor.execute('''
+        SELECT PersonID, Source FROM person_name_only
+        WHERE PersonID IN (SELECT PersonID FROM person_identity_stale)
+    ''').fetchall()
+    for table in IDENTITY_KEY_TABLES:
+        cursor.execute(f"DELETE FROM {table} WHERE PersonID IN (SELECT PersonID FROM person_identity_stale)")
+    add_identity_keys(cursor, cursor.connection.execute(f'''
+        SELECT {IDENTITY_KEY_SOURCE} FROM Person WHERE PersonID IN (SELECT PersonID FROM person_identity_stale)
+    '''))
+    cursor.executemany('''
+        INSERT OR IGNORE INTO person_name_only (LastName, FirstName, PersonID, Source)
+        SELECT LastName, FirstName, PersonID, ? FROM Person WHERE PersonID = ? AND LastName != ''
+    ''', [(source, pid) for pid, source in sources])
+    cursor.execute("DELETE FROM person_identity_stale")
+
+def identity_key_edges(cursor: sqlite3.Cursor) -> Iterator[Tuple[int, int]]:
+    """Yield (PersonID, PersonID) pairs that the exact matching rules join.
+
+    Persons sharing a travel document or a loyalty number are linked to the smallest
+    PersonID holding it. Within a LastName+BirthDate block an empty FirstName is
+    compatible with every other one, so such a block is linked as a whole; otherwise
+    only equal FirstNames are linked.
+    """
+    for table, key in (('person_documents', 'Document'), ('person_loyalty_numbers', 'LoyaltyNumber')):
+        yield from cursor.execute(f'''
+            SELECT f.FirstID, k.PersonID
+            FROM {table} k
+            JOIN (SELECT {key}, MIN(PersonID) AS FirstID FROM {table} GROUP BY {key}) f ON f.{key} = k.{key}
+            WHERE k.PersonID != f.FirstID
+        ''')
+    yield from cursor.execute('''
+        SELECT target, PersonID FROM (
+            SELECT CASE WHEN b.HasEmptyFirst THEN b.FirstID ELSE f.FirstID END AS target, k.PersonID
+            FROM person_name_births k
+            JOIN (SELECT LastName, BirthDate, MIN(PersonID) AS FirstID, MAX(FirstName = '') AS HasEmptyFirst
+                  FROM person_name_births GROUP BY LastName, BirthDate) b
+              ON b.LastName = k.LastName AND b.BirthDate = k.BirthDate
+            JOIN (SELECT LastName, BirthDate, FirstName, MIN(PersonID) AS FirstID
+                  FROM person_name_births GROUP BY LastName, BirthDate, FirstName) f
+              ON f.LastName = k.LastName AND f.BirthDate = k.BirthDate AND f.FirstName = k.FirstName
+        )
+        WHERE target != PersonID
+    ''')
+
+def new_identity_key_edges(cursor: sqlite3.Cursor, since_id: int) -> Iterator[Tuple[int, int]]:
+    """Yield (PersonID, PersonID) pairs joining persons after since_id to any other person.
+
+    Each new person's keys are looked up in the identity key tables, so the cost grows
+    with the number of new persons rather than with Person. A new person created from
+    a boarding pass, or one a boarding pass could have joined, is linked to the first
+    earlier such person of the same name whose documents and loyalty numbers agree.
+    """
+    for table, key in (('person_documents', 'Document'), ('person_loyalty_numbers', 'LoyaltyNumber')):
+        yield from cursor.execute(f'''
+            SELECT k.PersonID, o.PersonID
+            FROM {table} k
+            JOIN {table} o ON o.{key} = k.{key} AND o.PersonID != k.PersonID
+            WHERE k.PersonID > ?
+        ''', (since_id,))
+    yield from cursor.execute('''
+        SELECT k.PersonID, o.PersonID
+        FROM person_name_births k
+        JOIN person_name_births o
+          ON o.LastName = k.LastName AND o.BirthDate = k.BirthDate AND o.PersonID != k.PersonID
+         AND (o.FirstName = k.FirstName OR o.FirstName = '' OR k.FirstName = '')
+        WHERE k.PersonID > ?
+    ''', (since_id,))
+    # Boarding-pass persons join by name alone, as in a full run, unless both sides
+    # hold documents or loyalty numbers and none of them are shared
+    conflict = '''
+        (EXISTS (SELECT 1 FROM {table} WHERE PersonID = n.PersonID)
+         AND EXISTS (SELECT 1 FROM {table} WHERE PersonID = o.PersonID)
+         AND NOT EXISTS (SELECT 1 FROM {table} a JOIN {table} b ON b.{key} = a.{key} AND b.PersonID = o.PersonID
+                         WHERE a.PersonID = n.PersonID))
+    '''
+    conflicts = ' OR '.join(conflict.format(table=table, key=key) for table, key in
+                            (('person_documents', 'Document'), ('person_loyalty_numbers', 'LoyaltyNumber')))
+    yield from cursor.execute(f'''
+        SELECT n.PersonID, MIN(o.PersonID)
+        FROM person_name_only n
+        JOIN person_name_only o ON o.LastName = n.LastName AND o.FirstName = n.FirstName AND o.PersonID <= ?
+        WHERE n.PersonID > ?
+          AND (n.Source = 'boarding_pass_xls' OR o.Source = 'boarding_pass_xls')
+          AND NOT ({conflicts})
+        GROUP BY n.PersonID
+    ''', (since_id, since_id))
+
+def persons_holding(conn: sqlite3.Connection, document: str = '', loyalty_number: str = '') -> List[int]:
+    """Return the PersonIDs holding a travel document or loyalty number.
+
+    Persons inserted or updated since the keys were last used are re-indexed first.
+    """
+    ensure_identity_keys(conn.cursor())
+    if document:
+        sql, value = "SELECT PersonID FROM person_documents WHERE Document = ?", normalize_document(document)
+    else:
+        sql, value = "SELECT PersonID FROM person_loyalty_numbers WHERE LoyaltyNumber = ?", normalize_document(loyalty_number)
+    return [pid for (pid,) in conn.execute(sql, (value,))]
+
+def merge_duplicates(db_path: str, fuzzy: bool = MERGE_FUZZY, since_id: Optional[int] = None) -> None:
+    """Merge Person rows that share a document, a loyalty number or LastName+BirthDate.
+
+    Candidates come from the identity key tables rather than from Person itself. With
+    fuzzy, persons born on the same date with similar names are merged as well. With
+    since_id, only persons after since_id are resolved against the others and only the
+    affected rows are rewritten; otherwise the whole table is merged and swapped.
+    """
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
+    ensure_identity_keys(cursor)
+    conn.commit()
 
-    # Fetch all data
-    cursor.execute("SELECT * FROM Person")
-    rows = cursor.fetchall()
-    columns = [desc[0] for desc in cursor.description]
+    if since_id is None:
+        pids = np.array([pid for (pid,) in cursor.execute("SELECT PersonID FROM Person ORDER BY PersonID")],
+                        dtype=np.int64)
+        if not pids.size:
+            print("No data in Person table.")
+            conn.close()
+            return
+        edges = list(identity_key_edges(cursor))
+        name_births = "SELECT PersonID, LastName, BirthDate, FirstName FROM person_name_births"
+    else:
+        edges = list(new_identity_key_edges(cursor, since_id))
+        name_births = f'''
+            SELECT PersonID, LastName, BirthDate, FirstName FROM person_name_births
+            WHERE BirthDate IN (SELECT BirthDate FROM person_name_births WHERE PersonID > {int(since_id)})
+        '''
+
+    # Match transliteration variants and typos among persons with the same BirthDate
+    if fuzzy:
+        edges.extend(pair for pair in fuzzy_duplicate_pairs(cursor.execute(name_births))
+                     if since_id is None or max(pair) > since_id)
+
+    if since_id is not None:
+        # Only persons touched by an edge can change
+        pids = np.unique(np.array(edges, dtype=np.int64))
+
+    # Initialize union-find over dense indices into pids
+    uf = UnionFind(len(pids))
+    if edges:
+        edge_pids = np.array(edges, dtype=np.int64)
+        edge_array = np.minimum(np.searchsorted(pids, edge_pids), len(pids) - 1)
+        # Skip keys of PersonIDs no longer in Person
+        known = (pids[edge_array] == edge_pids).all(axis=1)
+        uf.union_edges(edge_array[known, 0], edge_array[known, 1])
+    del edges
 
-    if not rows:
-        print("No data in Person table.")
+    # Find components, each already sorted by PersonID
+    groups = [pids[members].tolist() for members in uf.components()]
+    if not groups:
         conn.close()
+        print("Duplicates merged successfully.")
         return
 
-    # Create dict of rows by PersonID
-    data = {row[0]: dict(zip(columns, row)) for row in rows}
+    # Stage every PersonID that is merged and load only those rows
+    cursor.execute("PRAGMA temp_store = FILE")
+    cursor.execute("CREATE TEMP TABLE merged_members (PersonID INTEGER PRIMARY KEY, GroupID INTEGER)")
+    cursor.executemany("INSERT INTO merged_members (PersonID, GroupID) VALUES (?, ?)",
+                       ((pid, group[0]) for group in groups for pid in group))
+    cursor.execute('''
+        CREATE TEMP TABLE merged_sources AS
+        SELECT DISTINCT m.GroupID, n.Source
+        FROM person_name_only n JOIN merged_members m ON m.PersonID = n.PersonID
+    ''')
+    cursor.execute("SELECT p.* FROM Person p JOIN merged_members m ON m.PersonID = p.PersonID")
+    columns = [desc[0] for desc in cursor.description]
+    data = {row[0]: dict(zip(columns, row)) for row in cursor.fetchall()}
 
     # Scalars and sets
     scalars = ['FirstName', 'MiddleName', 'LastName', 'Sex', 'BirthDate']
     set_cols = [col for col in columns if col not in ['PersonID'] + scalars]
 
-    # Initialize union-find
-    parent = {pid: pid for pid in data}
-
-    # Match on shared travel documents
-    doc_to_ids = defaultdict(list)
-    for pid, row in data.items():
-        docs = row['TravelDocuments'].split(',') if row['TravelDocuments'] else []
-        for doc in [d.strip() for d in docs if d.strip()]:
-            doc_to_ids[doc].append(pid)
-
-    for ids in doc_to_ids.values():
-        for i in range(1, len(ids)):
-            union(parent, ids[0], ids[i])
-
-    # Match on shared loyalty numbers
-    loyalty_to_ids = defaultdict(list)
-    for pid, row in data.items():
-        loyalties = row['LoyaltyNumbers'].split(',') if row['LoyaltyNumbers'] else []
-        for loy in [l.strip() for l in loyalties if l.strip()]:
-            loyalty_to_ids[loy].append(pid)
-
-    for ids in loyalty_to_ids.values():
-        for i in range(1, len(ids)):
-            union(parent, ids[0], ids[i])
-
-    # Match on same LastName + BirthDate, with compatible FirstName
-    name_birth_to_ids = defaultdict(list)
-    for pid, row in data.items():
-        if row['LastName'] and row['BirthDate']:
-            key = (row['LastName'].strip().upper(), row['BirthDate'].strip())
-            name_birth_to_ids[key].append(pid)
-
-    for ids in name_birth_to_ids.values():
-        if len(ids) > 1:
-            for i in range(len(ids)):
-                for j in range(i + 1, len(ids)):
-                    pid1, pid2 = ids[i], ids[j]
-                    first1 = data[pid1]['FirstName'].strip().upper()
-                    first2 = data[pid2]['FirstName'].strip().upper()
-                    if first1 == first2 or not first1 or not first2:
-                        union(parent, pid1, pid2)
-
-    # Find components
-    groups = defaultdict(list)
-    for pid in parent:
-        root = find(parent, pid)
-        groups[root].append(pid)
-
-    # Merge each group
-    cursor.execute('BEGIN')
-    for group in groups.values():
-        if len(group) <= 1:
-            continue
-
-        # Sort group for consistency
-        group.sort()
+    def merged_rows() -> Iterator[List]:
+        """Yield one merged row per group, under the group's smallest PersonID."""
+        for group in groups:
+            sub_rows = [data[pid] for pid in group]
+            merged = [group[0]]
 
-        # Collect sub data
-        sub_rows = {pid: data[pid] for pid in group}
+            # Merge scalars: prefer the longest non-empty
+            for col in scalars:
+                candidates = [row[col].strip() for row in sub_rows if row[col].strip()]
+                merged.append(max(candidates, key=len) if candidates else '')
 
-        merged = {}
+            # Merge sets: union unique items
+            for col in set_cols:
+                all_items = set()
+                for row in sub_rows:
+                    if row[col]:
+                        all_items.update(i.strip() for i in row[col].split(','))
+                all_items.discard('')
+                merged.append(','.join(sorted(all_items)))
+            yield merged
 
-        # Merge scalars: prefer the longest non-empty
-        for col in scalars:
-            candidates = [sub_rows[pid][col].strip() for pid in group if sub_rows[pid][col].strip()]
-            if candidates:
-                merged[col] = max(candidates, key=len)
-            else:
-                merged[col] = ''
-
-        # Merge sets: union unique items
-        for col in set_cols:
-            all_items = set()
-            for pid in group:
-                items = sub_rows[pid][col].split(',') if sub_rows[pid][col] else []
-                all_items.update(i.strip() for i in items if i.strip())
-            merged[col] = ','.join(sorted(all_items))
-
-        # Keep the smallest PersonID
-        min_id = min(group)
-
-        # Update the min_id row
-        set_clause = ', '.join(f"{col} = ?" for col in scalars + set_cols)
-        values = [merged[col] for col in scalars + set_cols]
-        cursor.execute(f"UPDATE Person SET {set_clause} WHERE PersonID = ?", values + [min_id])
+    # Stage the merged rows
+    cursor.execute("CREATE TEMP TABLE merged_person AS SELECT * FROM Person WHERE 0")
+    out_cols = ['PersonID'] + scalars + set_cols
+    cursor.executemany(f"INSERT INTO merged_person ({', '.join(out_cols)}) "
+                       f"VALUES ({', '.join('?' for _ in out_cols)})", merged_rows())
+    conn.commit()
 
-        # Delete the other rows
-        del_ids = [pid for pid in group if pid != min_id]
-        if del_ids:
-            placeholders = ','.join('?' for _ in del_ids)
-            cursor.execute(f"DELETE FROM Person WHERE PersonID IN ({placeholders})", del_ids)
+    if since_id is None:
+        # Rebuild Person from the untouched rows plus the merged ones and swap it in atomically
+        schema_sql = [sql for (sql,) in cursor.execute(
+            "SELECT sql FROM sqlite_master WHERE type IN ('index', 'trigger') AND tbl_name = 'Person' AND sql IS NOT NULL")]
+        sequence = cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'Person'").fetchone()
+        cursor.execute('BEGIN')
+        create_person_table(cursor, 'Person_merged')
+        cursor.execute(f'''
+            INSERT INTO Person_merged ({', '.join(columns)})
+            SELECT {', '.join(columns)} FROM Person p
+            WHERE NOT EXISTS (SELECT 1 FROM merged_members m WHERE m.PersonID = p.PersonID)
+            UNION ALL
+            SELECT {', '.join(columns)} FROM merged_person
+            ORDER BY PersonID
+        ''')
+        cursor.execute("DROP TABLE Person")
+        cursor.execute("ALTER TABLE Person_merged RENAME TO Person")
+        for sql in schema_sql:
+            cursor.execute(sql)
+        if sequence:
+            cursor.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'Person'", sequence)
+    else:
+        # Replace just the merged rows in place
+        cursor.execute('BEGIN')
+        cursor.execute("DELETE FROM Person WHERE PersonID IN (SELECT PersonID FROM merged_members)")
+        cursor.execute(f"INSERT INTO Person ({', '.join(columns)}) SELECT {', '.join(columns)} FROM merged_person")
 
+    # Re-index the identity keys of the merged persons
+    for table in IDENTITY_KEY_TABLES:
+        cursor.execute(f"DELETE FROM {table} WHERE PersonID IN (SELECT PersonID FROM merged_members)")
+    add_identity_keys(cursor, cursor.connection.execute(f"SELECT {IDENTITY_KEY_SOURCE} FROM merged_person"))
+    cursor.execute('''
+        INSERT OR IGNORE INTO person_name_only (LastName, FirstName, PersonID, Source)
+        SELECT p.LastName, p.FirstName, p.PersonID, s.Source
+        FROM merged_person p JOIN merged_sources s ON s.GroupID = p.PersonID
+        WHERE p.LastName != ''
+    ''')
+    cursor.execute("DELETE FROM person_identity_stale WHERE PersonID IN (SELECT PersonID FROM merged_person)")
     conn.commit()
+    cursor.execute("DROP TABLE merged_person")
+    cursor.execute("DROP TABLE merged_members")
+    cursor.execute("DROP TABLE merged_sources")
     conn.close()
     print("Duplicates merged successfully.")
 
+# Cyrillic to Latin transliteration, as a prebuilt str.translate table
+TRANSLITERATION_TABLE = str.maketrans({
+    'А': 'A', 'Б': 'B', 'В': 'V', 'Г': 'G', 'Д': 'D', 'Е': 'E', 'Ё': 'YO', 'Ж': 'ZH', 'З': 'Z', 'И': 'I',
+    'Й': 'Y', 'К': 'K', 'Л': 'L', 'М': 'M', 'Н': 'N', 'О': 'O', 'П': 'P', 'Р': 'R', 'С': 'S', 'Т': 'T',
+    'У': 'U', 'Ф': 'F', 'Х': 'KH', 'Ц': 'TS', 'Ч': 'CH', 'Ш': 'SH', 'Щ': 'SHCH', 'Ъ': '', 'Ы': 'Y', 'Ь': '',
+    'Э': 'E', 'Ю': 'YU', 'Я': 'YA',
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo', 'ж': 'zh', 'з': 'z', 'и': 'i',
+    'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't',
+    'у': 'u', 'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'shch', 'ъ': '', 'ы': 'y', 'ь': '',
+    'э': 'e', 'ю': 'yu', 'я': 'ya',
+})
+
 def transliterate(name: str) -> str:
     """Transliterate Cyrillic to Latin."""
-    trans_table = {
-        'А': 'A', 'Б': 'B', 'В': 'V', 'Г': 'G', 'Д': 'D', 'Е': 'E', 'Ё': 'YO', 'Ж': 'ZH', 'З': 'Z', 'И': 'I',
-        'Й': 'Y', 'К': 'K', 'Л': 'L', 'М': 'M', 'Н': 'N', 'О': 'O', 'П': 'P', 'Р': 'R', 'С': 'S', 'Т': 'T',
-        'У': 'U', 'Ф': 'F', 'Х': 'KH', 'Ц': 'TS', 'Ч': 'CH', 'Ш': 'SH', 'Щ': 'SHCH', 'Ъ': '', 'Ы': 'Y', 'Ь': '',
-        'Э': 'E', 'Ю': 'YU', 'Я': 'YA',
-        'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo', 'ж': 'zh', 'з': 'z', 'и': 'i',
-        'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't',
-        'у': 'u', 'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'shch', 'ъ': '', 'ы': 'y', 'ь': '',
-        'э': 'e', 'ю': 'yu', 'я': 'ya',
-    }
-    return ''.join(trans_table.get(c, c) for c in name)
+    return name.translate(TRANSLITERATION_TABLE)
 
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
 def normalize_name(name: str) -> str:
     """Normalize a name by transliterating, converting to uppercase and removing extra spaces."""
     if not name or name.lower() == 'not presented':
         return ''
-    name = transliterate(name)
-    return re.sub(r'\s+', ' ', name.strip().upper())
+    return ' '.join(transliterate(name).upper().split())
 
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
 def normalize_document(doc: str) -> str:
     """Normalize document number by removing spaces and converting to uppercase."""
     if not doc or doc.lower() == 'not presented':
         return ''
     return doc.replace(' ', '').upper()
 
-def create_person_table(cursor: sqlite3.Cursor) -> None:
-    """Create the Person table to store consolidated passenger data."""
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS Person (
+def normalize_column(values: Sequence[Optional[str]], normalize: Callable[[str], str] = normalize_name) -> List[str]:
+    """Normalize a whole column, calling normalize once per distinct value."""
+    normalized = {value: normalize(value) for value in set(values)}
+    return [normalized[value] for value in values]
+
+def iter_normalized_rows(cursor: sqlite3.Cursor, name_columns: Sequence[int],
+                         batch_size: int = NORMALIZE_BATCH_SIZE) -> Iterator[Tuple]:
+    """Yield the cursor's rows followed by their name_columns normalized, a batch at a time."""
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        columns = list(zip(*rows))
+        names = [normalize_column(columns[i]) for i in name_columns]
+        for row, normalized in zip(rows, zip(*names)):
+            yield row + normalized
+
+def create_person_table(cursor: sqlite3.Cursor, table: str = 'Person') -> None:
+    """Create the Person table, or another table of its shape, to store consolidated passenger data."""
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {table} (
             PersonID INTEGER PRIMARY KEY AUTOINCREMENT,
             FirstName TEXT,
             MiddleName TEXT,
@@ -197,359 +598,520 @@ def create_person_table(cursor: sqlite3.Cursor) -> None:
 
 def get_person_key(first_name: str, last_name: str, birth_date: str, travel_doc: str) -> Tuple[str, ...]:
     """Generate a key for matching persons across tables."""
+    return normalized_person_key(normalize_name(first_name), normalize_name(last_name), birth_date, travel_doc)
+
+def normalized_person_key(first_name: str, last_name: str, birth_date: str, travel_doc: str) -> Tuple[str, ...]:
+    """Generate a matching key from names that are already normalized."""
     return (
-        normalize_name(first_name),
-        normalize_name(last_name),
+        first_name,
+        last_name,
         birth_date.strip() if birth_date else '',
         normalize_document(travel_doc)
     )
 
-def merge_person_data(db_path: str) -> None:
-    """Merge data from multiple tables into a single Person table."""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+SCALAR_COLUMNS = ('FirstName', 'MiddleName', 'LastName', 'Sex', 'BirthDate')
+SET_COLUMNS = (
+    'TravelDocuments', 'LoyaltyNumbers', 'TicketNumbers', 'BookingCodes', 'FlightHistory',
+    'DepartureCities', 'ArrivalCities', 'LoyaltyPrograms', 'Meals', 'TravelClasses', 'FareBases',
+    'Baggages', 'Seats', 'Statuses', 'DepartureCountries', 'ArrivalCountries', 'AdditionalInfos',
+    'AgentInfos',
+)
+SET_COLUMN_INDEX = {column: i for i, column in enumerate(SET_COLUMNS)}
 
-    # Create the Person table
-    create_person_table(cursor)
+SOURCE_TABLES = (
+    'boarding_data', 'boarding_pass_xls', 'sirena_data', 'pointz_aggregator_data',
+    'frequent_flyer_profiles', 'frequent_flyer_flights',
+)
 
-    # Dictionary to store person data by matching key
-    persons: Dict[Tuple[str, ...], Dict] = {}
-
-    # Process boarding_data
-    for row in cursor.execute("SELECT * FROM boarding_data"):
-        first_name, middle_name, last_name, sex, birth_date, doc, booking, ticket, baggage, flight_date, flight_time, flight_num, codeshare, dest = row
-        key = get_person_key(first_name, last_name, birth_date, doc)
-        if key not in persons:
-            persons[key] = {
-                'FirstName': normalize_name(first_name),
-                'MiddleName': normalize_name(middle_name),
-                'LastName': normalize_name(last_name),
-                'Sex': sex,
-                'BirthDate': birth_date,
-                'TravelDocuments': set(),
-                'LoyaltyNumbers': set(),
-                'TicketNumbers': set(),
-                'BookingCodes': set(),
-                'FlightHistory': set(),
-                'DepartureCities': set(),
-                'ArrivalCities': set(),
-                'LoyaltyPrograms': set(),
-                'Meals': set(),
-                'TravelClasses': set(),
-                'FareBases': set(),
-                'Baggages': set(),
-                'Seats': set(),
-                'Statuses': set(),
-                'DepartureCountries': set(),
-                'ArrivalCountries': set(),
-                'AdditionalInfos': set(),
-                'AgentInfos': set()
-            }
-        person = persons[key]
+# Rows of a source table to read, as (after, upto) rowids; None reads the whole table
+RowRange = Optional[Tuple[int, int]]
+
+def rowid_filter(rows: RowRange, alias: str = '') -> str:
+    """Return the WHERE clause restricting a source query to rows, to be bound with rows."""
+    if rows is None:
+        return ''
+    rowid = f"{alias}.rowid" if alias else 'rowid'
+    return f" WHERE {rowid} > ? AND {rowid} <= ?"
+
+def create_unification_marks_table(cursor: sqlite3.Cursor) -> None:
+    """Create the unification_marks table if it doesn't exist."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS unification_marks (
+            SourceTable TEXT PRIMARY KEY,
+            LastRowID INTEGER NOT NULL
+        )
+    ''')
+
+def source_row_ranges(cursor: sqlite3.Cursor, incremental: bool) -> Dict[str, Tuple[int, int]]:
+    """Return the rowid range of every source table to unify in this run.
+
+    Ranges end at the table's current largest rowid. They start after the stored high-water
+    mark when incremental, and at the beginning of the table otherwise. A mark past the
+    table's end means the table was emptied and refilled, so it is read in full.
+    """
+    marks = dict(cursor.execute("SELECT SourceTable, LastRowID FROM unification_marks")) if incremental else {}
+    ranges = {}
+    for table in SOURCE_TABLES:
+        upto = cursor.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {table}").fetchone()[0]
+        since = marks.get(table, 0)
+        ranges[table] = (since if since <= upto else 0, upto)
+    return ranges
+
+def save_unification_marks(cursor: sqlite3.Cursor, ranges: Dict[str, Tuple[int, int]]) -> None:
+    """Record the end of each unified range as its source table's high-water mark."""
+    cursor.executemany("INSERT OR REPLACE INTO unification_marks (SourceTable, LastRowID) VALUES (?, ?)",
+                       [(table, upto) for table, (_, upto) in ranges.items()])
+
+# A person record is (key, scalars, values): the matching key from get_person_key, the
+# SCALAR_COLUMNS values used when the key is first seen and (set column, value) pairs.
+PersonRecord = Tuple[Tuple[str, ...], Tuple, List[Tuple[str, str]]]
+
+def boarding_data_records(conn: sqlite3.Connection, rows: RowRange = None) -> Iterator[PersonRecord]:
+    """Yield a person record for every boarding_data row."""
+    cursor = conn.execute('''
+        SELECT PassengerFirstName, PassengerSecondName, PassengerLastName, PassengerSex, PassengerBirthDate,
+               PassengerDocument, BookingCode, TicketNumber, Baggage, FlightDate, FlightTime,
+               FlightNumber, CodeShare, Destination
+        FROM boarding_data
+    ''' + rowid_filter(rows), rows or ())
+    for row in iter_normalized_rows(cursor, (0, 1, 2)):
+        _, _, _, sex, birth_date, doc, booking, ticket, baggage, flight_date, flight_time, flight_num, codeshare, dest, first_name, middle_name, last_name = row
+        key = normalized_person_key(first_name, last_name, birth_date, doc)
+        scalars = (first_name, middle_name, last_name, sex, birth_date)
+        values = []
         if doc and doc.lower() != 'not presented':
-            person['TravelDocuments'].add(normalize_document(doc))
+            values.append(('TravelDocuments', normalize_document(doc)))
         if ticket and ticket.lower() != 'not presented':
-            person['TicketNumbers'].add(normalize_document(ticket))
+            values.append(('TicketNumbers', normalize_document(ticket)))
         if booking and booking.lower() != 'not presented':
-            person['BookingCodes'].add(normalize_document(booking))
+            values.append(('BookingCodes', normalize_document(booking)))
         flight_str = f"{flight_num} {flight_date} {flight_time}"
         if codeshare and codeshare.lower() != 'not presented':
             flight_str += f" ({codeshare})"
-        person['FlightHistory'].add(flight_str)
-        person['ArrivalCities'].add(dest)
+        values.append(('FlightHistory', flight_str))
+        values.append(('ArrivalCities', dest))
         if baggage and baggage.lower() != 'not presented':
-            person['Baggages'].add(baggage)
+            values.append(('Baggages', baggage))
+        yield key, scalars, values
 
-    # Build name_to_first_key for fast lookup in boarding_pass_xls
-    name_to_first_key: Dict[Tuple[str, str], Tuple[str, ...]] = {}
-    for key in persons:
-        name = (key[0], key[1])
-        if name not in name_to_first_key:
-            name_to_first_key[name] = key
+def boarding_pass_xls_records(conn: sqlite3.Connection, rows: RowRange = None) -> Iterator[PersonRecord]:
+    """Yield a person record for every boarding_pass_xls row, keyed by (first, last, '', '').
 
-    # Process boarding_pass_xls
-    for row in cursor.execute("SELECT * FROM boarding_pass_xls"):
-        title, name, loyalty_prog, loyalty_num, fare_class, flight_num, dep_city, arr_city, dep_airport, arr_airport, flight_date, flight_time, pnr, eticket = row
+    These rows carry no birth date or document, so they are matched by name only.
+    """
+    cursor = conn.execute('''
+        SELECT PassengerTitle, PassengerName, LoyaltyProgram, LoyaltyNumber, FareClass,
+               FlightNumber, DepartureCity, ArrivalCity, DepartureAirport, ArrivalAirport,
+               FlightDate, FlightTime, PNR, ETicket
+        FROM boarding_pass_xls
+    ''' + rowid_filter(rows), rows or ())
+    for row in iter_normalized_rows(cursor, (1,)):
+        title, _, loyalty_prog, loyalty_num, fare_class, flight_num, dep_city, arr_city, dep_airport, arr_airport, flight_date, flight_time, pnr, eticket, name = row
         # Parse name (e.g., "LAVROV EVGENIY G" -> First: EVGENIY, Middle: G, Last: LAVROV)
-        name_parts = normalize_name(name).split()
+        name_parts = name.split()
         first_name = name_parts[1] if len(name_parts) > 1 else ''
         middle_name = name_parts[2] if len(name_parts) > 2 else ''
         last_name = name_parts[0] if name_parts else ''
-        name = (first_name, last_name)
-        if name in name_to_first_key:
-            best_key = name_to_first_key[name]
-        else:
-            best_key = (first_name, last_name, '', '')
-            persons[best_key] = {
-                'FirstName': first_name,
-                'MiddleName': middle_name,
-                'LastName': last_name,
-                'Sex': '',
-                'BirthDate': '',
-                'TravelDocuments': set(),
-                'LoyaltyNumbers': set(),
-                'TicketNumbers': set(),
-                'BookingCodes': set(),
-                'FlightHistory': set(),
-                'DepartureCities': set(),
-                'ArrivalCities': set(),
-                'LoyaltyPrograms': set(),
-                'Meals': set(),
-                'TravelClasses': set(),
-                'FareBases': set(),
-                'Baggages': set(),
-                'Seats': set(),
-                'Statuses': set(),
-                'DepartureCountries': set(),
-                'ArrivalCountries': set(),
-                'AdditionalInfos': set(),
-                'AgentInfos': set()
-            }
-            name_to_first_key[name] = best_key
-        person = persons[best_key]
+        values = []
         if loyalty_num:
-            person['LoyaltyNumbers'].add(normalize_document(loyalty_num))
+            values.append(('LoyaltyNumbers', normalize_document(loyalty_num)))
         if eticket:
-            person['TicketNumbers'].add(normalize_document(eticket))
+            values.append(('TicketNumbers', normalize_document(eticket)))
         if pnr:
-            person['BookingCodes'].add(normalize_document(pnr))
-        person['FlightHistory'].add(f"{flight_num} {flight_date} {flight_time}")
-        person['DepartureCities'].add(dep_city)
-        person['ArrivalCities'].add(arr_city)
+            values.append(('BookingCodes', normalize_document(pnr)))
+        values.append(('FlightHistory', f"{flight_num} {flight_date} {flight_time}"))
+        values.append(('DepartureCities', dep_city))
+        values.append(('ArrivalCities', arr_city))
         if loyalty_prog:
-            person['LoyaltyPrograms'].add(loyalty_prog)
+            values.append(('LoyaltyPrograms', loyalty_prog))
         if fare_class:
-            person['TravelClasses'].add(fare_class)
+            values.append(('TravelClasses', fare_class))
+        yield (first_name, last_name, '', ''), (first_name, middle_name, last_name, '', ''), values
 
-    # Process sirena_data
-    for row in cursor.execute("SELECT * FROM sirena_data"):
-        pax_name, birth_date, dep_date, dep_time, arr_date, arr_time, flight_code, from_airport, dest, code, eticket, travel_doc, seat, meal, trv_cls, fare, baggage, pax_info, agent_info = row
-        name_parts = normalize_name(pax_name).split()
+def sirena_data_records(conn: sqlite3.Connection, rows: RowRange = None) -> Iterator[PersonRecord]:
+    """Yield a person record for every sirena_data row."""
+    cursor = conn.execute('''
+        SELECT PaxName, PaxBirthDate, DepartDate, DepartTime, ArrivalDate, ArrivalTime,
+               FlightCode, FromAirport, Dest, Code, e_Ticket, TravelDoc, Seat, Meal,
+               TrvCls, Fare, Baggage, PaxAdditionalInfo, AgentInfo
+        FROM sirena_data
+    ''' + rowid_filter(rows), rows or ())
+    for row in iter_normalized_rows(cursor, (0,)):
+        _, birth_date, dep_date, dep_time, arr_date, arr_time, flight_code, from_airport, dest, code, eticket, travel_doc, seat, meal, trv_cls, fare, baggage, pax_info, agent_info, pax_name = row
+        name_parts = pax_name.split()
         first_name = name_parts[1] if len(name_parts) > 1 else ''
         middle_name = name_parts[2] if len(name_parts) > 2 else ''
         last_name = name_parts[0] if name_parts else ''
         key = get_person_key(first_name, last_name, birth_date, travel_doc)
-        if key not in persons:
-            persons[key] = {
-                'FirstName': first_name,
-                'MiddleName': middle_name,
-                'LastName': last_name,
-                'Sex': '',
-                'BirthDate': birth_date,
-                'TravelDocuments': set(),
-                'LoyaltyNumbers': set(),
-                'TicketNumbers': set(),
-                'BookingCodes': set(),
-                'FlightHistory': set(),
-                'DepartureCities': set(),
-                'ArrivalCities': set(),
-                'LoyaltyPrograms': set(),
-                'Meals': set(),
-                'TravelClasses': set(),
-                'FareBases': set(),
-                'Baggages': set(),
-                'Seats': set(),
-                'Statuses': set(),
-                'DepartureCountries': set(),
-                'ArrivalCountries': set(),
-                'AdditionalInfos': set(),
-                'AgentInfos': set()
-            }
-        person = persons[key]
+        values = []
         if travel_doc and travel_doc.lower() != 'not presented':
-            person['TravelDocuments'].add(normalize_document(travel_doc))
+            values.append(('TravelDocuments', normalize_document(travel_doc)))
         if eticket:
-            person['TicketNumbers'].add(normalize_document(eticket))
+            values.append(('TicketNumbers', normalize_document(eticket)))
         if code:
-            person['BookingCodes'].add(normalize_document(code))
-        person['FlightHistory'].add(f"{flight_code} {dep_date} {dep_time}")
-        person['DepartureCities'].add(from_airport)
-        person['ArrivalCities'].add(dest)
+            values.append(('BookingCodes', normalize_document(code)))
+        values.append(('FlightHistory', f"{flight_code} {dep_date} {dep_time}"))
+        values.append(('DepartureCities', from_airport))
+        values.append(('ArrivalCities', dest))
         if seat:
-            person['Seats'].add(seat)
+            values.append(('Seats', seat))
         if meal:
-            person['Meals'].add(meal)
+            values.append(('Meals', meal))
         if trv_cls:
-            person['TravelClasses'].add(trv_cls)
+            values.append(('TravelClasses', trv_cls))
         if fare:
-            person['FareBases'].add(fare)
+            values.append(('FareBases', fare))
         if baggage:
-            person['Baggages'].add(baggage)
+            values.append(('Baggages', baggage))
         if pax_info and pax_info.lower() != 'not presented':
-            person['AdditionalInfos'].add(pax_info)
+            values.append(('AdditionalInfos', pax_info))
         if agent_info and agent_info.lower() != 'not presented':
-            person['AgentInfos'].add(agent_info)
-
-    # Process pointz_aggregator_data
-    for row in cursor.execute("SELECT * FROM pointz_aggregator_data"):
-        user_uid, first_name, last_name, card_num, bonus_prog, flight_code, flight_date, dep, arr, fare = row
-        key = get_person_key(first_name, last_name, '', card_num)
-        if key not in persons:
-            persons[key] = {
-                'FirstName': normalize_name(first_name),
-                'MiddleName': '',
-                'LastName': normalize_name(last_name),
-                'Sex': '',
-                'BirthDate': '',
-                'TravelDocuments': set(),
-                'LoyaltyNumbers': set(),
-                'TicketNumbers': set(),
-                'BookingCodes': set(),
-                'FlightHistory': set(),
-                'DepartureCities': set(),
-                'ArrivalCities': set(),
-                'LoyaltyPrograms': set(),
-                'Meals': set(),
-                'TravelClasses': set(),
-                'FareBases': set(),
-                'Baggages': set(),
-                'Seats': set(),
-                'Statuses': set(),
-                'DepartureCountries': set(),
-                'ArrivalCountries': set(),
-                'AdditionalInfos': set(),
-                'AgentInfos': set()
-            }
-        person = persons[key]
+            values.append(('AgentInfos', agent_info))
+        yield key, (first_name, middle_name, last_name, '', birth_date), values
+
+def pointz_aggregator_records(conn: sqlite3.Connection, rows: RowRange = None) -> Iterator[PersonRecord]:
+    """Yield a person record for every pointz_aggregator_data row."""
+    cursor = conn.execute('''
+        SELECT UserUID, FirstName, LastName, CardNumber, BonusProgramm,
+               FlightCode, FlightDate, Departure, Arrival, Fare
+        FROM pointz_aggregator_data
+    ''' + rowid_filter(rows), rows or ())
+    for row in iter_normalized_rows(cursor, (1, 2)):
+        user_uid, _, _, card_num, bonus_prog, flight_code, flight_date, dep, arr, fare, first_name, last_name = row
+        key = normalized_person_key(first_name, last_name, '', card_num)
+        values = []
         if card_num:
-            person['LoyaltyNumbers'].add(normalize_document(card_num))
-        person['FlightHistory'].add(f"{flight_code} {flight_date}")
-        person['DepartureCities'].add(dep)
-        person['ArrivalCities'].add(arr)
+            values.append(('LoyaltyNumbers', normalize_document(card_num)))
+        values.append(('FlightHistory', f"{flight_code} {flight_date}"))
+        values.append(('DepartureCities', dep))
+        values.append(('ArrivalCities', arr))
         if bonus_prog:
-            person['LoyaltyPrograms'].add(bonus_prog)
+            values.append(('LoyaltyPrograms', bonus_prog))
         if fare:
-            person['FareBases'].add(fare)
-
-    # Build ff_to_first_key for fast lookup in skyteam_data
-    ff_to_first_key: Dict[str, Tuple[str, ...]] = {}
-    for key in persons:
-        for ff in persons[key]['LoyaltyNumbers']:
-            if ff not in ff_to_first_key:
-                ff_to_first_key[ff] = key
+            values.append(('FareBases', fare))
+        yield key, (first_name, '', last_name, '', ''), values
 
-
-
-    # Process frequent_flyer_profiles
-    for row in cursor.execute("SELECT * FROM frequent_flyer_profiles"):
-        nick, sex, first_name, last_name, travel_docs, loyalties = row
-        key = get_person_key(first_name, last_name, '', travel_docs)
-        if key not in persons:
-            persons[key] = {
-                'FirstName': normalize_name(first_name),
-                'MiddleName': '',
-                'LastName': normalize_name(last_name),
-                'Sex': sex,
-                'BirthDate': '',
-                'TravelDocuments': set(),
-                'LoyaltyNumbers': set(),
-                'TicketNumbers': set(),
-                'BookingCodes': set(),
-                'FlightHistory': set(),
-                'DepartureCities': set(),
-                'ArrivalCities': set(),
-                'LoyaltyPrograms': set(),
-                'Meals': set(),
-                'TravelClasses': set(),
-                'FareBases': set(),
-                'Baggages': set(),
-                'Seats': set(),
-                'Statuses': set(),
-                'DepartureCountries': set(),
-                'ArrivalCountries': set(),
-                'AdditionalInfos': set(),
-                'AgentInfos': set()
-            }
-        person = persons[key]
+def frequent_flyer_profile_records(conn: sqlite3.Connection, rows: RowRange = None) -> Iterator[PersonRecord]:
+    """Yield a person record for every frequent_flyer_profiles row."""
+    cursor = conn.execute("SELECT Nick, Sex, FirstName, LastName, TravelDocuments, Loyalties FROM frequent_flyer_profiles"
+                          + rowid_filter(rows), rows or ())
+    for row in iter_normalized_rows(cursor, (2, 3)):
+        nick, sex, _, _, travel_docs, loyalties, first_name, last_name = row
+        key = normalized_person_key(first_name, last_name, '', travel_docs)
+        values = []
         if travel_docs:
-            person['TravelDocuments'].add(normalize_document(travel_docs))
+            values.append(('TravelDocuments', normalize_document(travel_docs)))
         if loyalties:
-            person['LoyaltyNumbers'].add(normalize_document(loyalties))
-
-    # Pre-fetch frequent_flyer_profiles into a dict for fast lookup
-    profiles: Dict[str, Tuple[str, str, str]] = {}
-    for row in cursor.execute("SELECT Nick, FirstName, LastName, TravelDocuments FROM frequent_flyer_profiles"):
-        nick, first_name, last_name, travel_docs = row
-        profiles[nick] = (normalize_name(first_name), normalize_name(last_name), normalize_document(travel_docs))
-
-    # Process frequent_flyer_flights
-    for row in cursor.execute("SELECT * FROM frequent_flyer_flights"):
-        nick, flight_date, flight, codeshare, dep_city, dep_airport, dep_country, arr_city, arr_airport, arr_country = row
-        # Match by nick in profiles
-        if nick not in profiles:
-            continue
-        first_name, last_name, travel_docs = profiles[nick]
+            values.append(('LoyaltyNumbers', normalize_document(loyalties)))
+        yield key, (first_name, '', last_name, sex, ''), values
+
+def frequent_flyer_flight_records(conn: sqlite3.Connection, rows: RowRange = None) -> Iterator[PersonRecord]:
+    """Yield a person record for every frequent_flyer_flights row whose nick has a profile.
+
+    Flights carry their profile's names, documents and loyalty numbers so that they
+    can be resolved on their own, but in a full run they only extend persons that
+    already exist; they never create one.
+    """
+    for row in conn.execute('''
+        SELECT p.FirstName, p.LastName, p.Sex, p.TravelDocuments, p.Loyalties, f.FlightDate, f.Flight, f.Codeshare,
+               f.DepartureCity, f.DepartureAirport, f.DepartureCountry,
+               f.ArrivalCity, f.ArrivalAirport, f.ArrivalCountry
+        FROM frequent_flyer_flights f
+        JOIN frequent_flyer_profiles p ON p.Nick = f.NickName
+    ''' + rowid_filter(rows, 'f'), rows or ()):
+        first_name, last_name, sex, travel_docs, loyalties, flight_date, flight, codeshare, dep_city, dep_airport, dep_country, arr_city, arr_airport, arr_country = row
         key = get_person_key(first_name, last_name, '', travel_docs)
-        if key not in persons:
-            continue
-        person = persons[key]
         flight_str = f"{flight} {flight_date}"
         if codeshare:
             flight_str += f" ({codeshare})"
-        person['FlightHistory'].add(flight_str)
-        person['DepartureCities'].add(dep_city)
-        person['ArrivalCities'].add(arr_city)
+        values = [('FlightHistory', flight_str), ('DepartureCities', dep_city), ('ArrivalCities', arr_city)]
         if dep_country:
-            person['DepartureCountries'].add(dep_country)
+            values.append(('DepartureCountries', dep_country))
         if arr_country:
-            person['ArrivalCountries'].add(arr_country)
-
-    # Prepare data for batch insert
-    insert_data = []
-    for person in persons.values():
-        insert_data.append((
-            person['FirstName'],
-            person['MiddleName'],
-            person['LastName'],
-            person['Sex'],
-            person['BirthDate'],
-            ','.join(person['TravelDocuments']),
-            ','.join(person['LoyaltyNumbers']),
-            ','.join(person['TicketNumbers']),
-            ','.join(person['BookingCodes']),
-            ','.join(person['FlightHistory']),
-            ','.join(person['DepartureCities']),
-            ','.join(person['ArrivalCities']),
-            ','.join(person['LoyaltyPrograms']),
-            ','.join(person['Meals']),
-            ','.join(person['TravelClasses']),
-            ','.join(person['FareBases']),
-            ','.join(person['Baggages']),
-            ','.join(person['Seats']),
-            ','.join(person['Statuses']),
-            ','.join(person['DepartureCountries']),
-            ','.join(person['ArrivalCountries']),
-            ','.join(person['AdditionalInfos']),
-            ','.join(person['AgentInfos'])
-        ))
-
-    # Batch insert
-    if insert_data:
-        cursor.executemany('''
-            INSERT INTO Person (
-                FirstName, MiddleName, LastName, Sex, BirthDate,
-                TravelDocuments, LoyaltyNumbers, TicketNumbers, BookingCodes,
-                FlightHistory, DepartureCities, ArrivalCities,
-                LoyaltyPrograms, Meals, TravelClasses, FareBases,
-                Baggages, Seats, Statuses, DepartureCountries, ArrivalCountries,
-                AdditionalInfos, AgentInfos
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', insert_data)
+            values.append(('ArrivalCountries', arr_country))
+        if travel_docs:
+            values.append(('TravelDocuments', normalize_document(travel_docs)))
+        if loyalties:
+            values.append(('LoyaltyNumbers', normalize_document(loyalties)))
+        yield key, (key[0], '', key[1], sex, ''), values
 
+# Set columns with few distinct values. Their values are interned while consolidating in
+# memory, so every person shares one copy of each city, meal, class or program string.
+# Columns with many distinct values (fares, seats, documents) would only grow the pool.
+INTERNED_COLUMNS = frozenset(SET_COLUMN_INDEX[column] for column in (
+    'DepartureCities', 'ArrivalCities', 'LoyaltyPrograms', 'Meals', 'TravelClasses',
+    'Baggages', 'Statuses', 'DepartureCountries', 'ArrivalCountries',
+))
 
+class PersonEntry:
+    """Compact in-memory person: the SCALAR_COLUMNS tuple, set columns created on first use
+    and the NAME_ONLY_SOURCES table that created it, if any."""
+    __slots__ = ('scalars', 'sets', 'source')
 
-    conn.commit()
-    conn.close()
+    def __init__(self, scalars: Tuple, source: Optional[str] = None):
+        self.scalars = scalars
+        self.sets: Optional[Dict[int, Set[str]]] = None
+        self.source = source
 
-if __name__ == "__main__":
-    db_path = 'DataBase.db'  # Use 'Persons.db' as per the merge_duplicates call in the query
-    merge_person_data(db_path)
-    merge_duplicates(db_path)
+    def add(self, column: int, value: str) -> None:
+        """Add a value to the set column with the given SET_COLUMNS index."""
+        if self.sets is None:
+            self.sets = {column: {value}}
+            return
+        values = self.sets.get(column)
+        if values is None:
+            self.sets[column] = {value}
+        else:
+            values.add(value)
+
+    def row(self) -> Tuple:
+        """Return the Person row: scalars followed by every set column joined with commas."""
+        sets = self.sets or {}
+        return self.scalars + tuple(','.join(sets.get(i, ())) for i in range(len(SET_COLUMNS)))
+
+def consolidate_in_memory(conn: sqlite3.Connection, ranges: Optional[Dict[str, Tuple[int, int]]] = None,
+                          incremental: bool = False,
+                          sources: Optional[List[Tuple[int, str]]] = None) -> Iterator[Tuple]:
+    """Consolidate all sources in a dict of persons and yield the Person rows.
+
+    Only the rows in ranges are read, when given. When incremental, flights whose
+    profile was consolidated by an earlier run start a person of their own. The
+    (1-based row number, source) of persons created by NAME_ONLY_SOURCES are
+    appended to sources, when given.
+    """
+    ranges = ranges or {}
+    # Dictionary to store person data by matching key
+    persons: Dict[Tuple[str, ...], PersonEntry] = {}
+    interned: Dict[str, str] = {}
+
+    def add_values(person: PersonEntry, values: List[Tuple[str, str]]) -> None:
+        for column, value in values:
+            column = SET_COLUMN_INDEX[column]
+            if column in INTERNED_COLUMNS:
+                value = interned.setdefault(value, value)
+            person.add(column, value)
+
+    def add(records: Iterator[PersonRecord], source: Optional[str] = None) -> None:
+        for key, scalars, values in records:
+            person = persons.get(key)
+            if person is None:
+                person = persons[key] = PersonEntry(scalars, source)
+            add_values(person, values)
+
+    add(boarding_data_records(conn, ranges.get('boarding_data')), 'boarding_data')
+
+    # Boarding passes join the first person with the same name, or start a new one
+    name_to_first_key: Dict[Tuple[str, str], Tuple[str, ...]] = {}
+    for key in persons:
+        name_to_first_key.setdefault((key[0], key[1]), key)
+    for key, scalars, values in boarding_pass_xls_records(conn, ranges.get('boarding_pass_xls')):
+        name = (key[0], key[1])
+        if name not in name_to_first_key:
+            persons[key] = PersonEntry(scalars, 'boarding_pass_xls')
+            name_to_first_key[name] = key
+        add_values(persons[name_to_first_key[name]], values)
+    del name_to_first_key
+
+    add(sirena_data_records(conn, ranges.get('sirena_data')))
+    add(pointz_aggregator_records(conn, ranges.get('pointz_aggregator_data')))
+    add(frequent_flyer_profile_records(conn, ranges.get('frequent_flyer_profiles')))
+
+    flights = frequent_flyer_flight_records(conn, ranges.get('frequent_flyer_flights'))
+    if incremental:
+        add(flights)
+    else:
+        for key, _, values in flights:
+            person = persons.get(key)
+            if person is not None:
+                add_values(person, values)
+
+    for seq, person in enumerate(persons.values(), 1):
+        if sources is not None and person.source:
+            sources.append((seq, person.source))
+        yield person.row()
+
+def spill_records(cursor: sqlite3.Cursor, records: Iterator[PersonRecord], by_name: bool = False,
+                  create_keys: bool = True, source: Optional[str] = None) -> None:
+    """Write person records to the person_keys and person_values spill tables in batches.
+
+    New keys are inserted with their scalars (the first record of a key wins) and
+    each value is stored under its key's KeyID. With by_name, records join the
+    first key with the same first and last name and only create a key when there is
+    none; without create_keys, records for unknown keys are dropped. New keys record
+    source as the table that created them.
+    """
+    if by_name:
+        key_sql = '''
+            INSERT OR IGNORE INTO person_keys (KeyFirst, KeyLast, KeyBirth, KeyDoc,
+                                               FirstName, MiddleName, LastName, Sex, BirthDate, Source)
+            SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
+            WHERE NOT EXISTS (SELECT 1 FROM person_keys WHERE KeyFirst = ? AND KeyLast = ?)
+        '''
+        value_sql = '''
+            INSERT INTO person_values (KeyID, Attribute, Value)
+            SELECT MIN(KeyID), ?, ? FROM person_keys WHERE KeyFirst = ? AND KeyLast = ?
+        '''
+    else:
+        key_sql = '''
+            INSERT OR IGNORE INTO person_keys (KeyFirst, KeyLast, KeyBirth, KeyDoc,
+                                               FirstName, MiddleName, LastName, Sex, BirthDate, Source)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        '''
+        value_sql = '''
+            INSERT INTO person_values (KeyID, Attribute, Value)
+            SELECT KeyID, ?, ? FROM person_keys
+            WHERE KeyFirst = ? AND KeyLast = ? AND KeyBirth = ? AND KeyDoc = ?
+        '''
+    key_rows = []
+    value_rows = []
+
+    def flush() -> None:
+        if key_rows:
+            cursor.executemany(key_sql, key_rows)
+            key_rows.clear()
+        if value_rows:
+            cursor.executemany(value_sql, value_rows)
+            value_rows.clear()
+
+    for key, scalars, values in records:
+        match = key[:2] if by_name else key
+        if create_keys:
+            key_rows.append((*key, *scalars, source, *match) if by_name else (*key, *scalars, source))
+        value_rows.extend((SET_COLUMN_INDEX[column], value, *match) for column, value in values)
+        if len(value_rows) >= SPILL_BATCH_SIZE:
+            flush()
+    flush()
+
+def consolidate_on_disk(conn: sqlite3.Connection, ranges: Optional[Dict[str, Tuple[int, int]]] = None,
+                        incremental: bool = False) -> None:
+    """Consolidate all sources through temporary tables and insert the result into Person.
+
+    Records are projected into person_values (KeyID, attribute, value) rows on disk,
+    and each person's sets are built by a single sort/GROUP BY pass, so memory use
+    does not grow with the number of passengers. Persons get the same PersonID order
+    as consolidate_in_memory; ranges and incremental work as they do there. Persons
+    created by NAME_ONLY_SOURCES are recorded in the new_person_sources table.
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TEMP TABLE person_keys (
+            KeyID INTEGER PRIMARY KEY,
+            KeyFirst TEXT,
+            KeyLast TEXT,
+            KeyBirth TEXT,
+            KeyDoc TEXT,
+            FirstName TEXT,
+            MiddleName TEXT,
+            LastName TEXT,
+            Sex TEXT,
+            BirthDate TEXT,
+            Source TEXT,
+            UNIQUE (KeyFirst, KeyLast, KeyBirth, KeyDoc)
+        )
+    ''')
+    cursor.execute("CREATE TEMP TABLE person_values (KeyID INTEGER, Attribute INTEGER, Value TEXT)")
+
+    ranges = ranges or {}
+    spill_records(cursor, boarding_data_records(conn, ranges.get('boarding_data')), source='boarding_data')
+    spill_records(cursor, boarding_pass_xls_records(conn, ranges.get('boarding_pass_xls')), by_name=True,
+                  source='boarding_pass_xls')
+    spill_records(cursor, sirena_data_records(conn, ranges.get('sirena_data')))
+    spill_records(cursor, pointz_aggregator_records(conn, ranges.get('pointz_aggregator_data')))
+    spill_records(cursor, frequent_flyer_profile_records(conn, ranges.get('frequent_flyer_profiles')))
+    spill_records(cursor, frequent_flyer_flight_records(conn, ranges.get('frequent_flyer_flights')),
+                  create_keys=incremental)
+
+    set_columns = ',\n               '.join(
+        f"COALESCE(MAX(CASE WHEN v.Attribute = {i} THEN v.Items END), '')" for i in range(len(SET_COLUMNS)))
+    cursor.execute(f'''
+        INSERT INTO Person ({', '.join(SCALAR_COLUMNS + SET_COLUMNS)})
+        SELECT k.FirstName, k.MiddleName, k.LastName, k.Sex, k.BirthDate,
+               {set_columns}
+        FROM person_keys k
+        LEFT JOIN (
+            SELECT KeyID, Attribute, GROUP_CONCAT(Value, ',') AS Items
+            FROM (SELECT DISTINCT KeyID, Attribute, Value FROM person_values ORDER BY KeyID, Attribute)
+            GROUP BY KeyID, Attribute
+        ) v ON v.KeyID = k.KeyID
+        GROUP BY k.KeyID
+        ORDER BY k.KeyID
+    ''')
+    cursor.execute('''
+        INSERT INTO new_person_sources (Seq, Source)
+        SELECT Seq, Source FROM (SELECT ROW_NUMBER() OVER (ORDER BY KeyID) AS Seq, Source FROM person_keys)
+        WHERE Source IS NOT NULL
+    ''')
+    cursor.execute("DROP TABLE person_values")
+    cursor.execute("DROP TABLE person_keys")
+
+def merge_person_data(db_path: str, spill: bool = MERGE_SPILL_TO_DISK, incremental: bool = False) -> int:
+    """Merge data from multiple tables into a single Person table.
+
+    With spill the persons are consolidated in temporary tables on disk instead of in memory.
+    When incremental, only source rows added since the previous run are consolidated.
+    Returns the largest PersonID before this run, so that later ones are the new persons.
+    """
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
-    cursor.execute("VACUUM")
-    cursor.execute("DELETE FROM Person WHERE PersonID = (SELECT MAX(PersonID) FROM Person)")
-    print("The last row has been deleted successfully.")
+
+    # Create the Person table and its identity key tables
+    create_person_table(cursor)
+    ensure_identity_keys(cursor)
+    create_unification_marks_table(cursor)
+    last_id = cursor.execute("SELECT COALESCE(MAX(PersonID), 0) FROM Person").fetchone()[0]
+    ranges = source_row_ranges(cursor, incremental)
+    conn.commit()
+    # Set before any temporary table exists, as changing it drops them
+    cursor.execute("PRAGMA temp_store = FILE")
+    cursor.execute("CREATE TEMP TABLE new_person_sources (Seq INTEGER PRIMARY KEY, Source TEXT NOT NULL)")
+
+    if spill:
+        consolidate_on_disk(conn, ranges, incremental)
+    else:
+        # Batch insert, streaming the rows straight from the consolidated persons
+        sources: List[Tuple[int, str]] = []
+        cursor.executemany(f'''
+            INSERT INTO Person ({', '.join(SCALAR_COLUMNS + SET_COLUMNS)})
+            VALUES ({', '.join('?' for _ in SCALAR_COLUMNS + SET_COLUMNS)})
+        ''', consolidate_in_memory(conn, ranges, incremental, sources))
+        cursor.executemany("INSERT INTO new_person_sources (Seq, Source) VALUES (?, ?)", sources)
+    add_identity_keys(cursor, conn.execute(f"SELECT {IDENTITY_KEY_SOURCE} FROM Person WHERE PersonID > ?", (last_id,)))
+    # New persons are numbered in insertion order, which is their PersonID order
+    cursor.execute('''
+        INSERT OR IGNORE INTO person_name_only (LastName, FirstName, PersonID, Source)
+        SELECT p.LastName, p.FirstName, p.PersonID, s.Source
+        FROM (SELECT PersonID, LastName, FirstName, ROW_NUMBER() OVER (ORDER BY PersonID) AS Seq
+              FROM Person WHERE PersonID > ?) p
+        JOIN new_person_sources s ON s.Seq = p.Seq
+        WHERE p.LastName != ''
+    ''', (last_id,))
+    cursor.execute("DROP TABLE new_person_sources")
+    # The new persons are indexed above, so the insert trigger's marks are not needed
+    cursor.execute("DELETE FROM person_identity_stale WHERE PersonID > ?", (last_id,))
+    save_unification_marks(cursor, ranges)
+
     conn.commit()
     conn.close()
+    return last_id
+
+def unify_incremental(db_path: str, fuzzy: bool = MERGE_FUZZY, spill: bool = MERGE_SPILL_TO_DISK) -> None:
+    """Unify the source rows added since the previous run into the existing persons."""
+    last_id = merge_person_data(db_path, spill, incremental=True)
+    # The first run has nothing to resolve against, so it merges the whole table
+    merge_duplicates(db_path, fuzzy, since_id=last_id or None)
+
+if __name__ == "__main__":
+    db_path = 'DataBase.db'  # Use 'Persons.db' as per the merge_duplicates call in the query
+    if UNIFY_INCREMENTAL:
+        unify_incremental(db_path)
+    else:
+        merge_person_data(db_path)
+        merge_duplicates(db_path)
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        cursor.execute("VACUUM")
+        cursor.execute("DELETE FROM Person WHERE PersonID = (SELECT MAX(PersonID) FROM Person)")
+        print("The last row has been deleted successfully.")
+        conn.commit()
+        conn.close()
     print("Database unified successfully.")
\ No newline at end of file
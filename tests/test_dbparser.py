@@ -0,0 +1,296 @@
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import openpyxl
+import pytest
+
+import DBParser
+
+def test_iter_prefetched_returns_when_consumer_stops_on_a_full_queue():
+    finished = threading.Event()
+
+    def consume():
+        for _ in DBParser.iter_prefetched(range(2), 'test', maxsize=1):
+            # Let the producer fill the queue and reach its end-of-items sentinel
+            time.sleep(0.3)
+            break
+        finished.set()
+
+    threading.Thread(target=consume, daemon=True).start()
+    assert finished.wait(5)
+
+def test_ambiguous_dates_parse_the_same_whatever_was_parsed_before():
+    DBParser.parse_epoch_day.cache_clear()
+    DBParser.epoch_day('12/31/2017')
+    day_first = DBParser.epoch_day('03/04/2017')
+    DBParser.parse_epoch_day.cache_clear()
+    assert DBParser.epoch_day('03/04/2017') == day_first == DBParser.epoch_day('2017-04-03')
+
+def write_boarding_pass_workbook(path):
+    wb = openpyxl.Workbook()
+    first = wb.active
+    first['A3'], first['B3'], first['F3'], first['H3'] = 'MR', 'IVAN PETROV', 'SU 123456789', 'Y'
+    first['A5'], first['D5'], first['H5'] = 'SU1234', 'Moscow', 'Sochi'
+    first['D7'], first['H7'] = 'SVO', 'AER'
+    first['A9'], first['C9'] = '2017-04-03', '10:30'
+    first['B13'], first['E13'] = 'ABC123', 5552345678901
+    second = wb.create_sheet()
+    second['A3'], second['B3'], second['H3'] = 'MS', 'ANNA IVANOVA', 'J'
+    second['A5'], second['D5'] = 1234, 'Kazan'
+    second['D7'], second['H7'] = 'KZN', 'LED'
+    second['A9'], second['C9'] = '2017-04-05', '7:05'
+    second['B13'], second['E13'] = '123456', 4.5
+    wb.create_sheet()
+    wb.save(path)
+
+def test_fast_boarding_pass_extractor_stores_what_pandas_stores(tmp_path):
+    path = tmp_path / 'boarding_passes.xlsx'
+    write_boarding_pass_workbook(path)
+    pandas_rows = DBParser.extract_boarding_pass_rows(path)
+    fast_rows = DBParser.extract_boarding_pass_rows_fast(path)
+    assert len(fast_rows) == len(pandas_rows) == 2
+    assert [[(type(value), repr(value)) for value in row] for row in fast_rows] == \
+           [[(type(value), repr(value)) for value in row] for row in pandas_rows]
+    assert [DBParser.row_fingerprint(row) for row in fast_rows] == \
+           [DBParser.row_fingerprint(row) for row in pandas_rows]
+
+def test_checkpoints_of_unplanned_and_finished_sources_are_cleared():
+    cursor = sqlite3.connect(':memory:').cursor()
+    DBParser.create_ingest_manifest_table(cursor)
+    DBParser.create_ingest_checkpoints_table(cursor)
+    for source in ('csv', 'pdf'):
+        cursor.execute("INSERT INTO ingest_manifest (Path, Source, RowsLoaded) VALUES (?, ?, 1)", (source, source))
+        cursor.execute("INSERT INTO ingest_checkpoints (Source, Action, SHA256, Position, RowsLoaded) "
+                       "VALUES (?, 'reload', '', 1, 1)", (source,))
+
+    DBParser.drop_unplanned_checkpoints(cursor, ['csv'])
+    assert cursor.execute("SELECT Source FROM ingest_checkpoints").fetchall() == [('csv',)]
+    assert cursor.execute("SELECT Source FROM ingest_manifest").fetchall() == [('csv',)]
+
+    DBParser.record_source_load(cursor, 'csv', DBParser.SourcePlan('load'), 1)
+    assert cursor.execute("SELECT COUNT(*) FROM ingest_checkpoints").fetchone() == (0,)
+
+SKYTEAM_YAML = '''2017-01-01:
+  SU100:
+    FROM: SVO
+    TO: AER
+    STATUS: true
+    FF:
+      SU 123: {CLASS: Y, FARE: 1.50}
+      SU 124: {CLASS: '0012', FARE: 0012}
+  SU101:
+    FROM: AER
+    TO: SVO
+    STATUS: Cancelled
+    FF:
+      SU 125: {CLASS: ~, FARE: 1e3}
+'2017-01-02':
+  AF200:
+    FROM: CDG
+    FF:
+      FB 1: {CLASS: J, FARE: "7"}
+'''
+
+def load_skyteam_rows(parse, yaml_file, **kwargs):
+    cursor = sqlite3.connect(':memory:').cursor()
+    DBParser.create_source_tables(cursor, 'yaml')
+    parse(cursor, str(yaml_file), **kwargs)
+    return cursor.execute(f"SELECT {', '.join(DBParser.SKYTEAM_DATA_COLUMNS)}, RowHash "
+                          f"FROM skyteam_data ORDER BY RowHash").fetchall()
+
+def test_streaming_yaml_stores_what_the_safe_loader_stores(tmp_path):
+    yaml_file = tmp_path / 'skyteam.yaml'
+    yaml_file.write_text(SKYTEAM_YAML, encoding='utf-8')
+    loaded = load_skyteam_rows(DBParser.parse_yaml_file, yaml_file)
+    assert len(loaded) == 4
+    assert load_skyteam_rows(DBParser.parse_yaml_file_streaming, yaml_file, use_cache=False) == loaded
+    # The second streaming run reads the row cache written by the first
+    assert load_skyteam_rows(DBParser.parse_yaml_file_streaming, yaml_file, use_cache=True) == loaded
+    assert load_skyteam_rows(DBParser.parse_yaml_file_streaming, yaml_file, use_cache=True) == loaded
+
+def test_replacing_an_identical_profile_keeps_its_rowid():
+    cursor = sqlite3.connect(':memory:').cursor()
+    DBParser.create_source_tables(cursor, 'json')
+    for loyalties in ('SU123', 'SU123', 'FB555'):
+        with DBParser.BatchWriter(cursor, 'frequent_flyer_profiles', DBParser.FREQUENT_FLYER_PROFILE_COLUMNS,
+                                  verb='INSERT OR REPLACE') as writer:
+            writer.add(('ivan', 'M', 'Ivan', 'Petrov', '1234567', loyalties))
+        if loyalties == 'SU123':
+            assert cursor.execute("SELECT rowid FROM frequent_flyer_profiles").fetchall() == [(1,)]
+    assert cursor.execute("SELECT rowid, Loyalties FROM frequent_flyer_profiles").fetchall() == [(2, 'FB555')]
+
+VALID_FORUM_JSON = [
+    '{"Forum Profiles": [{"NickName": "ivan", "Loyality Programm": [12, 3.5e2]}, [], "\\u0436", -7]}',
+    '{"Meta": {"Rows": [1, 2]}, "Forum Profiles": [], "Tail": null}\n',
+    ' { "Other" : "x" , "Forum Profiles" : [ 1 , {"a": [true, false]} ] } \r\n',
+    '{}',
+]
+
+INVALID_FORUM_JSON = [
+    '{"Forum Profiles": [1 2]}',
+    '{"Forum Profiles": [1, 2]} trailing',
+    '{"Forum Profiles": [1, 2]}{}',
+    '{"Forum Profiles": [1, 2,]}',
+    '{"Forum Profiles": [1, 2]',
+    '{"Other": 1 "Forum Profiles": [1]}',
+    '{"Forum Profiles": [1], }',
+    '{1: [1]}',
+]
+
+@pytest.mark.parametrize('text', VALID_FORUM_JSON)
+def test_json_stream_matches_json_load_at_every_chunk_size(text):
+    expected = json.loads(text).get('Forum Profiles', [])
+    for chunk_size in range(1, len(text) + 1):
+        assert list(DBParser.iter_json_array_items(io.StringIO(text), 'Forum Profiles', chunk_size)) == expected
+
+@pytest.mark.parametrize('text', INVALID_FORUM_JSON)
+def test_json_stream_rejects_what_json_load_rejects(text):
+    with pytest.raises(ValueError):
+        json.loads(text)
+    for chunk_size in range(1, len(text) + 1):
+        with pytest.raises(ValueError):
+            list(DBParser.iter_json_array_items(io.StringIO(text), 'Forum Profiles', chunk_size))
+
+def sirena_line(*values):
+    return ''.join(value.ljust(end - start) for value, (_, start, end) in zip(values, DBParser.SIRENA_COLSPECS))
+
+def write_sirena_file(path, newline):
+    lines = [
+        'HEADER',
+        sirena_line('PETROV IVAN', '1990-01-01', '2017-02-01', '11:00', '2017-02-01', '13:00', 'SU2', 'SVO',
+                    'AER', 'XYZ', 'T2', '1234567', '1A', 'VGML', 'Y', 'YFARE', '1PC', 'Wheelchair', 'Agent 1'),
+        '',
+        sirena_line('ЖУКОВА ÖLGA', '1985-05-05', '2017-03-01') + '   ',  # unicode, short line
+        sirena_line('SHORT'),
+        sirena_line('LONG', *('x' * 20 for _ in range(18))) + 'beyond the layout',
+    ]
+    data = newline.join(lines).encode('utf-8')
+    data += newline.encode() + b'BAD \xff\xfe LINE' + newline.encode()
+    data += sirena_line('LAST', '2000-01-01').encode('utf-8')  # no final newline
+    path.write_bytes(data)
+
+def load_sirena(parse, tab_file, **kwargs):
+    cursor = sqlite3.connect(':memory:').cursor()
+    DBParser.create_source_tables(cursor, 'tab')
+    DBParser.create_ingest_rejects_table(cursor)
+    parse(cursor, str(tab_file), **kwargs)
+    columns = ', '.join(name for name, _, _ in DBParser.SIRENA_COLSPECS)
+    return (cursor.execute(f"SELECT {columns} FROM sirena_data ORDER BY rowid").fetchall(),
+            cursor.execute("SELECT LineNumber, Reason, Payload FROM ingest_rejects").fetchall())
+
+@pytest.mark.parametrize('newline', ['\n', '\r\n'])
+def test_chunked_tab_parser_matches_the_line_parser(tmp_path, newline):
+    tab_file = tmp_path / 'sirena.tab'
+    write_sirena_file(tab_file, newline)
+    rows, rejects = load_sirena(DBParser.parse_tab_file, tab_file)
+    assert len(rows) == 5
+    assert rejects == [(7, 'invalid UTF-8', 'BAD �� LINE')]
+    for chunk_size in (1, 100, 500, 1 << 20):
+        assert load_sirena(DBParser.parse_tab_file_chunked, tab_file, chunk_size=chunk_size) == (rows, rejects)
+
+CSV_HEADER = ('PassengerFirstName;PassengerSecondName;PassengerLastName;PassengerSex;PassengerBirthDate;'
+              'PassengerDocument;BookingCode;TicketNumber;Baggage;FlightDate;FlightTime;FlightNumber;'
+              'CodeShare;Destination\n')
+
+def csv_rows(first, count):
+    return ''.join(f'NAME{n};;PETROV;M;1990-01-01;DOC{n};BC{n};T{n};1PC;2017-01-01;10:00;SU{n};;LED\n'
+                   for n in range(first, first + count))
+
+@pytest.fixture
+def csv_source(tmp_path, monkeypatch):
+    csv_file = tmp_path / 'boarding.csv'
+    monkeypatch.setattr(DBParser, 'CSV_FILE', str(csv_file))
+    monkeypatch.setitem(DBParser.SOURCE_FILES, 'csv', str(csv_file))
+    return csv_file
+
+def ingest_database(path):
+    conn, cursor = DBParser.create_database_connection(str(path))
+    DBParser.create_source_tables(cursor, 'csv')
+    DBParser.create_ingest_manifest_table(cursor)
+    DBParser.create_ingest_rejects_table(cursor)
+    DBParser.create_ingest_checkpoints_table(cursor)
+    return conn, cursor
+
+def test_plan_follows_how_the_file_changed(tmp_path, csv_source):
+    conn, cursor = ingest_database(tmp_path / 'plan.db')
+    csv_source.write_text(CSV_HEADER + csv_rows(1, 3), encoding='utf-8')
+    plan = DBParser.plan_source_load(cursor, 'csv', False)
+    assert plan.action == 'reload'
+    DBParser.record_source_load(cursor, 'csv', plan, 3)
+
+    assert DBParser.plan_source_load(cursor, 'csv', False).action == 'skip'
+    # Rewritten with the same bytes: only the digest shows nothing changed
+    os.utime(csv_source, (0, 0))
+    assert DBParser.plan_source_load(cursor, 'csv', False).action == 'skip'
+    assert DBParser.plan_source_load(cursor, 'csv', True).action == 'reload'
+
+    old_size = csv_source.stat().st_size
+    with open(csv_source, 'a', encoding='utf-8') as file:
+        file.write(csv_rows(4, 2))
+    plan = DBParser.plan_source_load(cursor, 'csv', False)
+    assert (plan.action, plan.start_offset) == ('append', old_size)
+    DBParser.record_source_load(cursor, 'csv', plan, 2)
+    assert cursor.execute("SELECT RowsLoaded FROM ingest_manifest").fetchall() == [(5,)]
+
+    csv_source.write_text(CSV_HEADER + csv_rows(1, 1) + csv_rows(9, 5), encoding='utf-8')
+    assert DBParser.plan_source_load(cursor, 'csv', False).action == 'reload'
+    conn.close()
+
+def load_csv_like_main(conn, cursor):
+    plan = DBParser.resume_from_checkpoint(cursor, 'csv', DBParser.plan_source_load(cursor, 'csv', False))
+    if plan.action == 'reload' and plan.checkpoint is None:
+        DBParser.clear_source_tables(cursor, 'csv')
+    rows_loaded = DBParser.load_source(conn, cursor, 'csv', plan)
+    DBParser.record_source_load(cursor, 'csv', plan, rows_loaded)
+    conn.commit()
+    return plan
+
+def test_interrupted_load_resumes_at_its_checkpoint(tmp_path, csv_source, monkeypatch):
+    csv_source.write_text(CSV_HEADER + csv_rows(1, 6), encoding='utf-8')
+    conn, cursor = ingest_database(tmp_path / 'clean.db')
+    load_csv_like_main(conn, cursor)
+    expected = cursor.execute("SELECT * FROM boarding_data ORDER BY rowid").fetchall()
+    conn.close()
+
+    conn, cursor = ingest_database(tmp_path / 'resumed.db')
+    monkeypatch.setattr(DBParser, 'CHECKPOINT_INTERVAL', 0)
+    save = DBParser.Checkpointer.save
+
+    def save_then_crash(self, position, marker=None):
+        save(self, position, marker)
+        if self.saves == 2:
+            raise RuntimeError('interrupted')
+
+    monkeypatch.setattr(DBParser.Checkpointer, 'save', save_then_crash)
+    with pytest.raises(RuntimeError):
+        load_csv_like_main(conn, cursor)
+    conn.rollback()
+    assert cursor.execute("SELECT COUNT(*) FROM boarding_data").fetchone() == (2,)
+    assert cursor.execute("SELECT RowsLoaded FROM ingest_checkpoints").fetchall() == [(2,)]
+
+    monkeypatch.setattr(DBParser.Checkpointer, 'save', save)
+    plan = load_csv_like_main(conn, cursor)
+    assert plan.checkpoint.rows_loaded == 2
+    assert cursor.execute("SELECT * FROM boarding_data ORDER BY rowid").fetchall() == expected
+    assert cursor.execute("SELECT RowsLoaded FROM ingest_manifest").fetchall() == [(6,)]
+    assert cursor.execute("SELECT COUNT(*) FROM ingest_checkpoints").fetchone() == (0,)
+    conn.close()
+
+def test_indexes_are_dropped_before_full_loads_and_large_appends():
+    cursor = sqlite3.connect(':memory:').cursor()
+    DBParser.create_ingest_manifest_table(cursor)
+    assert DBParser.is_bulk_load(cursor, 'csv', DBParser.SourcePlan('load'))
+    assert DBParser.is_bulk_load(cursor, 'csv', DBParser.SourcePlan('reload', files={'a.csv': (100, 0.0, '')}))
+    small = DBParser.SourcePlan('append', start_offset=1000, files={'a.csv': (1100, 0.0, '')})
+    large = DBParser.SourcePlan('append', start_offset=1000, files={'a.csv': (1500, 0.0, '')})
+    assert not DBParser.is_bulk_load(cursor, 'csv', small)
+    assert DBParser.is_bulk_load(cursor, 'csv', large)
+
+    cursor.executemany("INSERT INTO ingest_manifest (Path, Source) VALUES (?, 'xls')",
+                       [(f'{n}.xlsx',) for n in range(10)] + [(DBParser.XLS_DIR,)])
+    assert not DBParser.is_bulk_load(cursor, 'xls', DBParser.SourcePlan('append', xls_files=['a.xlsx']))
+    assert DBParser.is_bulk_load(cursor, 'xls', DBParser.SourcePlan('append', xls_files=['a.xlsx', 'b.xlsx']))
@@ -0,0 +1,251 @@
+import random
+import sqlite3
+
+import numpy as np
+import pytest
+
+import DBParser
+import DBUnifier
+
+SOURCE_SCHEMAS = {
+    'boarding_data': ('PassengerFirstName', 'PassengerSecondName', 'PassengerLastName', 'PassengerSex',
+                      'PassengerBirthDate', 'PassengerDocument', 'BookingCode', 'TicketNumber', 'Baggage',
+                      'FlightDate', 'FlightTime', 'FlightNumber', 'CodeShare', 'Destination'),
+    'boarding_pass_xls': ('PassengerTitle', 'PassengerName', 'LoyaltyProgram', 'LoyaltyNumber', 'FareClass',
+                          'FlightNumber', 'DepartureCity', 'ArrivalCity', 'DepartureAirport', 'ArrivalAirport',
+                          'FlightDate', 'FlightTime', 'PNR', 'ETicket'),
+    'sirena_data': ('PaxName', 'PaxBirthDate', 'DepartDate', 'DepartTime', 'ArrivalDate', 'ArrivalTime',
+                    'FlightCode', 'FromAirport', 'Dest', 'Code', 'e_Ticket', 'TravelDoc', 'Seat', 'Meal',
+                    'TrvCls', 'Fare', 'Baggage', 'PaxAdditionalInfo', 'AgentInfo'),
+    'pointz_aggregator_data': ('UserUID', 'FirstName', 'LastName', 'CardNumber', 'BonusProgramm',
+                               'FlightCode', 'FlightDate', 'Departure', 'Arrival', 'Fare'),
+    'frequent_flyer_profiles': ('Nick', 'Sex', 'FirstName', 'LastName', 'TravelDocuments', 'Loyalties'),
+    'frequent_flyer_flights': ('NickName', 'FlightDate', 'Flight', 'Codeshare', 'DepartureCity',
+                               'DepartureAirport', 'DepartureCountry', 'ArrivalCity', 'ArrivalAirport',
+                               'ArrivalCountry'),
+}
+
+FIRST_BATCH = [
+    ('boarding_data', ('Иван', 'Г', 'Петров', 'M', '1990-01-01', '1234 567', 'ABC', 'T1', '1PC',
+                       '2017-01-01', '10:00', 'SU1', '', 'LED')),
+    ('pointz_aggregator_data', ('u1', 'IVAN', 'PETROV', 'SU123', 'SU', 'SU3', '2017-03-01', 'MOW', 'KZN', 'Y')),
+    ('boarding_pass_xls', ('MS', 'SMIRNOVA ANNA', 'SU', 'SU777', 'Y', 'SU6', 'MOW', 'LED', 'SVO', 'LED',
+                           '2017-09-01', '10:00', 'QQQ', 'T6')),
+    ('frequent_flyer_profiles', ('ivan', 'M', 'Ivan', 'Petrov', '1234567', 'SU123')),
+]
+
+SECOND_BATCH = [
+    # Two more members named Ivan Petrov with their own cards and documents
+    ('pointz_aggregator_data', ('u2', 'IVAN', 'PETROV', 'SU999', 'SU', 'SU7', '2017-07-01', 'MOW', 'OVB', 'Y')),
+    ('frequent_flyer_profiles', ('petrov2', 'M', 'Ivan', 'Petrov', '7654321', 'FB555')),
+    ('sirena_data', ('PETROV IVAN', '1990-01-01', '2017-02-01', '11:00', '2017-02-01', '13:00', 'SU2', 'SVO',
+                     'AER', 'XYZ', 'T2', '1234567', '1A', 'VGML', 'Y', 'YFARE', '1PC', '', '')),
+    ('frequent_flyer_flights', ('ivan', '2017-04-01', 'SU4', '', 'MOW', 'SVO', 'RU', 'LED', 'LED', 'RU')),
+    ('boarding_data', ('Anna', '', 'Smirnova', 'F', '1985-05-05', '9999 111', 'QQQ', 'T9', '',
+                       '2017-05-01', '09:00', 'SU9', '', 'AER')),
+]
+
+def create_sources(path):
+    conn = sqlite3.connect(path)
+    for table, columns in SOURCE_SCHEMAS.items():
+        conn.execute(f"CREATE TABLE {table} ({', '.join(columns)})")
+    conn.commit()
+    conn.close()
+
+def ingest(path, rows):
+    conn = sqlite3.connect(path)
+    for table, row in rows:
+        conn.execute(f"INSERT INTO {table} VALUES ({', '.join('?' for _ in row)})", row)
+    conn.commit()
+    conn.close()
+
+def persons(path):
+    """Person rows without their PersonID, with every set column sorted."""
+    conn = sqlite3.connect(path)
+    rows = conn.execute(f"SELECT {', '.join(DBUnifier.SCALAR_COLUMNS + DBUnifier.SET_COLUMNS)} FROM Person")
+    scalars = len(DBUnifier.SCALAR_COLUMNS)
+    result = sorted(row[:scalars] + tuple(','.join(sorted(value.split(','))) for value in row[scalars:])
+                    for row in rows)
+    conn.close()
+    return result
+
+def unify_in_two_batches(tmp_path, first, second, spill):
+    incremental = str(tmp_path / 'incremental.db')
+    full = str(tmp_path / 'full.db')
+    for path in (incremental, full):
+        create_sources(path)
+    ingest(incremental, first)
+    DBUnifier.unify_incremental(incremental, spill=spill)
+    ingest(incremental, second)
+    DBUnifier.unify_incremental(incremental, spill=spill)
+
+    ingest(full, first + second)
+    DBUnifier.merge_person_data(full, spill)
+    DBUnifier.merge_duplicates(full)
+    return persons(incremental), persons(full)
+
+@pytest.mark.parametrize('spill', [True, False])
+def test_incremental_unification_matches_full_run(tmp_path, spill):
+    incremental, full = unify_in_two_batches(tmp_path, FIRST_BATCH, SECOND_BATCH, spill)
+    assert incremental == full
+    assert len(full) == 4
+
+def person_table(path):
+    """Person rows in PersonID order, with every set column sorted, and the identity key tables."""
+    conn = sqlite3.connect(path)
+    scalars = 1 + len(DBUnifier.SCALAR_COLUMNS)
+    rows = [row[:scalars] + tuple(','.join(sorted(value.split(','))) for value in row[scalars:])
+            for row in conn.execute(f"SELECT PersonID, {', '.join(DBUnifier.SCALAR_COLUMNS + DBUnifier.SET_COLUMNS)} "
+                                    f"FROM Person ORDER BY PersonID")]
+    keys = {table: conn.execute(f"SELECT * FROM {table} ORDER BY 1, 2").fetchall()
+            for table in DBUnifier.IDENTITY_KEY_TABLES}
+    conn.close()
+    return rows, keys
+
+def test_spilled_consolidation_matches_in_memory(tmp_path):
+    spilled = str(tmp_path / 'spilled.db')
+    in_memory = str(tmp_path / 'in_memory.db')
+    for path, spill in ((spilled, True), (in_memory, False)):
+        create_sources(path)
+        ingest(path, FIRST_BATCH + SECOND_BATCH + FIRST_BATCH)
+        DBUnifier.merge_person_data(path, spill)
+    assert person_table(spilled) == person_table(in_memory)
+    assert len(person_table(spilled)[0]) > 4
+
+def test_identity_keys_follow_person_updates(tmp_path):
+    path = str(tmp_path / 'update.db')
+    create_sources(path)
+    ingest(path, FIRST_BATCH)
+    DBUnifier.merge_person_data(path)
+    DBUnifier.merge_duplicates(path)
+
+    conn = sqlite3.connect(path)
+    [pid] = DBUnifier.persons_holding(conn, document='1234567')
+    conn.execute("UPDATE Person SET TravelDocuments = 'NEW1', BirthDate = '1991-02-02' WHERE PersonID = ?", (pid,))
+    assert DBUnifier.persons_holding(conn, document='1234567') == []
+    assert DBUnifier.persons_holding(conn, document='NEW 1') == [pid]
+    assert conn.execute("SELECT BirthDate FROM person_name_births WHERE PersonID = ?", (pid,)).fetchall() == [
+        ('1991-02-02',)]
+    conn.close()
+
+def test_reloaded_source_is_unified_in_full(tmp_path):
+    path = str(tmp_path / 'reload.db')
+    create_sources(path)
+    ingest(path, FIRST_BATCH)
+    DBUnifier.unify_incremental(path)
+
+    # A reload empties the table, so its rowids start over below the stored mark
+    conn = sqlite3.connect(path)
+    DBParser.create_ingest_rejects_table(conn.cursor())
+    DBParser.clear_source_tables(conn.cursor(), 'xml')
+    conn.commit()
+    conn.close()
+    ingest(path, [('pointz_aggregator_data', ('u3', 'OLGA', 'IVANOVA', 'SU321', 'SU', 'SU8', '2017-08-01',
+                                              'MOW', 'LED', 'Y'))])
+    DBUnifier.unify_incremental(path)
+
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT LoyaltyNumbers FROM Person WHERE LastName = 'IVANOVA'").fetchall() == [('SU321',)]
+    conn.close()
+
+def naive_components(n, edges):
+    parent = list(range(n))
+
+    def find(x):
+        while parent[x] != x:
+            x = parent[x]
+        return x
+
+    for a, b in edges:
+        parent[find(a)] = find(b)
+    groups = {}
+    for x in range(n):
+        groups.setdefault(find(x), []).append(x)
+    return sorted(group for group in groups.values() if len(group) > 1)
+
+def test_union_edges_matches_a_naive_union_find():
+    rng = random.Random(20)
+    for _ in range(300):
+        n = rng.randint(1, 60)
+        edges = [(rng.randrange(n), rng.randrange(n)) for _ in range(rng.randint(0, 2 * n))]
+        uf = DBUnifier.UnionFind(n)
+        uf.union_edges(np.array([a for a, _ in edges], dtype=np.int64), np.array([b for _, b in edges], dtype=np.int64))
+        assert sorted(component.tolist() for component in uf.components()) == naive_components(n, edges)
+        roots = uf.roots()
+        assert all(uf.size[root] == np.count_nonzero(roots == root) for root in set(roots.tolist()))
+
+def test_fuzzy_pairs_join_name_variants_with_the_same_birth_date():
+    birth = '1990-01-01'
+    rows = [
+        (1, 'SHCHERBAKOVA', birth, 'OLGA'), (2, 'SCHERBAKOVA', birth, 'O'),  # transliteration, initial
+        (3, 'ALEKSANDROV', birth, 'YURY'), (4, 'ALEXANDROV', birth, 'IURII'),  # transliteration
+        (5, 'KONSTANTINOVA', birth, 'ANNA'), (6, 'KONSTANTINOVNA', birth, ''),  # typo, no first name
+        (7, 'SCHERBAKOVA', '1991-01-01', 'OLGA'),  # other birth date
+        (8, 'SIDOROV', birth, 'IVAN'), (9, 'SIDOROVA', birth, 'MARIA'),  # other first name
+        (10, 'ALEXANDROV', birth, 'PETR'),  # other first name
+        (11, 'KUZNETSOVA', birth, 'ANNA'), (12, 'KUZNETOSVA', birth, 'ANNA'),  # too far apart
+        (13, '', birth, 'ANNA'), (14, 'KONSTANTINOVA', '', 'ANNA'),  # nothing to block on
+    ]
+    assert sorted(DBUnifier.fuzzy_duplicate_pairs(rows)) == [(1, 2), (3, 4), (5, 6)]
+
+def test_fuzzy_pairs_skip_oversized_blocks(monkeypatch):
+    rows = [(pid, 'PETROV', '1990-01-01', 'IVAN') for pid in (1, 2, 3)]
+    assert sorted(DBUnifier.fuzzy_duplicate_pairs(rows)) == [(1, 2), (1, 3), (2, 3)]
+    # Every gram of the three persons is then held by more than the block limit
+    monkeypatch.setattr(DBUnifier, 'FUZZY_MAX_BLOCK_SIZE', 2)
+    assert list(DBUnifier.fuzzy_duplicate_pairs(rows)) == []
+
+def person_schema(conn):
+    return sorted(conn.execute("SELECT type, name, sql FROM sqlite_master "
+                               "WHERE type IN ('index', 'trigger') AND tbl_name = 'Person'"))
+
+def test_person_swap_keeps_indexes_triggers_and_sequence(tmp_path):
+    path = str(tmp_path / 'swap.db')
+    create_sources(path)
+    ingest(path, FIRST_BATCH + SECOND_BATCH)
+    DBUnifier.merge_person_data(path)
+
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE INDEX idx_person_sex ON Person (Sex)")
+    conn.execute("CREATE TABLE person_log (PersonID INTEGER)")
+    conn.execute("CREATE TRIGGER person_logged AFTER INSERT ON Person BEGIN "
+                 "INSERT INTO person_log VALUES (new.PersonID); END")
+    # The sequence runs ahead of the largest PersonID once the newest person is deleted
+    conn.execute("DELETE FROM Person WHERE PersonID = (SELECT MAX(PersonID) FROM Person)")
+    conn.commit()
+    schema = person_schema(conn)
+    [sequence] = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'Person'").fetchone()
+    count = conn.execute("SELECT COUNT(*) FROM Person").fetchone()[0]
+    conn.close()
+
+    DBUnifier.merge_duplicates(path)
+
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT COUNT(*) FROM Person").fetchone()[0] < count
+    assert person_schema(conn) == schema
+    assert conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'Person'").fetchone() == (sequence,)
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'Person_merged'").fetchone() == (0,)
+    new_id = conn.execute("INSERT INTO Person (FirstName, LastName) VALUES ('OLGA', 'IVANOVA')").lastrowid
+    assert new_id == sequence + 1
+    assert conn.execute("SELECT PersonID FROM person_log").fetchall() == [(new_id,)]
+    # The identity key triggers still fire on the swapped-in table
+    [pid] = DBUnifier.persons_holding(conn, document='1234567')
+    conn.execute("DELETE FROM Person WHERE PersonID = ?", (pid,))
+    assert DBUnifier.persons_holding(conn, document='1234567') == []
+    conn.close()
+
+def test_identity_keys_cover_persons_inserted_directly(tmp_path):
+    path = str(tmp_path / 'insert.db')
+    create_sources(path)
+    ingest(path, FIRST_BATCH)
+    DBUnifier.merge_person_data(path)
+    DBUnifier.merge_duplicates(path)
+
+    conn = sqlite3.connect(path)
+    # Persons inserted by the unifier are indexed already, so none is left marked
+    assert conn.execute("SELECT COUNT(*) FROM person_identity_stale").fetchone() == (0,)
+    pid = conn.execute("INSERT INTO Person (FirstName, LastName, BirthDate, TravelDocuments, LoyaltyNumbers) "
+                       "VALUES ('OLGA', 'IVANOVA', '1970-07-07', '5550001', 'SU5550001')").lastrowid
+    assert DBUnifier.persons_holding(conn, document='5550001') == [pid]
+    assert DBUnifier.persons_holding(conn, loyalty_number='SU5550001') == [pid]
+    conn.close()